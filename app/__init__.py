@@ -1,26 +1,49 @@
 # app/__init__.py
-from flask import Flask
+from flask import Flask, jsonify
 from .config import Config
-from . import database
+from . import database, replicas, schema, cache, counters, feed, snapshot, json_provider, metrics, slowlog, transactions, writebehind, deletion
 
 def create_app(config_class=Config):
     """Factory pour créer et configurer l'application Flask."""
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Encodeur JSON des réponses (voir app/json_provider.py)
+    json_provider.init_app(app)
+    # Histogrammes de latence par route et par requête Cypher, GET /metrics (voir app/metrics.py)
+    metrics.init_app(app)
+    slowlog.init_app(app)
+
     # Initialiser les extensions (ex: connexion DB)
     database.init_app(app)
+    replicas.init_app(app)
+    transactions.init_app(app)
+    schema.init_app(app)
+    cache.init_app(app)
+    counters.init_app(app)
+    feed.init_app(app)
+    snapshot.init_app(app)
+    writebehind.init_app(app)
+    deletion.init_app(app)
 
     # Importer et enregistrer les Blueprints
-    from .routes import users, posts, comments # Assurez-vous que les variables de blueprint sont bien nommées dans les fichiers .py
+    from .routes import users, posts, comments, bulk, analytics, batch # Assurez-vous que les variables de blueprint sont bien nommées dans les fichiers .py
 
     app.register_blueprint(users.users_bp)
     app.register_blueprint(posts.posts_bp)
     app.register_blueprint(comments.comments_bp)
+    app.register_blueprint(bulk.bulk_bp)
+    app.register_blueprint(analytics.analytics_bp)
+    app.register_blueprint(batch.batch_bp)
 
     # Route simple pour vérifier que l'app fonctionne
     @app.route('/hello')
     def hello():
         return 'Hello, World!'
 
+    # Statistiques du pool Neo4j (connexions utilisées / inactives / attentes) pour le dimensionner
+    @app.route('/db/pool')
+    def db_pool_stats():
+        return jsonify(database.get_pool().stats()), 200
+
     return app
\ No newline at end of file
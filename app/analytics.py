@@ -0,0 +1,206 @@
+# app/analytics.py
+"""
+Calculs globaux sur la copie en mémoire du graphe d'amitié (app/snapshot.py), servis par
+/analytics/* : distribution des degrés, composantes connexes, triangles.
+
+Avec numpy (requirements-analytics.txt), les tableaux du CSR sont lus sans copie
+(np.frombuffer) et les calculs sont vectorisés ; sans numpy, des boucles Python équivalentes
+sont utilisées. Chaque résultat est gardé sur la copie (FriendGraph.results) : il n'est
+recalculé qu'après un rechargement ou l'application d'écritures.
+"""
+from collections import Counter
+from math import comb
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+# Nombre maximal de chemins de longueur 2 examinés à la fois par le comptage de triangles vectorisé
+WEDGE_BATCH = 1 << 22
+
+
+def memoized(snapshot, name, compute):
+    if name not in snapshot.results:
+        snapshot.results[name] = compute(snapshot)
+    return snapshot.results[name]
+
+def live_nodes(snapshot):
+    """Entiers des utilisateurs présents (hors utilisateurs supprimés depuis le chargement)."""
+    return sorted(snapshot.index.values())
+
+def as_numpy(snapshot):
+    """(offsets, targets) en tableaux numpy partageant la mémoire des `array` du CSR."""
+    offsets = np.frombuffer(snapshot.offsets, dtype=np.int32 if snapshot.offsets.itemsize == 4 else np.int64)
+    return offsets, np.frombuffer(snapshot.targets, dtype=np.int32)
+
+def degree_array(snapshot):
+    if np is not None:
+        offsets, _ = as_numpy(snapshot)
+        return np.diff(offsets)
+    offsets = snapshot.offsets
+    return [offsets[node + 1] - offsets[node] for node in range(len(offsets) - 1)]
+
+
+def degrees(snapshot, top=10):
+    """Distribution des degrés (nombre d'amis) et utilisateurs les plus connectés."""
+    def compute(snapshot):
+        nodes = live_nodes(snapshot)
+        degree = degree_array(snapshot)
+        if np is not None:
+            live = degree[np.array(nodes, dtype=np.int64)]
+            values, counts = np.unique(live, return_counts=True)
+            histogram = dict(zip(values.tolist(), counts.tolist()))
+            order = np.argsort(-live, kind='stable')[:100]
+            ranked = [(nodes[i], int(live[i])) for i in order]
+            ordered, total = np.sort(live), int(live.sum())
+        else:
+            live = [degree[node] for node in nodes]
+            histogram = dict(sorted(Counter(live).items()))
+            ranked = sorted(zip(nodes, live), key=lambda item: -item[1])[:100]
+            ordered, total = sorted(live), sum(live)
+        count = len(nodes)
+        return {
+            "users": count,
+            "min": int(ordered[0]) if count else 0,
+            "max": int(ordered[-1]) if count else 0,
+            "mean": round(total / count, 3) if count else 0,
+            "median": int(ordered[count // 2]) if count else 0,
+            "histogram": [{"degree": d, "users": n} for d, n in histogram.items()],
+            "ranked": [(snapshot.ids[node], d) for node, d in ranked],
+        }
+    result = dict(memoized(snapshot, 'degrees', compute))
+    result["top"] = [{"id": user_id, "friends": d} for user_id, d in result.pop("ranked")[:top]]
+    return result
+
+
+def component_labels(snapshot):
+    """
+    Étiquette de composante de chaque nœud : le plus petit entier de sa composante.
+    numpy : propagation du minimum le long des relations, accélérée par saut de pointeurs
+    (labels[labels]), jusqu'au point fixe. Sinon : parcours en largeur sur le CSR.
+    """
+    size = len(snapshot.offsets) - 1
+    if np is not None:
+        offsets, targets = as_numpy(snapshot)
+        sources = np.repeat(np.arange(size, dtype=np.int64), np.diff(offsets))
+        labels = np.arange(size, dtype=np.int64)
+        while True:
+            updated = labels.copy()
+            np.minimum.at(updated, sources, labels[targets])
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                return labels
+            labels = updated
+    labels = [-1] * size
+    for start in range(size):
+        if labels[start] != -1:
+            continue
+        labels[start] = start
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for other in snapshot.neighbors(node):
+                    if labels[other] == -1:
+                        labels[other] = start
+                        next_frontier.append(other)
+            frontier = next_frontier
+    return labels
+
+def components(snapshot, top=10):
+    """Nombre et taille des composantes connexes (un utilisateur sans ami en forme une à lui seul)."""
+    def compute(snapshot):
+        labels = component_labels(snapshot)
+        nodes = live_nodes(snapshot)
+        if np is not None:
+            values, counts = np.unique(labels[np.array(nodes, dtype=np.int64)], return_counts=True)
+            sizes = dict(zip(values.tolist(), counts.tolist()))
+        else:
+            sizes = Counter(labels[node] for node in nodes)
+        ranked = sorted(sizes.items(), key=lambda item: -item[1])
+        users = snapshot.num_nodes
+        return {
+            "components": len(sizes),
+            "isolated_users": sum(1 for n in sizes.values() if n == 1),
+            "largest_fraction": round(ranked[0][1] / users, 4) if users else 0,
+            "ranked": [(snapshot.ids[int(label)], n) for label, n in ranked[:100]],
+        }
+    result = dict(memoized(snapshot, 'components', compute))
+    result["largest"] = [{"size": n, "example_user": user_id} for user_id, n in result.pop("ranked")[:top]]
+    return result
+
+
+def triangle_counts(snapshot):
+    """
+    Nombre de triangles auxquels participe chaque nœud. Chaque relation est orientée du nœud
+    de plus petit rang (degré, entier) vers l'autre : un triangle n'est vu qu'une fois, depuis
+    son nœud de plus petit rang, et les listes orientées des super-nœuds restent courtes.
+    """
+    size = len(snapshot.offsets) - 1
+    if np is not None:
+        offsets, targets = as_numpy(snapshot)
+        degree = np.diff(offsets)
+        sources = np.repeat(np.arange(size, dtype=np.int64), degree)
+        targets = targets.astype(np.int64)
+        forward = (degree[targets] > degree[sources]) | ((degree[targets] == degree[sources]) & (targets > sources))
+        # Les sources restent groupées par nœud, comme dans le CSR
+        sources, targets = sources[forward], targets[forward]
+        starts = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=size))))
+        forward_degree = np.diff(starts)
+        # Chaque relation orientée (a, b) encodée en un entier a * size + b, triés pour searchsorted
+        keys = np.sort(sources * size + targets)
+        counts = np.zeros(size, dtype=np.int64)
+        if not len(keys):
+            return counts
+        # Chemins u -> v -> w (rangs croissants) : triangle si u -> w existe. Les chemins sont
+        # générés par lots de relations (u, v) pour borner la mémoire
+        lengths = forward_degree[targets]
+        ends = np.cumsum(lengths)
+        lo = 0
+        while lo < len(sources):
+            hi = max(lo + 1, int(np.searchsorted(ends, ends[lo] - lengths[lo] + WEDGE_BATCH, side='right')))
+            u, v, length = sources[lo:hi], targets[lo:hi], lengths[lo:hi]
+            lo = hi
+            total = int(length.sum())
+            if not total:
+                continue
+            # Positions des voisins en avant de chaque v, concaténées sans boucle Python
+            positions = np.repeat(starts[v] - (np.cumsum(length) - length), length) + np.arange(total)
+            w = targets[positions]
+            u, v = np.repeat(u, length), np.repeat(v, length)
+            wanted = u * size + w
+            closed = keys[np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)] == wanted
+            for nodes in (u[closed], v[closed], w[closed]):
+                counts += np.bincount(nodes, minlength=size)
+        return counts
+    degree = degree_array(snapshot)
+    rank = lambda node: (degree[node], node)
+    forward = [{other for other in snapshot.neighbors(node) if rank(other) > rank(node)} for node in range(size)]
+    counts = [0] * size
+    for node, out in enumerate(forward):
+        for other in out:
+            for third in forward[other] & out:
+                counts[node] += 1
+                counts[other] += 1
+                counts[third] += 1
+    return counts
+
+def triangles(snapshot, top=10):
+    """Nombre de triangles, coefficient de clustering global et utilisateurs les plus impliqués."""
+    def compute(snapshot):
+        counts = triangle_counts(snapshot)
+        degree = degree_array(snapshot)
+        nodes = live_nodes(snapshot)
+        total = int(sum(counts[node] for node in nodes)) // 3
+        # Triplets connectés : chemins de longueur 2 centrés sur chaque nœud
+        triples = sum(comb(int(degree[node]), 2) for node in nodes)
+        ranked = sorted(((node, int(counts[node])) for node in nodes if counts[node]), key=lambda item: -item[1])
+        return {
+            "triangles": total,
+            "global_clustering": round(3 * total / triples, 4) if triples else 0,
+            "ranked": [(snapshot.ids[node], n) for node, n in ranked[:100]],
+        }
+    result = dict(memoized(snapshot, 'triangles', compute))
+    result["top"] = [{"id": user_id, "triangles": n} for user_id, n in result.pop("ranked")[:top]]
+    return result
@@ -0,0 +1,313 @@
+# app/asgi.py
+"""
+Mode de service asynchrone (ASGI) : `uvicorn asgi:app`.
+
+py2neo n'a pas d'API asynchrone : en mode WSGI chaque requête bloque un thread pendant
+toute la durée de ses appels Cypher. Ici les GET les plus sollicités sont servis par des
+handlers `async` sur le driver officiel `neo4j` (AsyncGraphDatabase), si bien qu'un seul
+processus garde des centaines de requêtes Cypher en vol, et les sous-requêtes
+indépendantes partent en parallèle (asyncio.gather). Toutes les autres routes, ainsi que
+le mode streaming, sont transmises telles quelles à l'application Flask, exécutée dans le
+pool de threads d'asgiref : les deux chemins partagent la configuration et le cache. Le
+client redis du cache partagé est synchrone : ses appels passent par asyncio.to_thread.
+
+Dépendances optionnelles : `pip install neo4j asgiref uvicorn` (requirements-async.txt).
+"""
+import asyncio
+import re
+from urllib.parse import parse_qs
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+from app import create_app, cache, etag
+from app.config import Config
+from app.streaming import JSON_ARRAY, NDJSON
+from app.routes.users import user_node_to_dict
+from app.routes.posts import post_record_to_dict
+from app.routes.comments import comment_record_to_dict
+
+
+class AsyncGraph:
+    """Driver Neo4j asynchrone partagé par toutes les requêtes de la boucle d'événements."""
+
+    def __init__(self, uri, auth, max_size=50, acquisition_timeout=60.0,
+                 max_lifetime=3600.0, liveness_check_timeout=30.0):
+        try:
+            from neo4j import AsyncGraphDatabase
+        except ImportError:
+            raise RuntimeError("The async mode requires the 'neo4j' package (pip install neo4j)")
+        options = {
+            "auth": auth,
+            "max_connection_pool_size": max_size,
+            "connection_acquisition_timeout": acquisition_timeout,
+            "max_connection_lifetime": max_lifetime,
+        }
+        # Même convention que GraphPool : une valeur négative désactive la vérification
+        if liveness_check_timeout >= 0:
+            options["liveness_check_timeout"] = liveness_check_timeout
+        self.driver = AsyncGraphDatabase.driver(uri, **options)
+
+    async def run(self, query, **params):
+        """Exécute une requête et retourne la liste de ses Record."""
+        async with self.driver.session() as session:
+            result = await session.run(query, params)
+            return [record async for record in result]
+
+    async def evaluate(self, query, **params):
+        """Première valeur de la première ligne (ou None), comme Graph.evaluate de py2neo."""
+        records = await self.run(query, **params)
+        return records[0][0] if records else None
+
+    async def close(self):
+        await self.driver.close()
+
+
+class AsyncRequest:
+    """Le peu de la requête HTTP dont les handlers asynchrones ont besoin."""
+
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.args = {k: v[0] for k, v in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        self.if_none_match = parse_etags(self.headers.get('if-none-match'))
+
+    def wants_stream(self):
+        """Même règle que streaming.requested_mode()."""
+        accept = parse_accept_header(self.headers.get('accept'), MIMEAccept)
+        return (accept.best_match([JSON_ARRAY, NDJSON]) == NDJSON
+                or self.args.get('stream', '').lower() in ('1', 'true', 'yes'))
+
+
+# --- Handlers : retournent (status, corps JSON ou None, en-têtes) ---
+
+async def cache_get(key):
+    """cache.get sans bloquer la boucle : le cache partagé (redis) est lu dans un thread."""
+    if isinstance(cache.get_cache(), cache.SharedStoreCache):
+        return await asyncio.to_thread(cache.get, key)
+    return cache.get(key)
+
+async def cache_set(key, value):
+    if isinstance(cache.get_cache(), cache.SharedStoreCache):
+        return await asyncio.to_thread(cache.set, key, value)
+    return cache.set(key, value)
+
+def not_found(message):
+    return 404, {"error": message}, {}
+
+def with_etag(entry, req):
+    """Équivalent asynchrone de etag.cached_response."""
+    if etag.matches(entry['etag'], req.if_none_match):
+        return 304, None, {'ETag': entry['etag']}
+    return 200, entry['data'], {'ETag': entry['etag']}
+
+async def precondition(req, graph, version_query, key, **params):
+    """Équivalent asynchrone de etag.precondition."""
+    if not req.if_none_match:
+        return None
+    version = await graph.evaluate(version_query, **params)
+    if version is None:
+        return None
+    tag = etag.make_etag(*key, version)
+    return (304, None, {'ETag': tag}) if etag.matches(tag, req.if_none_match) else None
+
+async def get_user_by_id(req, graph, user_id):
+    cached = await cache_get(cache.user_key(user_id))
+    if cached is not None:
+        return with_etag(cached, req)
+    not_modified = await precondition(req, graph, "MATCH (u:User {id: $id}) RETURN coalesce(u.rev, 0)",
+                                      ('user', user_id), id=user_id)
+    if not_modified: return not_modified
+
+    result = await graph.run("MATCH (u:User {id: $id}) RETURN u", id=user_id)
+    if not result:
+        return not_found("User not found")
+    user_node = result[0]['u']
+    entry = {'etag': etag.make_etag('user', user_id, user_node.get('rev') or 0),
+             'data': user_node_to_dict(user_node)}
+    await cache_set(cache.user_key(user_id), entry)
+    return with_etag(entry, req)
+
+async def get_user_friends(req, graph, user_id):
+    not_modified = await precondition(req, graph, "MATCH (u:User {id: $id}) RETURN coalesce(u.friends_rev, 0)",
+                                      ('user-friends', user_id), id=user_id)
+    if not_modified: return not_modified
+
+    records = await graph.run("""
+    MATCH (u:User {id: $id})
+    OPTIONAL MATCH (u)-[:FRIENDS_WITH]->(friend:User)
+    RETURN coalesce(u.friends_rev, 0) as version, friend
+    """, id=user_id)
+    headers = {'ETag': etag.make_etag('user-friends', user_id, records[0]['version'])} if records else {}
+    return 200, [user_node_to_dict(r['friend']) for r in records if r['friend'] is not None], headers
+
+async def get_mutual_friends(req, graph, user_id, other_user_id):
+    # Les deux vérifications d'existence et la lecture des amis communs sont indépendantes :
+    # elles partent en même temps sur trois sessions du pool
+    exists = "MATCH (u:User {id: $id}) RETURN count(u) > 0"
+    u1_found, u2_found, records = await asyncio.gather(
+        graph.evaluate(exists, id=user_id),
+        graph.evaluate(exists, id=other_user_id),
+        graph.run("""
+        MATCH (u1:User {id: $user_id})-[:FRIENDS_WITH]->(mutual_friend:User)<-[:FRIENDS_WITH]-(u2:User {id: $other_user_id})
+        WHERE u1 <> u2
+        RETURN mutual_friend
+        """, user_id=user_id, other_user_id=other_user_id),
+    )
+    if not u1_found or not u2_found:
+        missing = [u for u, found in [(user_id, u1_found), (other_user_id, u2_found)] if not found]
+        return not_found(f"User(s) not found: {', '.join(missing)}")
+    return 200, [user_node_to_dict(r['mutual_friend']) for r in records], {}
+
+async def get_post_by_id(req, graph, post_id):
+    cached = await cache_get(cache.post_key(post_id))
+    if cached is not None:
+        return with_etag(cached, req)
+    not_modified = await precondition(
+        req, graph, "MATCH (p:Post {id: $id})<-[:CREATED]-(u:User) RETURN [coalesce(p.rev, 0), coalesce(u.rev, 0)]",
+        ('post', post_id), id=post_id)
+    if not_modified: return not_modified
+
+    result = await graph.run("""
+    MATCH (p:Post {id: $id})<-[:CREATED]-(u:User)
+    RETURN p, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev
+    """, id=post_id)
+    if not result:
+        return not_found("Post not found")
+    record = result[0]
+    entry = {'etag': etag.make_etag('post', post_id, [record['p'].get('rev') or 0, record['author_rev']]),
+             'data': post_record_to_dict(record)}
+    await cache_set(cache.post_key(post_id), entry)
+    return with_etag(entry, req)
+
+async def get_post_comments(req, graph, post_id):
+    not_modified = await precondition(req, graph, "MATCH (p:Post {id: $id}) RETURN coalesce(p.comments_rev, 0)",
+                                      ('post-comments', post_id), id=post_id)
+    if not_modified: return not_modified
+
+    records = await graph.run("""
+    OPTIONAL MATCH (p:Post {id: $post_id})
+    OPTIONAL MATCH (p)-[:HAS_COMMENT]->(c:Comment)<-[:CREATED]-(u:User)
+    RETURN p IS NOT NULL as post_found, coalesce(p.comments_rev, 0) as version,
+           c, u.id as author_id, u.name as author_name
+    ORDER BY c.created_at ASC
+    """, post_id=post_id)
+    if not records or not records[0]['post_found']:
+        return not_found(f"Post with id {post_id} not found")
+    tag = etag.make_etag('post-comments', post_id, records[0]['version'])
+    return 200, [comment_record_to_dict(r) for r in records if r['c'] is not None], {'ETag': tag}
+
+async def get_comment_by_id(req, graph, comment_id):
+    cached = await cache_get(cache.comment_key(comment_id))
+    if cached is not None:
+        return with_etag(cached, req)
+    not_modified = await precondition(
+        req, graph, "MATCH (c:Comment {id: $id})<-[:CREATED]-(u:User) RETURN [coalesce(c.rev, 0), coalesce(u.rev, 0)]",
+        ('comment', comment_id), id=comment_id)
+    if not_modified: return not_modified
+
+    result = await graph.run("""
+    MATCH (c:Comment {id: $id})<-[:CREATED]-(u:User)
+    MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    RETURN c, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev, p.id as post_id
+    """, id=comment_id)
+    if not result:
+        return not_found("Comment not found")
+    record = result[0]
+    entry = {'etag': etag.make_etag('comment', comment_id, [record['c'].get('rev') or 0, record['author_rev']]),
+             'data': comment_record_to_dict(record)}
+    await cache_set(cache.comment_key(comment_id), entry)
+    return with_etag(entry, req)
+
+# (méthode, motif du chemin, handler, route servie en streaming par Flask)
+ROUTES = [
+    ('GET', r'/users/([^/]+)', get_user_by_id, False),
+    ('GET', r'/users/([^/]+)/friends', get_user_friends, True),
+    ('GET', r'/users/([^/]+)/mutual_friends/([^/]+)', get_mutual_friends, True),
+    ('GET', r'/posts/([^/]+)', get_post_by_id, False),
+    ('GET', r'/posts/([^/]+)/comments', get_post_comments, True),
+    ('GET', r'/comments/([^/]+)', get_comment_by_id, False),
+]
+
+
+class AsgiApp:
+    """Application ASGI : handlers asynchrones pour ROUTES, application Flask pour le reste."""
+
+    def __init__(self, flask_app):
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError:
+            raise RuntimeError("The async mode requires the 'asgiref' package (pip install asgiref)")
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.routes = [(method, re.compile(pattern + '$'), handler, streams)
+                       for method, pattern, handler, streams in ROUTES]
+        self._graph = None
+
+    @property
+    def graph(self):
+        """Crée le driver au premier accès, dans la boucle d'événements du serveur."""
+        if self._graph is None:
+            config = self.flask_app.config
+            self._graph = AsyncGraph(
+                config['NEO4J_URI'],
+                auth=(config['NEO4J_USER'], config['NEO4J_PASSWORD']),
+                max_size=config['NEO4J_MAX_CONNECTION_POOL_SIZE'],
+                acquisition_timeout=config['NEO4J_CONNECTION_ACQUISITION_TIMEOUT'],
+                max_lifetime=config['NEO4J_MAX_CONNECTION_LIFETIME'],
+                liveness_check_timeout=config['NEO4J_LIVENESS_CHECK_TIMEOUT'],
+            )
+        return self._graph
+
+    def match(self, req):
+        for method, pattern, handler, streams in self.routes:
+            found = pattern.match(req.path)
+            if found and method == req.method:
+                # Flux et projections (?fields= / ?include=, voir app/projection.py) : servis par Flask
+                if streams and req.wants_stream() or 'fields' in req.args or 'include' in req.args:
+                    return None
+                return handler, found.groups()
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http':
+            req = AsyncRequest(scope)
+            route = self.match(req)
+            if route:
+                return await self.dispatch(req, *route, send)
+        return await self.wsgi(scope, receive, send)
+
+    async def dispatch(self, req, handler, args, send):
+        # Le contexte d'application donne accès au cache et au JSON de Flask (contextvars : un par tâche)
+        with self.flask_app.app_context():
+            try:
+                status, body, headers = await handler(req, self.graph, *args)
+            except Exception as e:
+                print(f"Error handling {req.method} {req.path} (async): {e}")
+                status, body, headers = 500, {"error": "An unexpected error occurred"}, {}
+            # Même sérialisation que jsonify côté Flask
+            payload = b'' if body is None else self.flask_app.json.response(body).get_data()
+        response_headers = [(b'content-length', str(len(payload)).encode('latin-1'))]
+        if body is not None:
+            response_headers.append((b'content-type', b'application/json'))
+        response_headers += [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers.items()]
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._graph is not None:
+                    await self._graph.close()
+                    self._graph = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_class=Config):
+    """Factory du mode ASGI, à partir de la même configuration que create_app."""
+    return AsgiApp(create_app(config_class))
@@ -0,0 +1,326 @@
+# app/cache.py
+"""
+Cache "read-through" des GET unitaires (/users/<id>, /posts/<id>, /comments/<id>), partagé
+avec les lectures groupées (/users:batchGet, ..., voir app/routes/batch.py).
+
+Les routes de lecture consultent le cache avant d'ouvrir une connexion Neo4j et y
+déposent la réponse en cas d'absence. Les routes d'écriture invalident exactement les
+clés touchées (voir les helpers *_key ci-dessous). Backends disponibles (CACHE_BACKEND) :
+- "memory" : LRU en mémoire du processus, bornée en taille et en durée de vie ;
+- "redis"  : magasin partagé entre processus (paquet `redis` requis) ;
+- "fake"   : magasin partagé simulé en mémoire, même interface que redis (tests, dev).
+CACHE_ENABLED=false désactive le cache sans toucher aux routes.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, jsonify
+from app.database import reading_replica
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+def post_key(post_id):
+    return f"post:{post_id}"
+
+def comment_key(comment_id):
+    return f"comment:{comment_id}"
+
+def suggestions_key(user_id):
+    return f"suggestions:{user_id}"
+
+
+class CacheStats:
+    """Compteurs communs à tous les backends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "sets": self.sets,
+                    "invalidations": self.invalidations, "evictions": self.evictions}
+
+
+class NullCache:
+    """Cache désactivé : toujours absent, écritures ignorées."""
+    backend = "none"
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def get_many(self, keys):
+        return {}
+
+    def set_many(self, items):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def stats(self):
+        return {"backend": self.backend, "enabled": False}
+
+
+class LRUCache:
+    """LRU en mémoire avec TTL ; une entrée expirée ou poussée dehors compte comme éviction."""
+    backend = "memory"
+
+    def __init__(self, max_entries=10000, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clé -> (expire_at, valeur)
+        self._lock = threading.Lock()
+        self.counters = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.counters.incr('evictions')
+                entry = None
+            if entry is None:
+                self.counters.incr('misses')
+                return None
+            self._entries.move_to_end(key)
+        self.counters.incr('hits')
+        return entry[1]
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def get_many(self, keys):
+        """{clé: valeur} des clés présentes, sous un seul verrou."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    del self._entries[key]
+                    self.counters.incr('evictions')
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+        self.counters.incr('hits', len(found))
+        self.counters.incr('misses', len(keys) - len(found))
+        return found
+
+    def set_many(self, items):
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters.incr('evictions')
+        self.counters.incr('sets', len(items))
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        self.counters.incr('invalidations', len(keys))
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"backend": self.backend, "enabled": True, "size": size,
+                "max_entries": self.max_entries, "ttl": self.ttl, **self.counters.as_dict()}
+
+
+class SharedStoreCache:
+    """
+    Cache sur un magasin clé/valeur partagé entre processus. `client` doit fournir le
+    sous-ensemble de l'API redis utilisé ici : get, mget, set(ex=), pipeline, delete, info('stats').
+    Les valeurs sont stockées en JSON.
+    """
+    backend = "redis"
+
+    def __init__(self, client, ttl=60.0, prefix="neo4j-tp:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.counters = CacheStats()
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.counters.incr('misses')
+            return None
+        self.counters.incr('hits')
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+        self.counters.incr('sets')
+
+    def get_many(self, keys):
+        """Un seul MGET pour toutes les clés."""
+        if not keys:
+            return {}
+        raws = self.client.mget([self.prefix + key for key in keys])
+        found = {key: json.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+        self.counters.incr('hits', len(found))
+        self.counters.incr('misses', len(keys) - len(found))
+        return found
+
+    def set_many(self, items):
+        """Toutes les écritures dans un seul pipeline (un aller-retour)."""
+        pipeline = self.client.pipeline()
+        for key, value in items.items():
+            pipeline.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl)))
+        pipeline.execute()
+        self.counters.incr('sets', len(items))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+        self.counters.incr('invalidations', len(keys))
+
+    def stats(self):
+        counters = self.counters.as_dict()
+        # Les évictions sont faites par le magasin lui-même (maxmemory / expiration)
+        counters['evictions'] = self.client.info('stats').get('evicted_keys', 0)
+        return {"backend": self.backend, "enabled": True, "ttl": self.ttl, **counters}
+
+
+class FakeSharedStore:
+    """Magasin en mémoire qui imite le sous-ensemble redis utilisé par SharedStoreCache."""
+
+    def __init__(self):
+        self._data = {}  # clé -> (expire_at ou None, valeur)
+        self._lock = threading.Lock()
+        self._evicted = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                self._evicted += 1
+                entry = None
+            return None if entry is None else entry[1]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex if ex else None, value.encode('utf-8'))
+        return True
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def info(self, section=None):
+        with self._lock:
+            return {"evicted_keys": self._evicted}
+
+
+class FakePipeline:
+    """Pipeline redis simulé : les commandes sont exécutées à execute()."""
+
+    def __init__(self, store):
+        self.store = store
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append((key, value, ex))
+
+    def execute(self):
+        results = [self.store.set(key, value, ex=ex) for key, value, ex in self._commands]
+        self._commands = []
+        return results
+
+
+def create_cache(config):
+    """Construit le backend décrit par la configuration."""
+    if not config['CACHE_ENABLED']:
+        return NullCache()
+    backend = config['CACHE_BACKEND']
+    if backend == 'memory':
+        return LRUCache(max_entries=config['CACHE_MAX_ENTRIES'], ttl=config['CACHE_TTL'])
+    if backend == 'fake':
+        cache = SharedStoreCache(FakeSharedStore(), ttl=config['CACHE_TTL'])
+        cache.backend = 'fake'
+        return cache
+    if backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        return SharedStoreCache(redis.Redis.from_url(config['CACHE_REDIS_URL']), ttl=config['CACHE_TTL'])
+    raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+
+
+# --- Accès depuis les routes : une panne du cache ne doit jamais faire échouer la requête ---
+
+def get_cache():
+    return current_app.extensions['cache']
+
+def get(key):
+    try:
+        return get_cache().get(key)
+    except Exception as e:
+        print(f"Cache error reading {key}: {e}")
+        return None
+
+def set(key, value):
+    # Une réplique en retard remettrait en cache une valeur que l'écriture vient d'invalider
+    if reading_replica():
+        return
+    try:
+        get_cache().set(key, value)
+    except Exception as e:
+        print(f"Cache error writing {key}: {e}")
+
+def get_many(keys):
+    """{clé: valeur} des clés présentes dans le cache (un seul accès au magasin)."""
+    try:
+        return get_cache().get_many(list(keys))
+    except Exception as e:
+        print(f"Cache error reading {len(keys)} keys: {e}")
+        return {}
+
+def set_many(items):
+    if not items or reading_replica():
+        return
+    try:
+        get_cache().set_many(items)
+    except Exception as e:
+        print(f"Cache error writing {len(items)} keys: {e}")
+
+def invalidate(*keys):
+    try:
+        get_cache().delete(*keys)
+    except Exception as e:
+        print(f"Cache error invalidating {', '.join(keys)}: {e}")
+
+def init_app(app):
+    """Crée le cache de l'application et expose ses compteurs sur /cache/stats."""
+    app.extensions['cache'] = create_cache(app.config)
+
+    @app.route('/cache/stats')
+    def cache_stats():
+        return jsonify(get_cache().stats()), 200
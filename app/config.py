@@ -11,3 +11,106 @@ class Config:
     NEO4J_URI = os.environ.get('NEO4J_URI', 'bolt://localhost:7687')
     NEO4J_USER = os.environ.get('NEO4J_USER', 'neo4j')
     NEO4J_PASSWORD = os.environ.get('NEO4J_PASSWORD', 'password')
+
+    # Pool de connexions Neo4j partagé par tout le processus (voir app/database.py)
+    NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.environ.get('NEO4J_MAX_CONNECTION_POOL_SIZE', 50))
+    # Temps d'attente maximal (secondes) pour obtenir une connexion quand le pool est plein
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.environ.get('NEO4J_CONNECTION_ACQUISITION_TIMEOUT', 60))
+    # Durée de vie maximale (secondes) d'une connexion avant qu'elle soit recyclée
+    NEO4J_MAX_CONNECTION_LIFETIME = float(os.environ.get('NEO4J_MAX_CONNECTION_LIFETIME', 3600))
+    # Ping "RETURN 1" uniquement si le pool est resté inactif plus longtemps que ce délai (secondes).
+    # Une valeur négative désactive la vérification.
+    NEO4J_LIVENESS_CHECK_TIMEOUT = float(os.environ.get('NEO4J_LIVENESS_CHECK_TIMEOUT', 30))
+
+    # Lectures (GET) envoyées aux répliques, écritures au primaire NEO4J_URI (voir app/replicas.py)
+    NEO4J_READ_ROUTING = os.environ.get('NEO4J_READ_ROUTING', 'false').lower() in ('1', 'true', 'yes')
+    NEO4J_READ_URIS = os.environ.get('NEO4J_READ_URIS', '')  # séparées par des virgules
+    NEO4J_REPLICA_REFRESH_INTERVAL = float(os.environ.get('NEO4J_REPLICA_REFRESH_INTERVAL', 1))
+    # Retard (secondes) au-delà duquel une réplique ne reçoit plus de lectures
+    NEO4J_REPLICA_MAX_LAG = float(os.environ.get('NEO4J_REPLICA_MAX_LAG', 10))
+
+    # Encodeur JSON des réponses (voir app/json_provider.py)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')  # auto | orjson | stdlib
+
+    # Mesures par route et par requête Cypher exposées sur GET /metrics (voir app/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Journal des requêtes Cypher plus lentes que ce seuil (secondes, négatif : désactivé ; voir app/slowlog.py)
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.5))
+    SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 100))
+    # Fraction des requêtes lentes rejouées sous PROFILE (EXPLAIN pour les écritures) ; 0 : jamais
+    SLOW_QUERY_PROFILE_SAMPLE = float(os.environ.get('SLOW_QUERY_PROFILE_SAMPLE', 0))
+
+    # Pagination par curseur des routes de liste (GET /users, /posts, /comments)
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 500))
+    # Lignes lues par requête en mode flux (?stream=true / NDJSON, voir app/streaming.py)
+    STREAM_PAGE_SIZE = int(os.environ.get('STREAM_PAGE_SIZE', 1000))
+    # Commentaires embarqués par post avec ?include=comments (voir app/projection.py)
+    PROJECTION_COMMENTS_MAX = int(os.environ.get('PROJECTION_COMMENTS_MAX', 10))
+
+    # Crée les contraintes et index manquants au démarrage (voir app/schema.py)
+    NEO4J_SCHEMA_BOOTSTRAP = os.environ.get('NEO4J_SCHEMA_BOOTSTRAP', 'true').lower() in ('1', 'true', 'yes')
+
+    # Nombre d'éléments écrits par transaction UNWIND sur les routes /bulk/*
+    BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))
+    # Nombre maximal d'ids par appel de /users:batchGet, /posts:batchGet, /comments:batchGet
+    BATCH_GET_MAX_IDS = int(os.environ.get('BATCH_GET_MAX_IDS', 100))
+
+    # Reprise des transactions d'écriture sur erreur transitoire (voir app/transactions.py)
+    WRITE_RETRY_MAX_ATTEMPTS = int(os.environ.get('WRITE_RETRY_MAX_ATTEMPTS', 5))
+    WRITE_RETRY_INITIAL_DELAY = float(os.environ.get('WRITE_RETRY_INITIAL_DELAY', 0.05))
+    WRITE_RETRY_MAX_DELAY = float(os.environ.get('WRITE_RETRY_MAX_DELAY', 1.0))
+    # Durée de vie des en-têtes Idempotency-Key enregistrés (secondes)
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+
+    # Cache des GET unitaires /users/<id>, /posts/<id>, /comments/<id> (voir app/cache.py)
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')  # memory | redis | fake
+    CACHE_TTL = float(os.environ.get('CACHE_TTL', 60))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Likes / unlikes acceptés tout de suite (202) et écrits par lots en arrière-plan (voir app/writebehind.py)
+    LIKES_WRITE_BEHIND = os.environ.get('LIKES_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+    LIKES_FLUSH_INTERVAL = float(os.environ.get('LIKES_FLUSH_INTERVAL', 0.5))
+    LIKES_FLUSH_BATCH = int(os.environ.get('LIKES_FLUSH_BATCH', 1000))
+    # Clés (utilisateur, cible) en attente au-delà desquelles les likes sont refusés (503)
+    LIKES_QUEUE_MAX_PENDING = int(os.environ.get('LIKES_QUEUE_MAX_PENDING', 100000))
+    # Répertoire du journal local de reprise après arrêt ; vide : file en mémoire seulement
+    LIKES_JOURNAL_DIR = os.environ.get('LIKES_JOURNAL_DIR', '')
+
+    # Suppressions en cascade de DELETE /users/<id> et /posts/<id> (voir app/deletion.py)
+    # false : suppression par lots dans la requête (200) au lieu d'un job en arrière-plan (202)
+    CASCADE_DELETE_ASYNC = os.environ.get('CASCADE_DELETE_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+    CASCADE_DELETE_BATCH = int(os.environ.get('CASCADE_DELETE_BATCH', 1000))
+    DELETE_JOB_POLL_INTERVAL = float(os.environ.get('DELETE_JOB_POLL_INTERVAL', 5))
+    # Secondes sans heartbeat après lesquelles un job en cours est repris par un autre processus
+    DELETE_JOB_LEASE = int(os.environ.get('DELETE_JOB_LEASE', 60))
+    DELETE_JOB_MAX_ATTEMPTS = int(os.environ.get('DELETE_JOB_MAX_ATTEMPTS', 3))
+    DELETE_JOB_RETENTION = int(os.environ.get('DELETE_JOB_RETENTION', 86400))
+
+    # Fil d'actualité GET /users/<id>/feed (voir app/feed.py)
+    FEED_ENABLED = os.environ.get('FEED_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # false : toujours lu dans le graphe
+    FEED_TIMELINE_SIZE = int(os.environ.get('FEED_TIMELINE_SIZE', 500))
+    FEED_MAX_TIMELINES = int(os.environ.get('FEED_MAX_TIMELINES', 10000))
+    # Timelines partagées entre workers avec CACHE_BACKEND=redis ; en mémoire (CACHE_BACKEND=memory),
+    # un post créé par un autre worker n'apparaît qu'après FEED_TIMELINE_TTL secondes au plus
+    FEED_TIMELINE_TTL = float(os.environ.get('FEED_TIMELINE_TTL', 60))
+    # Au-delà de ce nombre d'amis, les posts d'un auteur ne sont pas poussés mais lus à la demande
+    FEED_FANOUT_MAX_FRIENDS = int(os.environ.get('FEED_FANOUT_MAX_FRIENDS', 1000))
+
+    # Suggestions d'amis GET /users/<id>/suggestions
+    # Amis de plus de SUGGESTIONS_DEGREE_CAP amis ignorés comme intermédiaires (super-nœuds)
+    SUGGESTIONS_DEGREE_CAP = int(os.environ.get('SUGGESTIONS_DEGREE_CAP', 1000))
+    # Nombre maximal d'amis parcourus par calcul, et de suggestions calculées (et mises en cache)
+    SUGGESTIONS_MAX_FRIENDS = int(os.environ.get('SUGGESTIONS_MAX_FRIENDS', 500))
+    SUGGESTIONS_MAX = int(os.environ.get('SUGGESTIONS_MAX', 100))
+
+    # Plus court chemin GET /users/<id>/path/<other_id> (voir app/paths.py)
+    PATH_MAX_DEPTH = int(os.environ.get('PATH_MAX_DEPTH', 6))
+    PATH_MAX_EXPANSIONS = int(os.environ.get('PATH_MAX_EXPANSIONS', 200000))
+    # Copie en mémoire du graphe d'amitié, rechargée toutes les FRIEND_SNAPSHOT_REFRESH secondes (voir app/snapshot.py)
+    FRIEND_SNAPSHOT_ENABLED = os.environ.get('FRIEND_SNAPSHOT_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    FRIEND_SNAPSHOT_REFRESH = float(os.environ.get('FRIEND_SNAPSHOT_REFRESH', 300))
+    # Délai de regroupement des écritures appliquées à la copie entre deux chargements complets
+    FRIEND_SNAPSHOT_APPLY_INTERVAL = float(os.environ.get('FRIEND_SNAPSHOT_APPLY_INTERVAL', 1))
@@ -0,0 +1,96 @@
+# app/counters.py
+"""
+Compteurs dénormalisés affichés dans les payloads :
+- like_count sur Post et Comment (like / unlike, suppression d'un utilisateur) ;
+- comment_count sur Post (ajout / suppression de commentaire) ;
+- friend_count sur User (add_friend / remove_friend, suppression d'un ami).
+
+Les routes d'écriture les mettent à jour dans la même requête Cypher que la modification,
+ce qui évite un size((p)<-[:LIKES]-()) par post à chaque lecture. `reconcile` recalcule
+les compteurs par lots (pagination keyset sur id) et corrige les écarts éventuels
+(écritures antérieures aux compteurs, modifications faites hors de l'API...) :
+    flask counters reconcile [--batch-size 1000]
+"""
+import click
+from flask import current_app
+from app.database import get_pool
+from app import cache
+
+# label -> (compteurs {propriété: expression de recalcul}, mise à jour des révisions de listes, clé de cache)
+COUNTERS = {
+    "Post": (
+        {"like_count": "size([(n)<-[:LIKES]-(:User) | 1])",
+         "comment_count": "size([(n)-[:HAS_COMMENT]->(:Comment) | 1])"},
+        "",
+        cache.post_key,
+    ),
+    "Comment": (
+        {"like_count": "size([(n)<-[:LIKES]-(:User) | 1])"},
+        # like_count figure dans la liste des commentaires du post
+        "FOREACH (p IN [(p:Post)-[:HAS_COMMENT]->(n) | p] | SET p.comments_rev = coalesce(p.comments_rev, 0) + 1)",
+        cache.comment_key,
+    ),
+    "User": (
+        {"friend_count": "size([(n)-[:FRIENDS_WITH]->(:User) | 1])"},
+        # friend_count figure dans les listes d'amis de ses amis
+        "FOREACH (f IN [(n)-[:FRIENDS_WITH]->(f:User) | f] | SET f.friends_rev = coalesce(f.friends_rev, 0) + 1)",
+        cache.user_key,
+    ),
+}
+
+def reconcile_query(label):
+    """Requête qui vérifie un lot de nœuds et corrige ceux dont un compteur a dérivé."""
+    counters, touch_lists, _ = COUNTERS[label]
+    computed = ", ".join(f"{expr} AS {name}" for name, expr in counters.items())
+    drifted = " OR ".join(f"coalesce(n.{name}, 0) <> {name}" for name in counters)
+    fixes = ", ".join(f"n.{name} = {name}" for name in counters)
+    return f"""
+    MATCH (n:{label}) WHERE $after IS NULL OR n.id > $after
+    WITH n ORDER BY n.id LIMIT $batch_size
+    WITH n, {computed}
+    WITH n, {', '.join(counters)}, {drifted} AS drifted
+    FOREACH (_ IN CASE WHEN drifted THEN [1] ELSE [] END |
+        SET {fixes}, n.rev = coalesce(n.rev, 0) + 1
+        {touch_lists}
+    )
+    RETURN max(n.id) AS last_id, count(n) AS scanned, collect(CASE WHEN drifted THEN n.id END) AS fixed_ids
+    """
+
+def reconcile(graph, batch_size=1000, labels=None):
+    """
+    Recalcule les compteurs de tous les nœuds des labels donnés, un lot (une transaction)
+    à la fois. Retourne {label: {"scanned", "fixed"}} ; le cache des nœuds corrigés est invalidé.
+    """
+    report = {}
+    for label in labels or COUNTERS:
+        query = reconcile_query(label)
+        key = COUNTERS[label][2]
+        scanned = fixed = 0
+        after = None
+        while True:
+            batch = graph.run(query, after=after, batch_size=batch_size).data()[0]
+            if batch['last_id'] is None:
+                break
+            scanned += batch['scanned']
+            fixed += len(batch['fixed_ids'])
+            if batch['fixed_ids']:
+                cache.invalidate(*[key(node_id) for node_id in batch['fixed_ids']])
+            after = batch['last_id']
+        report[label] = {"scanned": scanned, "fixed": fixed}
+    return report
+
+def init_app(app):
+    """Enregistre la commande `flask counters reconcile`."""
+    @app.cli.group('counters')
+    def counters_cli():
+        """Compteurs dénormalisés (likes, commentaires, amis)."""
+
+    @counters_cli.command('reconcile')
+    @click.option('--batch-size', default=1000, show_default=True, help="Nœuds vérifiés par transaction.")
+    @click.option('--label', 'labels', multiple=True, type=click.Choice(list(COUNTERS)),
+                  help="Limiter à un label (option répétable).")
+    def reconcile_command(batch_size, labels):
+        """Recalcule les compteurs et corrige les écarts (idempotent)."""
+        report = reconcile(get_pool(current_app).graph, batch_size=batch_size, labels=labels or None)
+        for label, counts in report.items():
+            click.echo(f"{label:<8} scanned {counts['scanned']:>9}  fixed {counts['fixed']:>7}")
@@ -1,42 +1,231 @@
 # app/database.py
+import itertools
+import threading
+import time
 from py2neo import Graph
-from flask import current_app, g
+from flask import current_app, g, has_request_context, request
+from app import metrics
+
+
+class PoolTimeout(Exception):
+    """Levée quand aucune connexion ne se libère avant NEO4J_CONNECTION_ACQUISITION_TIMEOUT."""
+
+
+class GraphPool:
+    """
+    Driver Neo4j unique partagé par toutes les requêtes et tous les threads du processus.
+
+    py2neo gère lui-même un pool de connexions Bolt derrière un objet Graph : on n'en crée
+    donc qu'un seul (paresseusement, au premier get_db) au lieu d'un par requête.
+    Cette classe ajoute ce qui manque à py2neo : un nombre borné de "baux" simultanés avec
+    délai d'acquisition, une vérification de vie uniquement après une période d'inactivité,
+    et des statistiques pour dimensionner le pool sous charge.
+    """
+
+    def __init__(self, uri, auth, max_size=50, acquisition_timeout=60.0,
+                 max_lifetime=3600.0, liveness_check_timeout=30.0):
+        self.uri = uri
+        self.auth = auth
+        self.max_size = max_size
+        self.acquisition_timeout = acquisition_timeout
+        self.max_lifetime = max_lifetime
+        self.liveness_check_timeout = liveness_check_timeout
+
+        self._graph = None
+        self._graph_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._stats_lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._liveness_checks = 0
+
+    @property
+    def graph(self):
+        """Crée le Graph py2neo au premier accès (la base peut être absente au démarrage)."""
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = Graph(self.uri, auth=self.auth,
+                                        max_size=self.max_size, max_age=self.max_lifetime)
+                    # Le Graph vient d'ouvrir sa connexion initiale : inutile de la pinger
+                    self._last_used = time.monotonic()
+        return self._graph
+
+    def acquire(self):
+        """Réserve une connexion pour la requête courante et retourne le Graph partagé."""
+        if not self._slots.acquire(blocking=False):
+            started = time.monotonic()
+            with self._stats_lock:
+                self._waits += 1
+            acquired = self._slots.acquire(timeout=self.acquisition_timeout)
+            with self._stats_lock:
+                self._wait_time += time.monotonic() - started
+                if not acquired:
+                    self._timeouts += 1
+            if not acquired:
+                raise PoolTimeout(f"No Neo4j connection available after {self.acquisition_timeout}s")
+
+        with self._stats_lock:
+            self._in_use += 1
+            self._acquired += 1
+            idle_for = time.monotonic() - self._last_used
+
+        try:
+            graph = self.graph
+            if 0 <= self.liveness_check_timeout < idle_for:
+                with self._stats_lock:
+                    self._liveness_checks += 1
+                graph.run("RETURN 1")
+        except Exception:
+            self.release()
+            raise
+        return graph
+
+    def release(self):
+        """Rend la connexion réservée par acquire()."""
+        with self._stats_lock:
+            self._in_use -= 1
+            self._last_used = time.monotonic()
+        self._slots.release()
+
+    def stats(self):
+        """Statistiques du pool : connexions utilisées, inactives, attentes."""
+        idle = 0
+        if self._graph is not None:
+            # py2neo n'expose pas la taille de ses pools, seulement le nombre de connexions utilisées
+            connector = self._graph.service.connector
+            for pool in getattr(connector, '_pools', {}).values():
+                idle += pool.size - pool.in_use
+        with self._stats_lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": idle,
+                "available": self.max_size - self._in_use,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_time_seconds": round(self._wait_time, 6),
+                "timeouts": self._timeouts,
+                "liveness_checks": self._liveness_checks,
+            }
+
+    def close(self):
+        """Ferme toutes les connexions du pool (arrêt du processus, avant un fork...)."""
+        with self._graph_lock:
+            if self._graph is not None:
+                self._graph.service.connector.close()
+                self._graph = None
+
+    def reset(self):
+        """
+        Dans un processus fils juste après fork : oublie le Graph hérité sans fermer ses
+        sockets (elles appartiennent au parent) et repart de verrous et compteurs neufs.
+        """
+        self.__init__(self.uri, self.auth, max_size=self.max_size,
+                      acquisition_timeout=self.acquisition_timeout, max_lifetime=self.max_lifetime,
+                      liveness_check_timeout=self.liveness_check_timeout)
+
+
+def get_pool(app=None):
+    """Retourne le pool partagé de l'application."""
+    app = app or current_app
+    return app.extensions['neo4j']
+
+def get_pools(app=None):
+    """Pool du primaire puis ceux des répliques de lecture (voir app/replicas.py)."""
+    app = app or current_app
+    replicas = app.extensions.get('neo4j_replicas')
+    return [get_pool(app)] + (replicas.pools() if replicas is not None else [])
+
+def read_only(view):
+    """Marque une route qui ne fait que lire sans être un GET (ex: POST /users:batchGet)."""
+    view.read_only = True
+    return view
+
+def is_read_request():
+    if request.method in ('GET', 'HEAD'):
+        return True
+    return getattr(current_app.view_functions.get(request.endpoint), 'read_only', False)
+
+def select_pool():
+    """Pool du contexte : une réplique pour une requête en lecture si le routage est actif, sinon le primaire."""
+    replicas = current_app.extensions.get('neo4j_replicas')
+    if replicas is not None and has_request_context() and is_read_request():
+        pool = replicas.read_pool()
+        if pool is not None:
+            return pool
+    return get_pool()
+
+def reading_replica():
+    """Vrai si la connexion du contexte est celle d'une réplique (données peut-être en retard)."""
+    pool = g.get('graph_pool')
+    return pool is not None and pool is not get_pool()
 
 def get_db():
     """
-    Ouvre une nouvelle connexion à la base de données si aucune n'existe pour le contexte actuel.
-    Utilise le contexte d'application Flask 'g' pour stocker la connexion.
+    Retourne le Graph partagé et réserve une connexion du pool pour le contexte actuel.
+    La réservation est stockée dans le contexte d'application Flask 'g' et rendue par close_db.
     """
     if 'graph' not in g:
         try:
-            g.graph = Graph(
-                current_app.config['NEO4J_URI'],
-                auth=(current_app.config['NEO4J_USER'], current_app.config['NEO4J_PASSWORD'])
-            )
-            # Vérifie la connexion
-            g.graph.run("RETURN 1")
-            print("Successfully connected to Neo4j.")
+            started = time.perf_counter()
+            pool = select_pool()
+            try:
+                graph = pool.acquire()
+            except Exception as e:
+                if pool is get_pool():
+                    raise
+                # Réplique injoignable : lecture sur le primaire
+                current_app.extensions['neo4j_replicas'].mark_down(pool, e)
+                pool = get_pool()
+                graph = pool.acquire()
+            metrics.observe_acquire(time.perf_counter() - started)
+            # Graph instrumenté si METRICS_ENABLED (voir app/metrics.py)
+            g.graph = metrics.instrument(graph)
+            g.graph_pool = pool
         except Exception as e:
             print(f"Failed to connect to Neo4j: {e}")
-            # Vous pourriez vouloir lever une exception ici ou gérer l'erreur autrement
             g.graph = None # Marquer comme non connecté
     return g.graph
 
 def close_db(e=None):
     """
-    Ferme la connexion à la base de données si elle existe dans le contexte 'g'.
-    Cette fonction est généralement enregistrée pour être appelée à la fin de chaque requête.
-    (py2neo gère le pooling, donc fermer explicitement n'est pas toujours nécessaire,
-     mais c'est une bonne pratique pour libérer les ressources du contexte 'g').
+    Rend au pool la connexion réservée par get_db pour ce contexte.
+    Cette fonction est enregistrée pour être appelée à la fin de chaque requête.
+    Le Graph lui-même n'est jamais fermé ici : il est partagé par tout le processus.
     """
     graph = g.pop('graph', None)
-    # py2neo gère son propre pool de connexions, donc il n'y a pas de méthode close() explicite
-    # sur l'objet Graph principal à appeler ici. On retire juste l'objet de 'g'.
+    pool = g.pop('graph_pool', None)
     if graph is not None:
-        # Optionnel : loguer la "fermeture" du contexte
-        # print("Closing Neo4j connection context.")
-        pass
+        (pool or get_pool()).release()
 
 def init_app(app):
-    """Enregistre les fonctions de gestion de la base de données avec l'application Flask."""
+    """Crée le pool partagé et enregistre les fonctions de gestion de la base avec l'application Flask."""
+    app.extensions['neo4j'] = GraphPool(
+        app.config['NEO4J_URI'],
+        auth=(app.config['NEO4J_USER'], app.config['NEO4J_PASSWORD']),
+        max_size=app.config['NEO4J_MAX_CONNECTION_POOL_SIZE'],
+        acquisition_timeout=app.config['NEO4J_CONNECTION_ACQUISITION_TIMEOUT'],
+        max_lifetime=app.config['NEO4J_MAX_CONNECTION_LIFETIME'],
+        liveness_check_timeout=app.config['NEO4J_LIVENESS_CHECK_TIMEOUT'],
+    )
     app.teardown_appcontext(close_db)
+
+def split_optional_rows(cursor, key):
+    """
+    Pour les requêtes du type
+        OPTIONAL MATCH (parent {id: $id}) OPTIONAL MATCH (parent)-->(x)
+        RETURN parent IS NOT NULL AS found, x
+    qui vérifient l'existence et lisent les données en un seul aller-retour.
+    Retourne (première ligne, itérateur des lignes où `key` n'est pas nul) ; la première
+    ligne existe toujours grâce aux OPTIONAL MATCH et porte les indicateurs d'existence.
+    """
+    records = iter(cursor)
+    first = next(records, None)
+    if first is None or first[key] is None:
+        return first, iter(())
+    return first, itertools.chain([first], records)
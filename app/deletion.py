@@ -0,0 +1,367 @@
+# app/deletion.py
+"""
+Suppressions en cascade par lots : DELETE /users/<id> et DELETE /posts/<id>.
+
+Un utilisateur emporte ses posts (et tous leurs commentaires), ses commentaires sur les posts
+des autres, ses likes et ses amitiés ; un post emporte ses commentaires et leurs likes. Chaque
+étape supprime au plus CASCADE_DELETE_BATCH éléments par transaction et est répétée jusqu'à
+ne plus rien trouver : la mémoire de transaction reste bornée et les verrous sont relâchés
+entre deux lots, quelle que soit la taille du compte. Les compteurs dénormalisés (app/counters.py)
+et les révisions de listes sont mis à jour dans le même lot que la suppression.
+
+Avec CASCADE_DELETE_ASYNC (défaut), la route crée un nœud (:DeletionJob) et répond 202 tout de
+suite ; un thread de chaque processus réclame les jobs en attente et les exécute. L'état du job
+(étape, éléments supprimés, erreur) est écrit dans Neo4j après chaque lot : GET /jobs/<id>
+répond depuis n'importe quel processus. Un job dont le processus s'arrête n'est plus prolongé
+(heartbeat) et est repris par un autre après DELETE_JOB_LEASE secondes ; les étapes sont
+rejouables, un lot déjà supprimé n'est simplement plus trouvé. Jusqu'à la fin du job, l'entité
+reste lisible ; un second DELETE renvoie le job en cours (ou relance un job en échec).
+Sans CASCADE_DELETE_ASYNC, les mêmes étapes s'exécutent dans la requête, qui répond 200.
+"""
+import os
+import socket
+import threading
+import uuid
+from flask import current_app, jsonify
+from app.database import get_db, get_pool
+from app.projection import plain
+from app import cache, feed, snapshot, transactions
+
+# Étapes : (nom, requête) ; chaque requête supprime au plus $batch éléments et renvoie
+# `deleted` et les ids à invalider dans le cache (`post_ids`, `comment_ids`, `user_ids`).
+
+USER_STEPS = [
+    # Likes reçus par ses posts et commentaires, puis par les commentaires de ses posts
+    ("received_likes", """
+    MATCH (:User {id: $id})-[:CREATED]->()<-[r:LIKES]-()
+    WITH r LIMIT $batch
+    DELETE r
+    RETURN count(r) AS deleted
+    """),
+    ("comment_likes", """
+    MATCH (:User {id: $id})-[:CREATED]->(:Post)-[:HAS_COMMENT]->(:Comment)<-[r:LIKES]-()
+    WITH r LIMIT $batch
+    DELETE r
+    RETURN count(r) AS deleted
+    """),
+    # Commentaires (de tous les auteurs) sur ses posts : les posts disparaissent ensuite
+    ("post_comments", """
+    MATCH (:User {id: $id})-[:CREATED]->(:Post)-[:HAS_COMMENT]->(c:Comment)
+    WITH c LIMIT $batch
+    WITH collect(c) AS batch, collect(c.id) AS comment_ids
+    FOREACH (c IN batch | DETACH DELETE c)
+    RETURN size(comment_ids) AS deleted, comment_ids
+    """),
+    # Ses commentaires sur les posts des autres : compteur et liste du post mis à jour
+    ("comments", """
+    MATCH (:User {id: $id})-[:CREATED]->(c:Comment)
+    WITH c LIMIT $batch
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    FOREACH (post IN CASE WHEN p IS NULL THEN [] ELSE [p] END |
+        SET post.comment_count = coalesce(post.comment_count, 0) - 1,
+            post.comments_rev = coalesce(post.comments_rev, 0) + 1, post.rev = coalesce(post.rev, 0) + 1
+    )
+    WITH collect(c) AS batch, collect(c.id) AS comment_ids, collect(DISTINCT p.id) AS post_ids
+    FOREACH (c IN batch | DETACH DELETE c)
+    RETURN size(comment_ids) AS deleted, comment_ids, post_ids
+    """),
+    ("posts", """
+    MATCH (:User {id: $id})-[:CREATED]->(p:Post)
+    WITH p LIMIT $batch
+    WITH collect(p) AS batch, collect(p.id) AS post_ids
+    FOREACH (p IN batch | DETACH DELETE p)
+    RETURN size(post_ids) AS deleted, post_ids
+    """),
+    # Likes donnés : compteurs des posts / commentaires aimés
+    ("given_likes", """
+    MATCH (:User {id: $id})-[r:LIKES]->(x)
+    WITH r, x LIMIT $batch
+    DELETE r
+    SET x.like_count = coalesce(x.like_count, 0) - 1, x.rev = coalesce(x.rev, 0) + 1
+    WITH x
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(x:Comment)
+    FOREACH (post IN CASE WHEN p IS NULL THEN [] ELSE [p] END | SET post.comments_rev = coalesce(post.comments_rev, 0) + 1)
+    // Les ids sont des UUID : on ne sait pas s'il s'agit d'un post ou d'un commentaire
+    WITH collect(x.id) AS ids
+    RETURN size(ids) AS deleted, ids AS post_ids, ids AS comment_ids
+    """),
+    # Amitiés (dans les deux sens) : compteur de l'ami, listes d'amis de l'ami et de ses amis
+    ("friendships", """
+    MATCH (u:User {id: $id})-[r:FRIENDS_WITH]-(f:User)
+    WITH u, f, collect(r) AS rels LIMIT $batch
+    FOREACH (r IN rels | DELETE r)
+    // friend_count compte les relations sortantes de l'ami
+    SET f.friend_count = coalesce(f.friend_count, 0) - size([r IN rels WHERE startNode(r) = f]),
+        f.rev = coalesce(f.rev, 0) + 1
+    FOREACH (x IN [f] + [(f)-[:FRIENDS_WITH]->(x:User) | x] | SET x.friends_rev = coalesce(x.friends_rev, 0) + 1)
+    RETURN count(f) AS deleted, collect(f.id) AS user_ids
+    """),
+]
+
+# Dernière étape : l'utilisateur seul, s'il n'a plus rien (écritures arrivées pendant le job)
+USER_FINAL = """
+MATCH (u:User {id: $id})
+WITH u, size([(u)-[:CREATED|LIKES|FRIENDS_WITH]-() | 1]) > 0 AS remaining
+FOREACH (_ IN CASE WHEN remaining THEN [] ELSE [1] END | DETACH DELETE u)
+RETURN remaining
+"""
+
+POST_STEPS = [
+    ("comment_likes", """
+    MATCH (:Post {id: $id})-[:HAS_COMMENT]->(:Comment)<-[r:LIKES]-()
+    WITH r LIMIT $batch
+    DELETE r
+    RETURN count(r) AS deleted
+    """),
+    ("received_likes", """
+    MATCH (:Post {id: $id})<-[r:LIKES]-()
+    WITH r LIMIT $batch
+    DELETE r
+    RETURN count(r) AS deleted
+    """),
+    ("comments", """
+    MATCH (:Post {id: $id})-[:HAS_COMMENT]->(c:Comment)
+    WITH c LIMIT $batch
+    WITH collect(c) AS batch, collect(c.id) AS comment_ids
+    FOREACH (c IN batch | DETACH DELETE c)
+    RETURN size(comment_ids) AS deleted, comment_ids
+    """),
+]
+
+POST_FINAL = """
+MATCH (p:Post {id: $id})
+WITH p, size([(p)-[:HAS_COMMENT|LIKES]-() | 1]) > 0 AS remaining
+FOREACH (_ IN CASE WHEN remaining THEN [] ELSE [1] END | DETACH DELETE p)
+RETURN remaining
+"""
+
+# kind -> (label, étapes, dernière étape)
+PLANS = {
+    "user": ("User", USER_STEPS, USER_FINAL),
+    "post": ("Post", POST_STEPS, POST_FINAL),
+}
+
+# Tours complets d'étapes avant d'abandonner (l'entité continue de recevoir des écritures)
+MAX_ROUNDS = 5
+
+
+class LostJob(Exception):
+    """Le job a été repris par un autre processus (heartbeat expiré)."""
+
+
+def invalidate_batch(record):
+    keys = [cache.post_key(i) for i in record.get('post_ids') or ()]
+    keys += [cache.comment_key(i) for i in record.get('comment_ids') or ()]
+    for user_id in record.get('user_ids') or ():
+        keys += [cache.user_key(user_id), cache.suggestions_key(user_id)]
+    if keys:
+        cache.invalidate(*keys)
+
+def finished(kind, target_id):
+    """Effets hors Neo4j de la disparition de l'entité."""
+    if kind == "user":
+        cache.invalidate(cache.user_key(target_id), cache.suggestions_key(target_id))
+        feed.drop(target_id)
+        snapshot.user_removed(target_id)
+    else:
+        cache.invalidate(cache.post_key(target_id))
+
+def cascade(graph, kind, target_id, batch_size, progress=None):
+    """
+    Exécute les étapes de `kind` jusqu'à la suppression de l'entité (dans un contexte d'application).
+    `progress(step, deleted)` est appelé après chaque lot. Retourne {étape: éléments supprimés}.
+    """
+    _, steps, final = PLANS[kind]
+    totals = {name: 0 for name, _ in steps}
+    for _ in range(MAX_ROUNDS):
+        for name, query in steps:
+            while True:
+                record = transactions.run_write(graph, query, id=target_id, batch=batch_size)[0]
+                if not record['deleted']:
+                    break
+                totals[name] += record['deleted']
+                invalidate_batch(record)
+                if name == "friendships":
+                    for friend_id in record['user_ids']:
+                        snapshot.friendship_removed(target_id, friend_id)
+                if progress:
+                    progress(name, record['deleted'])
+        result = transactions.run_write(graph, final, id=target_id)
+        if not result or not result[0]['remaining']:
+            finished(kind, target_id)
+            return totals
+    raise RuntimeError(f"{kind} {target_id} still has relationships after {MAX_ROUNDS} rounds")
+
+
+# --- Jobs ---
+
+def create_job_query(label):
+    return f"""
+    MATCH (t:{label} {{id: $target_id}})
+    MERGE (j:DeletionJob {{target: $kind + ':' + $target_id}})
+    ON CREATE SET j.id = $job_id, j.kind = $kind, j.target_id = $target_id, j.status = 'pending',
+                  j.attempts = 0, j.deleted = 0, j.created_at = datetime()
+    // Un job en échec est relancé par un nouveau DELETE
+    ON MATCH SET j.status = CASE WHEN j.status = 'failed' THEN 'pending' ELSE j.status END,
+                 j.attempts = CASE WHEN j.status = 'failed' THEN 0 ELSE j.attempts END
+    RETURN j.id AS id, j.status AS status
+    """
+
+# Le SET prend le verrou d'écriture du job : la condition est relue sous verrou, si bien que
+# deux processus ne peuvent pas réclamer le même job
+CLAIM_JOB = """
+MATCH (j:DeletionJob)
+WHERE j.status = 'pending' OR (j.status = 'running' AND j.heartbeat < datetime() - duration({seconds: $lease}))
+WITH j ORDER BY j.created_at LIMIT 1
+SET j.claim = $owner
+WITH j
+WHERE j.status = 'pending' OR (j.status = 'running' AND j.heartbeat < datetime() - duration({seconds: $lease}))
+SET j.status = 'running', j.owner = $owner, j.heartbeat = datetime(), j.attempts = j.attempts + 1,
+    j.started_at = coalesce(j.started_at, datetime())
+RETURN j.id AS id, j.kind AS kind, j.target_id AS target_id
+"""
+
+HEARTBEAT = """
+MATCH (j:DeletionJob {id: $job_id}) WHERE j.owner = $owner
+SET j.heartbeat = datetime(), j.step = $step, j.deleted = j.deleted + $deleted
+RETURN j.id AS id
+"""
+
+FINISH_JOB = """
+MATCH (j:DeletionJob {id: $job_id}) WHERE j.owner = $owner
+SET j.status = CASE WHEN $error IS NULL THEN 'done'
+                    WHEN j.attempts >= $max_attempts THEN 'failed' ELSE 'pending' END,
+    j.error = $error, j.step = null,
+    j.finished_at = CASE WHEN $error IS NULL THEN datetime() ELSE null END
+"""
+
+# Les jobs terminés sont gardés DELETE_JOB_RETENTION secondes pour GET /jobs/<id>
+PURGE_JOBS = """
+MATCH (j:DeletionJob {status: 'done'}) WHERE j.finished_at < datetime() - duration({seconds: $retention})
+WITH j LIMIT 1000
+DELETE j
+"""
+
+JOB_STATUS = """
+MATCH (j:DeletionJob {id: $job_id})
+RETURN j {.id, .kind, .target_id, .status, .step, .deleted, .attempts, .error,
+          .created_at, .started_at, .finished_at} AS job
+"""
+
+
+class DeletionRunner:
+    """Thread du processus qui réclame et exécute les jobs de suppression."""
+
+    def __init__(self, app):
+        self.app = app
+        self.owner = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Après un fork (gunicorn --preload) le thread du parent n'existe pas ici
+                    self._pid = os.getpid()
+                    self.owner = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+                    threading.Thread(target=self._run, name="deletion-jobs", daemon=True).start()
+
+    def wake(self):
+        self.ensure_started()
+        self._wake.set()
+
+    def run_job(self, graph, job):
+        config = self.app.config
+        step_deleted = {}
+
+        def progress(step, deleted):
+            step_deleted[step] = step_deleted.get(step, 0) + deleted
+            if not graph.run(HEARTBEAT, job_id=job['id'], owner=self.owner, step=step, deleted=deleted).data():
+                raise LostJob(job['id'])
+
+        error = None
+        try:
+            with self.app.app_context():
+                cascade(graph, job['kind'], job['target_id'], config['CASCADE_DELETE_BATCH'], progress)
+        except LostJob:
+            return
+        except Exception as e:
+            print(f"Deletion job {job['id']} ({job['kind']} {job['target_id']}) failed: {e}")
+            error = str(e)
+        graph.run(FINISH_JOB, job_id=job['id'], owner=self.owner, error=error,
+                  max_attempts=config['DELETE_JOB_MAX_ATTEMPTS'])
+
+    def run_pending(self):
+        """Exécute les jobs réclamables jusqu'à épuisement ; retourne leur nombre."""
+        config = self.app.config
+        pool = get_pool(self.app)
+        graph = pool.acquire()
+        done = 0
+        try:
+            graph.run(PURGE_JOBS, retention=config['DELETE_JOB_RETENTION'])
+            while True:
+                jobs = graph.run(CLAIM_JOB, owner=self.owner, lease=config['DELETE_JOB_LEASE']).data()
+                if not jobs:
+                    return done
+                self.run_job(graph, jobs[0])
+                done += 1
+        finally:
+            pool.release()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Deletion job runner failed: {e}")
+            self._wake.wait(self.app.config['DELETE_JOB_POLL_INTERVAL'])
+            self._wake.clear()
+
+
+def get_runner():
+    return current_app.extensions['deletion_jobs']
+
+def delete(graph, kind, target_id):
+    """
+    Réponse des routes DELETE : 202 et job en arrière-plan (CASCADE_DELETE_ASYNC), sinon
+    suppression par lots dans la requête et 200. 404 si l'entité n'existe pas.
+    """
+    label = PLANS[kind][0]
+    if not current_app.config['CASCADE_DELETE_ASYNC']:
+        found = graph.run(f"MATCH (t:{label} {{id: $id}}) RETURN count(t) AS found", id=target_id).evaluate()
+        if not found:
+            return jsonify({"error": f"{label} not found"}), 404
+        deleted = cascade(graph, kind, target_id, current_app.config['CASCADE_DELETE_BATCH'])
+        return jsonify({"message": f"{label} deleted successfully", "deleted": deleted}), 200
+
+    result = graph.run(create_job_query(label), kind=kind, target_id=target_id, job_id=str(uuid.uuid4())).data()
+    if not result:
+        return jsonify({"error": f"{label} not found"}), 404
+    job = result[0]
+    get_runner().wake()
+    location = f"/jobs/{job['id']}"
+    return jsonify({"message": f"{label} deletion accepted", "job_id": job['id'], "status": job['status'],
+                    "status_url": location}), 202, {"Location": location}
+
+
+def init_app(app):
+    """Crée le runner des jobs de suppression et expose leur état sur GET /jobs/<id>."""
+    app.extensions['deletion_jobs'] = DeletionRunner(app)
+
+    @app.route('/jobs/<string:job_id>')
+    def get_job(job_id):
+        graph = get_db()
+        if not graph: return jsonify({"error": "Database connection failed"}), 500
+        try:
+            result = graph.run(JOB_STATUS, job_id=job_id).data()
+        except Exception as e:
+            print(f"Error fetching job {job_id}: {e}")
+            return jsonify({"error": "An unexpected error occurred"}), 500
+        if not result:
+            return jsonify({"error": "Job not found"}), 404
+        # Un job réclamable est exécuté au plus tôt par le runner de ce processus
+        if result[0]['job']['status'] == 'pending':
+            get_runner().wake()
+        return jsonify(plain(result[0]['job'])), 200
@@ -0,0 +1,66 @@
+# app/etag.py
+"""
+ETag et GET conditionnels (If-None-Match -> 304).
+
+Les ETags sont dérivés de compteurs de révision entiers tenus dans Neo4j et incrémentés
+par les routes d'écriture, jamais du contenu sérialisé :
+- `rev` sur chaque User / Post / Comment (modification de ses propriétés) ;
+- `friends_rev` sur User (ajout / retrait d'ami, ami renommé ou supprimé) ;
+- `comments_rev` sur Post (commentaire ajouté, modifié, supprimé, auteur renommé ou supprimé).
+Quand le client envoie If-None-Match, la route lit d'abord ces seuls compteurs (requête
+légère) et répond 304 s'ils n'ont pas bougé, sans lire ni sérialiser la charge utile.
+"""
+import hashlib
+from flask import jsonify, request
+
+
+def make_etag(*parts):
+    """Construit un ETag faible à partir des composantes de version (type, id, révisions...)."""
+    raw = '|'.join(str(part) for part in parts)
+    return 'W/"' + hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20] + '"'
+
+def is_conditional():
+    """Vrai si le client a envoyé If-None-Match (sinon inutile de lire la version à part)."""
+    return bool(request.if_none_match)
+
+def matches(etag, if_none_match=None):
+    """
+    Vrai si l'ETag courant figure dans If-None-Match (comparaison faible).
+    `if_none_match` (werkzeug ETags) remplace l'en-tête de la requête Flask courante (mode ASGI).
+    """
+    if etag is None:
+        return False
+    if if_none_match is None:
+        if_none_match = request.if_none_match
+    value = etag[2:] if etag.startswith('W/') else etag
+    return if_none_match.contains_weak(value.strip('"'))
+
+def not_modified(etag):
+    """Réponse 304 vide portant l'ETag."""
+    return '', 304, {'ETag': etag}
+
+def set_etag(response, etag):
+    """Ajoute l'ETag à une réponse (objet Response)."""
+    if etag is not None:
+        response.headers['ETag'] = etag
+    return response
+
+def precondition(graph, version_query, key, **params):
+    """
+    Si le client a envoyé If-None-Match, lit la version avec `version_query` (une seule valeur
+    renvoyée) et retourne la réponse 304 si l'ETag `make_etag(*key, version)` correspond.
+    Retourne None dans tous les autres cas : la route continue normalement.
+    """
+    if not is_conditional():
+        return None
+    version = graph.evaluate(version_query, **params)
+    if version is None:
+        return None
+    etag = make_etag(*key, version)
+    return not_modified(etag) if matches(etag) else None
+
+def cached_response(entry):
+    """Réponse depuis une entrée de cache {"etag", "data"} : 304 ou 200 avec l'ETag."""
+    if matches(entry['etag']):
+        return not_modified(entry['etag'])
+    return set_etag(jsonify(entry['data']), entry['etag']), 200
@@ -0,0 +1,308 @@
+# app/feed.py
+"""
+Fil d'actualité GET /users/<id>/feed : posts des amis, du plus récent au plus ancien.
+
+La "timeline" d'un lecteur actif contient les clés (created_at, post_id) des posts les plus
+récents de ses amis, au plus FEED_TIMELINE_SIZE entrées. Elle est gardée dans le magasin
+partagé du cache (CACHE_BACKEND=redis ou fake), commun à tous les workers, ou sinon en mémoire
+du processus pour au plus FEED_MAX_TIMELINES lecteurs (LRU) : un post créé dans un autre
+worker, ou une amitié modifiée ailleurs, n'y apparaît alors qu'à l'expiration de la timeline
+(au plus FEED_TIMELINE_TTL secondes).
+create_post_for_user pousse le nouveau post dans la timeline des amis de l'auteur
+(fan-out à l'écriture), sauf si l'auteur a plus de FEED_FANOUT_MAX_FRIENDS amis : ses posts
+sont alors lus à la demande (fan-out à la lecture) et fusionnés avec la timeline.
+Une timeline absente ou expirée (FEED_TIMELINE_TTL) est reconstruite par une requête
+Cypher ; une page qui dépasse une timeline tronquée est lue directement dans le graphe.
+"""
+import bisect
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, jsonify
+from app.cache import CacheStats, SharedStoreCache
+
+# Borne keyset commune aux requêtes du fil (même forme que GET /posts)
+KEYSET_BOUND = """
+p.created_at <= datetime($after_created_at)
+AND (p.created_at < datetime($after_created_at) OR p.id < $after_id)
+"""
+
+
+class TimelineStore:
+    """Timelines en mémoire : user_id -> (expire_at, entrées triées par ordre croissant, complète ?)."""
+
+    def __init__(self, max_timelines=10000, size=500, ttl=60.0):
+        self.max_timelines = max_timelines
+        self.size = size
+        self.ttl = ttl
+        self._timelines = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = CacheStats()
+
+    def get(self, user_id):
+        """Retourne (entrées, complète) ou None si la timeline est absente ou expirée."""
+        with self._lock:
+            timeline = self._timelines.get(user_id)
+            if timeline is not None and timeline[0] < time.monotonic():
+                del self._timelines[user_id]
+                self.counters.incr('evictions')
+                timeline = None
+            if timeline is None:
+                self.counters.incr('misses')
+                return None
+            self._timelines.move_to_end(user_id)
+            # Copie : push() peut modifier la liste pendant que la route la parcourt
+            entries, complete = list(timeline[1]), timeline[2]
+        self.counters.incr('hits')
+        return entries, complete
+
+    def put(self, user_id, entries, complete):
+        """
+        Enregistre une timeline reconstruite (entrées triées par ordre croissant). `complete`
+        indique qu'elle contient tous les posts des amis (sinon les pages au-delà de la plus
+        ancienne entrée sont lues dans le graphe).
+        """
+        with self._lock:
+            self._timelines[user_id] = (time.monotonic() + self.ttl, list(entries), complete)
+            self._timelines.move_to_end(user_id)
+            while len(self._timelines) > self.max_timelines:
+                self._timelines.popitem(last=False)
+                self.counters.incr('evictions')
+        self.counters.incr('sets')
+
+    def push(self, user_ids, entry):
+        """Ajoute un post aux timelines présentes en mémoire (les autres le liront à la reconstruction)."""
+        with self._lock:
+            for user_id in user_ids:
+                timeline = self._timelines.get(user_id)
+                if timeline is None:
+                    continue
+                expire_at, entries, complete = timeline
+                bisect.insort(entries, entry)
+                if len(entries) > self.size:
+                    del entries[0]
+                    complete = False
+                self._timelines[user_id] = (expire_at, entries, complete)
+
+    def drop(self, *user_ids):
+        """Oublie des timelines dont la composition a changé (amitiés ajoutées ou retirées)."""
+        with self._lock:
+            for user_id in user_ids:
+                self._timelines.pop(user_id, None)
+        self.counters.incr('invalidations', len(user_ids))
+
+    def stats(self):
+        with self._lock:
+            size = len(self._timelines)
+        return {"timelines": size, "max_timelines": self.max_timelines, "timeline_size": self.size,
+                "ttl": self.ttl, **self.counters.as_dict()}
+
+
+class SharedTimelineStore:
+    """
+    Timelines dans le magasin partagé du cache (CACHE_BACKEND=redis ou fake) : le fan-out d'un
+    processus est vu par tous les autres. Même interface que TimelineStore ; une timeline est
+    une valeur JSON {expire_at, entries, complete} expirée par le magasin. Comme pour le cache,
+    une panne du magasin ne fait jamais échouer la requête : le fil est alors lu dans le graphe.
+    """
+
+    def __init__(self, client, prefix, size=500, ttl=60.0):
+        self.client = client
+        self.prefix = prefix + "feed:"
+        self.size = size
+        self.ttl = ttl
+        self.counters = CacheStats()
+
+    def _load(self, raw):
+        timeline = json.loads(raw)
+        return timeline['expire_at'], [tuple(entry) for entry in timeline['entries']], timeline['complete']
+
+    def _write(self, pipeline, user_id, expire_at, entries, complete):
+        ex = int(expire_at - time.time()) + 1
+        if ex > 0:
+            value = {'expire_at': expire_at, 'entries': entries, 'complete': complete}
+            pipeline.set(self.prefix + user_id, json.dumps(value), ex=ex)
+
+    def get(self, user_id):
+        try:
+            raw = self.client.get(self.prefix + user_id)
+        except Exception as e:
+            print(f"Feed store error reading timeline {user_id}: {e}")
+            return None
+        if raw is None:
+            self.counters.incr('misses')
+            return None
+        _, entries, complete = self._load(raw)
+        self.counters.incr('hits')
+        return entries, complete
+
+    def put(self, user_id, entries, complete):
+        try:
+            pipeline = self.client.pipeline()
+            self._write(pipeline, user_id, time.time() + self.ttl, list(entries), complete)
+            pipeline.execute()
+        except Exception as e:
+            print(f"Feed store error writing timeline {user_id}: {e}")
+            return
+        self.counters.incr('sets')
+
+    def push(self, user_ids, entry):
+        """
+        Un MGET des timelines présentes puis un pipeline d'écritures : l'expiration d'origine
+        est conservée. Deux fan-out simultanés vers le même lecteur peuvent perdre une entrée
+        jusqu'à l'expiration de sa timeline.
+        """
+        user_ids = list(user_ids)
+        try:
+            raws = self.client.mget([self.prefix + user_id for user_id in user_ids])
+            pipeline = self.client.pipeline()
+            for user_id, raw in zip(user_ids, raws):
+                if raw is None:
+                    continue
+                expire_at, entries, complete = self._load(raw)
+                bisect.insort(entries, entry)
+                if len(entries) > self.size:
+                    del entries[0]
+                    complete = False
+                self._write(pipeline, user_id, expire_at, entries, complete)
+            pipeline.execute()
+        except Exception as e:
+            # Les timelines non mises à jour reprennent le post à leur expiration
+            print(f"Feed store error pushing post {entry[1]}: {e}")
+
+    def drop(self, *user_ids):
+        try:
+            if user_ids:
+                self.client.delete(*[self.prefix + user_id for user_id in user_ids])
+        except Exception as e:
+            print(f"Feed store error dropping timelines {', '.join(user_ids)}: {e}")
+            return
+        self.counters.incr('invalidations', len(user_ids))
+
+    def stats(self):
+        return {"shared": True, "timeline_size": self.size, "ttl": self.ttl, **self.counters.as_dict()}
+
+
+def create_store(app):
+    """Timelines partagées si le cache l'est, sinon en mémoire du processus."""
+    config = app.config
+    shared = app.extensions.get('cache')
+    if isinstance(shared, SharedStoreCache):
+        return SharedTimelineStore(shared.client, shared.prefix,
+                                   size=config['FEED_TIMELINE_SIZE'], ttl=config['FEED_TIMELINE_TTL'])
+    return TimelineStore(
+        max_timelines=config['FEED_MAX_TIMELINES'],
+        size=config['FEED_TIMELINE_SIZE'],
+        ttl=config['FEED_TIMELINE_TTL'],
+    )
+
+
+def get_store():
+    return current_app.extensions['feed']
+
+def push(friend_ids, created_at, post_id):
+    """Fan-out à l'écriture d'un nouveau post vers les timelines des amis de l'auteur."""
+    if friend_ids:
+        get_store().push(friend_ids, (created_at, post_id))
+
+def drop(*user_ids):
+    get_store().drop(*user_ids)
+
+def iso(value):
+    return value if value is None or isinstance(value, str) else value.isoformat()
+
+
+def build_timeline(graph, user_id, size, fanout_max):
+    """
+    Fan-out à la lecture : relit les posts les plus récents des amis qui publient par
+    fan-out à l'écriture. Retourne (utilisateur trouvé, entrées par ordre croissant, complète).
+    """
+    rows = graph.run("""
+    OPTIONAL MATCH (me:User {id: $user_id})
+    OPTIONAL MATCH (me)-[:FRIENDS_WITH]->(a:User)-[:CREATED]->(p:Post)
+    WHERE coalesce(a.friend_count, 0) <= $fanout_max
+    WITH me, p ORDER BY p.created_at DESC, p.id DESC LIMIT $size
+    RETURN me IS NOT NULL AS found, p.created_at AS created_at, p.id AS id
+    """, user_id=user_id, size=size, fanout_max=fanout_max).data()
+    if not rows or not rows[0]['found']:
+        return False, [], True
+    entries = [(iso(r['created_at']), r['id']) for r in reversed(rows) if r['id'] is not None]
+    return True, entries, len(entries) < size
+
+def live_page(graph, user_id, limit, after):
+    """Page lue directement dans le graphe (tous les amis), sans timeline."""
+    params = {'user_id': user_id, 'limit': limit}
+    where = ""
+    if after is not None:
+        where = "WHERE " + KEYSET_BOUND
+        params['after_created_at'], params['after_id'] = after
+    return graph.run(f"""
+    MATCH (me:User {{id: $user_id}})-[:FRIENDS_WITH]->(u:User)-[:CREATED]->(p:Post)
+    {where}
+    RETURN p, u.id as author_id, u.name as author_name
+    ORDER BY p.created_at DESC, p.id DESC LIMIT $limit
+    """, params).data()
+
+def timeline_page(graph, user_id, ids, limit, after, fanout_max):
+    """
+    Hydrate les posts de la timeline et y fusionne, dans la même requête, ceux des amis
+    qui ne font pas de fan-out à l'écriture.
+    """
+    params = {'user_id': user_id, 'ids': ids, 'limit': limit, 'fanout_max': fanout_max}
+    bound = ""
+    if after is not None:
+        bound = "AND " + KEYSET_BOUND
+        params['after_created_at'], params['after_id'] = after
+    return graph.run(f"""
+    MATCH (me:User {{id: $user_id}})
+    OPTIONAL MATCH (me)-[:FRIENDS_WITH]->(a:User)-[:CREATED]->(p:Post)
+    WHERE a.friend_count > $fanout_max {bound}
+    WITH p ORDER BY p.created_at DESC, p.id DESC LIMIT $limit
+    WITH collect(p.id) AS pulled
+    UNWIND $ids + pulled AS id
+    WITH DISTINCT id
+    MATCH (p:Post {{id: id}})<-[:CREATED]-(u:User)
+    RETURN p, u.id as author_id, u.name as author_name
+    ORDER BY p.created_at DESC, p.id DESC LIMIT $limit
+    """, params).data()
+
+def read_page(graph, user_id, limit, after):
+    """
+    Retourne les `limit` posts du fil après la clé `after` (None pour la première page),
+    ou None si l'utilisateur n'existe pas.
+    """
+    config = current_app.config
+    if not config['FEED_ENABLED']:
+        records = live_page(graph, user_id, limit, after)
+        if not records and graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u)", id=user_id) == 0:
+            return None
+        return records
+
+    store = get_store()
+    fanout_max = config['FEED_FANOUT_MAX_FRIENDS']
+    timeline = store.get(user_id)
+    if timeline is None:
+        found, entries, complete = build_timeline(graph, user_id, store.size, fanout_max)
+        if not found:
+            return None
+        store.put(user_id, entries, complete)
+        timeline = entries, complete
+    entries, complete = timeline
+
+    end = bisect.bisect_left(entries, tuple(after)) if after is not None else len(entries)
+    # Quelques entrées de plus que la page : un post supprimé depuis ne doit pas la raccourcir
+    wanted = 2 * limit
+    if end < wanted and not complete:
+        return live_page(graph, user_id, limit, after)
+    ids = [post_id for _, post_id in reversed(entries[max(0, end - wanted):end])]
+    return timeline_page(graph, user_id, ids, limit, after, fanout_max)
+
+
+def init_app(app):
+    """Crée le magasin des timelines et expose ses compteurs sur /feed/stats."""
+    app.extensions['feed'] = create_store(app)
+
+    @app.route('/feed/stats')
+    def feed_stats():
+        return jsonify(get_store().stats()), 200
@@ -0,0 +1,410 @@
+# app/metrics.py
+"""
+Mesures du chemin critique des requêtes, exposées sur GET /metrics au format texte de
+Prometheus (histogrammes par route et par requête Cypher).
+
+Pour chaque requête HTTP, la durée est découpée en phases :
+- `acquire` : attente d'une connexion du pool (get_db) ;
+- `query`   : graph.run / graph.evaluate / tx.run : exécution par Neo4j et transfert de tout
+              le résultat (py2neo lit toutes les lignes avant de rendre le curseur) ;
+- `fetch`   : conversion des Record déjà reçus en dict (cursor.data(), cursor.evaluate()) ;
+- `encode`  : sérialisation JSON de la réponse (app.json.response).
+Le reste de la durée totale est passé dans Flask et dans le code des routes.
+
+Chaque requête Cypher est identifiée par son empreinte : hachage du texte normalisé
+(espaces regroupés, littéraux remplacés par `?`). GET /metrics/queries donne le texte
+correspondant à chaque empreinte. Seul le Graph renvoyé par get_db est instrumenté :
+les threads de fond (snapshot, réconciliation des compteurs) n'apparaissent pas.
+Les mesures sont propres au processus, comme /cache/stats et /db/pool.
+"""
+import hashlib
+import re
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from flask import Response, current_app, g, jsonify, request
+
+# Bornes des histogrammes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+BYTE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PHASES = ('acquire', 'query', 'fetch', 'encode')
+
+# Nombre maximal de textes Cypher dont l'empreinte est gardée en mémoire, et d'empreintes
+# distinctes (séries `query` des métriques) ; les requêtes suivantes sont comptées sous OTHER_QUERY
+MAX_FINGERPRINTS = 1000
+OTHER_QUERY = 'other'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+class Histogram:
+    """Histogramme à bornes fixes, une série par combinaison de valeurs d'étiquettes."""
+
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, values, value):
+        # Appelé sous le verrou du registre. Compteurs par intervalle, cumulés à l'exposition
+        series = self.series.get(values)
+        if series is None:
+            series = self.series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in sorted(self.series.items()):
+            labels = ''.join(f'{name}="{escape(value)}",' for name, value in zip(self.labels, values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            labels = f"{{{labels.rstrip(',')}}}" if labels else ''
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Compteur croissant, une série par combinaison de valeurs d'étiquettes."""
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def increment(self, values, amount=1):
+        # Appelé sous le verrou du registre
+        self.series[values] = self.series.get(values, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, count in sorted(self.series.items()):
+            labels = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labels, values))
+            lines.append(f"{self.name}{{{labels}}} {count}" if labels else f"{self.name} {count}")
+        return lines
+
+
+class Registry:
+    """Histogrammes et compteurs du processus, protégés par un seul verrou (observations très courtes)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.request_seconds = Histogram(
+            'http_request_duration_seconds', 'Duration of HTTP requests.',
+            ('method', 'route', 'status'), LATENCY_BUCKETS)
+        self.phase_seconds = Histogram(
+            'http_request_phase_seconds', 'Time spent per request in each phase (acquire, query, fetch, encode).',
+            ('route', 'phase'), LATENCY_BUCKETS)
+        self.response_bytes = Histogram(
+            'http_response_size_bytes', 'Size of non-streamed response bodies.',
+            ('route',), BYTE_BUCKETS)
+        self.request_queries = Histogram(
+            'http_request_cypher_queries', 'Cypher queries run per HTTP request.',
+            ('route',), QUERY_COUNT_BUCKETS)
+        self.query_seconds = Histogram(
+            'neo4j_query_duration_seconds', 'Time to execute a Cypher query and receive its whole result, by query fingerprint.',
+            ('query',), LATENCY_BUCKETS)
+        self.fetch_seconds = Histogram(
+            'neo4j_query_fetch_seconds', 'Time spent converting already received records to dicts (cursor.data()).',
+            ('query',), LATENCY_BUCKETS)
+        self.query_rows = Histogram(
+            'neo4j_query_rows', 'Rows read from each Cypher query.',
+            ('query',), ROW_BUCKETS)
+        self.histograms = [self.request_seconds, self.phase_seconds, self.response_bytes, self.request_queries,
+                           self.query_seconds, self.fetch_seconds, self.query_rows]
+        self.counters = []
+        # Journal des requêtes lentes (app/slowlog.py), branché par slowlog.init_app
+        self.slow_log = None
+        # Texte Cypher -> empreinte, et empreinte -> texte normalisé
+        self.fingerprints = {}
+        self.statements = {}
+
+    def histogram(self, name, help, labels, buckets):
+        """Ajoute un histogramme exposé sur /metrics (ex: app/writebehind.py)."""
+        histogram = Histogram(name, help, labels, buckets)
+        with self.lock:
+            self.histograms.append(histogram)
+        return histogram
+
+    def counter(self, name, help, labels):
+        """Ajoute un compteur exposé sur /metrics (ex: app/transactions.py)."""
+        counter = Counter(name, help, labels)
+        with self.lock:
+            self.counters.append(counter)
+        return counter
+
+    def observe(self, histogram, values, value):
+        with self.lock:
+            histogram.observe(values, value)
+
+    def increment(self, counter, values, amount=1):
+        with self.lock:
+            counter.increment(values, amount)
+
+    def fingerprint(self, query):
+        """
+        Empreinte du texte Cypher. Chaque combinaison de ?fields= / ?include= donne un texte
+        distinct : au-delà de MAX_FINGERPRINTS empreintes, les nouvelles sont regroupées sous
+        OTHER_QUERY pour borner la mémoire et la taille de /metrics.
+        """
+        fingerprint = self.fingerprints.get(query)
+        if fingerprint is None:
+            statement = _LITERALS.sub('?', _SPACES.sub(' ', query).strip())
+            fingerprint = hashlib.sha1(statement.encode('utf-8')).hexdigest()[:12]
+            with self.lock:
+                if fingerprint not in self.statements:
+                    if len(self.statements) < MAX_FINGERPRINTS:
+                        self.statements[fingerprint] = statement
+                    else:
+                        fingerprint = OTHER_QUERY
+                if len(self.fingerprints) < MAX_FINGERPRINTS:
+                    self.fingerprints[query] = fingerprint
+        return fingerprint
+
+    def expose(self):
+        with self.lock:
+            lines = [line for family in self.histograms + self.counters for line in family.expose()]
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestTimings:
+    """Mesures de la requête HTTP en cours (stockées dans `g`)."""
+
+    def __init__(self, method, route):
+        self.started = perf_counter()
+        self.method = method
+        self.route = route
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.cursors = []
+        self.status = 500
+        self.size = None
+
+
+def current_timings():
+    return g.get('_metrics')
+
+
+class InstrumentedCursor:
+    """
+    Curseur py2neo qui compte ses lignes. Le résultat est déjà entièrement reçu (phase `query`) :
+    seule la conversion par data() et evaluate() est chronométrée (phase `fetch`). En itération
+    ligne à ligne, le temps entre deux lignes est surtout celui de l'appelant.
+    """
+
+    def __init__(self, cursor, registry, fingerprint, timings, query, parameters, elapsed):
+        self._cursor = cursor
+        self._registry = registry
+        self._fingerprint = fingerprint
+        self._timings = timings
+        self._query = query
+        self._parameters = parameters
+        self._elapsed = elapsed
+        self._rows = 0
+        self._consumed = False
+        self._done = False
+        if timings is not None:
+            timings.cursors.append(self)
+
+    def _fetched(self, elapsed):
+        self._elapsed += elapsed
+        if self._timings is not None:
+            self._timings.phases['fetch'] += elapsed
+        with self._registry.lock:
+            self._registry.fetch_seconds.observe((self._fingerprint,), elapsed)
+
+    def data(self, *keys):
+        started = perf_counter()
+        records = self._cursor.data(*keys)
+        self._fetched(perf_counter() - started)
+        self._rows += len(records)
+        self._consumed = True
+        self.finish()
+        return records
+
+    def evaluate(self, field=0):
+        started = perf_counter()
+        value = self._cursor.evaluate(field)
+        self._fetched(perf_counter() - started)
+        self._rows += value is not None
+        self.finish()
+        return value
+
+    def __iter__(self):
+        for record in self._cursor:
+            self._rows += 1
+            yield record
+        self._consumed = True
+        self.finish()
+
+    def __next__(self):
+        record = next(self._cursor)
+        self._rows += 1
+        return record
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def finish(self):
+        """
+        Enregistre le nombre de lignes lues et signale les requêtes lentes (app/slowlog.py).
+        Une seule fois par curseur ; appelé aussi en fin de requête HTTP pour les curseurs non épuisés.
+        """
+        if self._done:
+            return
+        self._done = True
+        with self._registry.lock:
+            self._registry.query_rows.observe((self._fingerprint,), self._rows)
+        slow_log = self._registry.slow_log
+        if slow_log is not None and self._elapsed >= slow_log.threshold:
+            # Le résumé du serveur n'est disponible qu'une fois toutes les lignes lues
+            summary = self._cursor.summary() if self._consumed else None
+            slow_log.check(self._fingerprint, self._query, self._parameters, self._elapsed, self._rows,
+                           route=self._timings.route if self._timings is not None else None, summary=summary)
+
+
+class _Instrumented:
+    """run() et evaluate() chronométrés (phase `query`), le reste délégué à l'objet py2neo."""
+
+    def __init__(self, target, registry):
+        self._target = target
+        self._registry = registry
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def run(self, cypher, parameters=None, **kwparameters):
+        fingerprint = self._registry.fingerprint(cypher)
+        started = perf_counter()
+        cursor = self._target.run(cypher, parameters, **kwparameters)
+        elapsed = perf_counter() - started
+        timings = current_timings()
+        if timings is not None:
+            timings.phases['query'] += elapsed
+            timings.queries += 1
+        with self._registry.lock:
+            self._registry.query_seconds.observe((fingerprint,), elapsed)
+        return InstrumentedCursor(cursor, self._registry, fingerprint, timings,
+                                  cypher, dict(parameters or {}, **kwparameters), elapsed)
+
+    def evaluate(self, cypher, parameters=None, **kwparameters):
+        # Comme Graph.evaluate de py2neo : première valeur de la première ligne
+        return self.run(cypher, parameters, **kwparameters).evaluate()
+
+
+class InstrumentedTransaction(_Instrumented):
+    pass
+
+
+class InstrumentedGraph(_Instrumented):
+    """Graph py2neo renvoyé par get_db quand METRICS_ENABLED est actif."""
+
+    def begin(self, *args, **kwargs):
+        return InstrumentedTransaction(self._target.begin(*args, **kwargs), self._registry)
+
+    def commit(self, tx):
+        return self._target.commit(getattr(tx, '_target', tx))
+
+    def rollback(self, tx):
+        return self._target.rollback(getattr(tx, '_target', tx))
+
+
+def get_registry(app=None):
+    app = app or current_app
+    return app.extensions.get('metrics')
+
+def instrument(graph):
+    """Enveloppe le Graph de get_db si les mesures sont actives (sinon le renvoie tel quel)."""
+    registry = get_registry()
+    if registry is None or graph is None:
+        return graph
+    return InstrumentedGraph(graph, registry)
+
+def observe_acquire(elapsed):
+    timings = current_timings()
+    if timings is not None:
+        timings.phases['acquire'] += elapsed
+
+
+def _before_request():
+    req = request._get_current_object()
+    route = req.url_rule.rule if req.url_rule is not None else 'unmatched'
+    g._metrics = RequestTimings(req.method, route)
+
+def _after_request(response):
+    timings = g.get('_metrics')
+    if timings is not None:
+        timings.status = response.status_code
+        if not response.is_streamed:
+            timings.size = response.calculate_content_length()
+    return response
+
+def _teardown_request(registry):
+    def teardown(e=None):
+        # Après la fin du flux pour les réponses en streaming (stream_with_context)
+        timings = g.pop('_metrics', None)
+        if timings is None:
+            return
+        elapsed = perf_counter() - timings.started
+        for cursor in timings.cursors:
+            cursor.finish()
+        route = timings.route
+        with registry.lock:
+            registry.request_seconds.observe((timings.method, route, str(timings.status)), elapsed)
+            for phase, seconds in timings.phases.items():
+                registry.phase_seconds.observe((route, phase), seconds)
+            registry.request_queries.observe((route,), timings.queries)
+            if timings.size is not None:
+                registry.response_bytes.observe((route,), timings.size)
+    return teardown
+
+def _instrument_encoder(app):
+    """Chronomètre app.json.response (jsonify), phase `encode`."""
+    respond = app.json.response
+
+    def response(*args, **kwargs):
+        started = perf_counter()
+        result = respond(*args, **kwargs)
+        timings = current_timings()
+        if timings is not None:
+            timings.phases['encode'] += perf_counter() - started
+        return result
+
+    app.json.response = response
+
+
+def init_app(app):
+    """Active les mesures (METRICS_ENABLED) et expose GET /metrics et /metrics/queries."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    registry = app.extensions['metrics'] = Registry()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request(registry))
+    _instrument_encoder(app)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.expose(), content_type=CONTENT_TYPE)
+
+    # Texte normalisé des requêtes Cypher, par empreinte (étiquette `query` des métriques neo4j_*)
+    @app.route('/metrics/queries')
+    def metrics_queries():
+        with registry.lock:
+            return jsonify(dict(registry.statements)), 200
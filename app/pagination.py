@@ -0,0 +1,75 @@
+# app/pagination.py
+"""
+Pagination par curseur (keyset) pour les routes de liste.
+
+Le curseur est opaque pour le client : c'est la clé de tri du dernier élément renvoyé
+(par ex. [created_at, id]) encodée en base64. La page suivante reprend avec un
+"WHERE clé < curseur" qui s'appuie sur l'index de tri, au lieu d'un SKIP qui relit
+toutes les lignes précédentes : une page profonde coûte autant que la première.
+"""
+import base64
+import json
+from urllib.parse import urlencode
+from flask import current_app, request
+
+
+class InvalidPageParams(ValueError):
+    """Paramètres `limit` ou `cursor` invalides (renvoyer un 400)."""
+
+
+def encode_cursor(*key):
+    """Encode une clé de tri en curseur opaque."""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, size=2):
+    """Décode un curseur produit par encode_cursor et vérifie le nombre de composantes."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise InvalidPageParams("Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise InvalidPageParams("Invalid cursor")
+    return key
+
+def get_page_params():
+    """
+    Lit `limit` et `cursor` dans la query string.
+    Retourne (limit, clé décodée ou None pour la première page).
+    """
+    default_limit = current_app.config['PAGE_SIZE_DEFAULT']
+    max_limit = current_app.config['PAGE_SIZE_MAX']
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        raise InvalidPageParams("'limit' must be an integer")
+    if limit < 1 or limit > max_limit:
+        raise InvalidPageParams(f"'limit' must be between 1 and {max_limit}")
+
+    cursor = request.args.get('cursor')
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+def set_next_page(response, next_cursor, limit):
+    """
+    Ajoute le curseur de la page suivante à la réponse (le corps reste une liste JSON).
+    `X-Next-Cursor` pour les clients simples, `Link: rel="next"` pour les autres.
+    """
+    if next_cursor is None:
+        return response
+    response.headers['X-Next-Cursor'] = next_cursor
+    args = [(k, v) for k, v in request.args.items(multi=True) if k not in ('cursor', 'limit')]
+    next_url = request.base_url + '?' + urlencode(args + [('limit', limit), ('cursor', next_cursor)])
+    response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+def paginate(records, limit, key):
+    """
+    Coupe le résultat d'une requête lancée avec LIMIT limit + 1.
+    Retourne (enregistrements de la page, curseur de la page suivante ou None).
+    `key` extrait la clé de tri d'un enregistrement.
+    """
+    if len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,128 @@
+# app/paths.py
+"""
+Plus court chemin FRIENDS_WITH entre deux utilisateurs (GET /users/<id>/path/<other_id>).
+
+Recherche en largeur bidirectionnelle : on étend à chaque tour la plus petite des deux
+frontières, d'un niveau complet, jusqu'à ce qu'elles se rencontrent. Deux bornes dures
+empêchent une requête de parcourir tout le graphe : la profondeur (max_depth, au plus
+PATH_MAX_DEPTH) et le nombre de relations examinées (PATH_MAX_EXPANSIONS).
+
+Sources des voisins :
+- "snapshot" : copie CSR en mémoire (app/snapshot.py), sans aller-retour Neo4j ;
+- "bfs"      : une requête UNWIND par niveau, bornée par le budget restant ;
+- "cypher"   : shortestPath() de Neo4j (profondeur bornée, pas de budget), pour comparaison.
+"""
+
+
+class PathBudgetExceeded(Exception):
+    """Le budget d'expansion est épuisé avant que les deux recherches se rencontrent."""
+
+    def __init__(self, expanded):
+        super().__init__(f"Search budget exhausted after examining {expanded} relationships")
+        self.expanded = expanded
+
+
+def bidirectional_bfs(expand, source, target, max_depth, max_expansions):
+    """
+    `expand(nodes, budget)` retourne {nœud: voisins} pour une frontière entière.
+    Retourne (chemin de source à target ou None, nombre de relations examinées).
+    """
+    if source == target:
+        return [source], 0
+    parents = [{source: None}, {target: None}]
+    frontiers = [[source], [target]]
+    expanded = 0
+    for _ in range(max_depth):
+        if not frontiers[0] or not frontiers[1]:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        mine, other = parents[side], parents[1 - side]
+        adjacency = expand(frontiers[side], max_expansions - expanded)
+        next_frontier = []
+        for node in frontiers[side]:
+            for neighbor in adjacency.get(node, ()):
+                expanded += 1
+                if expanded > max_expansions:
+                    raise PathBudgetExceeded(expanded)
+                if neighbor in mine:
+                    continue
+                mine[neighbor] = node
+                if neighbor in other:
+                    return join_path(parents, neighbor), expanded
+                next_frontier.append(neighbor)
+        frontiers[side] = next_frontier
+    return None, expanded
+
+def join_path(parents, meeting):
+    """Reconstitue le chemin complet à partir du nœud de rencontre des deux recherches."""
+    head, node = [], meeting
+    while node is not None:
+        head.append(node)
+        node = parents[0][node]
+    tail, node = [], parents[1][meeting]
+    while node is not None:
+        tail.append(node)
+        node = parents[1][node]
+    return list(reversed(head)) + tail
+
+
+def snapshot_expander(snapshot):
+    return lambda nodes, budget: {node: snapshot.neighbors(node) for node in nodes}
+
+def database_expander(graph):
+    def expand(nodes, budget):
+        # LIMIT budget + 1 : la base ne renvoie jamais plus que ce que le budget autorise
+        rows = graph.run("""
+        UNWIND $ids AS id
+        MATCH (:User {id: id})-[:FRIENDS_WITH]->(n:User)
+        WITH id, n LIMIT $budget
+        RETURN id, collect(n.id) AS neighbors
+        """, ids=nodes, budget=budget + 1).data()
+        return {row['id']: row['neighbors'] for row in rows}
+    return expand
+
+def users_exist(graph, user_id, other_user_id):
+    """Retourne la liste des ids introuvables parmi les deux."""
+    record = graph.run("""
+    OPTIONAL MATCH (a:User {id: $a})
+    OPTIONAL MATCH (b:User {id: $b})
+    RETURN a IS NOT NULL AS a_found, b IS NOT NULL AS b_found
+    """, a=user_id, b=other_user_id).data()[0]
+    return [u for u, found in [(user_id, record['a_found']), (other_user_id, record['b_found'])] if not found]
+
+def cypher_shortest_path(graph, user_id, other_user_id, max_depth):
+    # La longueur maximale d'un motif variable ne peut pas être un paramètre : max_depth est un entier validé
+    return graph.evaluate(f"""
+    MATCH (a:User {{id: $a}}), (b:User {{id: $b}})
+    MATCH p = shortestPath((a)-[:FRIENDS_WITH*..{int(max_depth)}]->(b))
+    RETURN [n IN nodes(p) | n.id]
+    """, a=user_id, b=other_user_id)
+
+def find_path(graph, snapshot, user_id, other_user_id, max_depth, max_expansions, source=None):
+    """
+    Retourne {"source", "path" (ids ou None), "expanded"} ou une liste d'ids introuvables
+    sous la clé "missing". `source` None : le snapshot s'il connaît les deux utilisateurs, sinon "bfs".
+    """
+    if source is None:
+        source = "snapshot" if snapshot and user_id in snapshot.index and other_user_id in snapshot.index else "bfs"
+
+    if source == "snapshot":
+        if snapshot is None:
+            raise ValueError("Friend snapshot is not available")
+        missing = [u for u in (user_id, other_user_id) if u not in snapshot.index]
+        if missing:
+            return {"source": source, "missing": missing}
+        path, expanded = bidirectional_bfs(snapshot_expander(snapshot), snapshot.index[user_id],
+                                           snapshot.index[other_user_id], max_depth, max_expansions)
+        path = [snapshot.ids[node] for node in path] if path else None
+        return {"source": source, "path": path, "expanded": expanded}
+
+    missing = users_exist(graph, user_id, other_user_id)
+    if missing:
+        return {"source": source, "missing": missing}
+    if source == "cypher":
+        # shortestPath() refuse un nœud de départ égal au nœud d'arrivée
+        path = [user_id] if user_id == other_user_id else cypher_shortest_path(graph, user_id, other_user_id, max_depth)
+        return {"source": source, "path": path, "expanded": None}
+    path, expanded = bidirectional_bfs(database_expander(graph), user_id, other_user_id, max_depth, max_expansions)
+    return {"source": source, "path": path, "expanded": expanded}
@@ -0,0 +1,117 @@
+# app/projection.py
+"""
+Projection des réponses de lecture : `?fields=` (propriétés renvoyées) et `?include=`
+(relations et compteurs embarqués), par ex. GET /posts?fields=id,title&include=author.
+
+La projection devient le RETURN de la requête Cypher (map projection `p {.id, .title, ...}`) :
+les propriétés non demandées ne quittent pas Neo4j, ni sur Bolt ni dans le JSON. Sans
+paramètre, chaque route renvoie sa charge utile habituelle (toutes les propriétés et ses
+`include` par défaut) ; `id` est toujours renvoyé.
+"""
+from flask import current_app, request
+
+
+class InvalidProjection(ValueError):
+    """Paramètres `fields` ou `include` invalides (renvoyer un 400)."""
+
+
+class Include:
+    """
+    Élément de `include=` : clé dans la charge utile et expression Cypher de sa valeur.
+    `clause` est insérée avant le RETURN (sous-requête CALL), `version` est une expression
+    de révision à ajouter à l'ETag et `params` associe des paramètres Cypher à des clés de config.
+    """
+
+    def __init__(self, key, expression, clause="", version=None, params=None):
+        self.key = key
+        self.expression = expression
+        self.clause = clause
+        self.version = version
+        self.params = params or {}
+
+
+class ProjectionSpec:
+    """Propriétés et `include` possibles pour un type de nœud lié à la variable Cypher `var`."""
+
+    def __init__(self, var, fields, includes):
+        self.var = var
+        self.fields = fields
+        self.includes = includes
+
+    def parse(self, default_includes=()):
+        """Lit `fields` et `include` dans la query string de la requête courante."""
+        fields = self._names('fields', self.fields) or self.fields
+        if 'id' not in fields:
+            fields = ('id',) + fields
+        includes = self._names('include', tuple(self.includes))
+        default = includes is None
+        return Projection(self, fields, default_includes if default else includes,
+                          default=default and fields == self.fields)
+
+    @staticmethod
+    def _names(param, allowed):
+        raw = request.args.get(param)
+        if raw is None:
+            return None
+        names = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise InvalidProjection(f"Unknown {param}: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+        return names
+
+
+class Projection:
+    def __init__(self, spec, fields, includes, default=False):
+        self.spec = spec
+        self.fields = fields
+        self.includes = includes
+        # Vrai si la charge utile est celle de la route sans paramètre (réponse pouvant venir du cache)
+        self.default = default
+
+    @property
+    def cypher(self):
+        """Map projection à placer dans le RETURN, par ex. `p {.id, .title, author: {...}}`."""
+        parts = [f".{name}" for name in self.fields]
+        parts += [f"{self.spec.includes[name].key}: {self.spec.includes[name].expression}" for name in self.includes]
+        return f"{self.spec.var} {{{', '.join(parts)}}}"
+
+    @property
+    def clauses(self):
+        return "\n".join(self.spec.includes[name].clause for name in self.includes if self.spec.includes[name].clause)
+
+    @property
+    def versions(self):
+        """Expressions de révision supplémentaires (liste Cypher, éventuellement vide)."""
+        versions = [self.spec.includes[name].version for name in self.includes if self.spec.includes[name].version]
+        return f"[{', '.join(versions)}]"
+
+    @property
+    def params(self):
+        config = current_app.config
+        return {param: config[key] for name in self.includes for param, key in self.spec.includes[name].params.items()}
+
+    @property
+    def key(self):
+        return f"fields={','.join(self.fields)};include={','.join(self.includes)}"
+
+    def etag_key(self, *parts):
+        """
+        Composantes d'ETag de la route : deux projections différentes n'ont jamais le même ETag,
+        la projection par défaut garde celui des réponses sans paramètre (et du mode ASGI).
+        """
+        return parts if self.default else parts + (self.key,)
+
+    def to_dict(self, item):
+        # Encodeur qui gère les dates (app/json_provider.py) : la map de Neo4j est sérialisée telle quelle
+        return item if getattr(current_app.json, 'native_temporal', False) else plain(item)
+
+
+def plain(value):
+    """Convertit une valeur de map projection en JSON (dates Neo4j en ISO 8601)."""
+    if isinstance(value, dict):
+        return {key: plain(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [plain(v) for v in value]
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
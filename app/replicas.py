@@ -0,0 +1,226 @@
+# app/replicas.py
+"""
+Routage des lectures vers des répliques Neo4j (NEO4J_READ_ROUTING, NEO4J_READ_URIS) avec
+lecture de ses propres écritures.
+
+Les écritures vont toujours au primaire (NEO4J_URI). Les requêtes en lecture (GET, HEAD et
+routes marquées database.read_only) reçoivent de get_db une connexion d'une réplique, choisie
+à tour de rôle parmi celles qui sont joignables, en retard de moins de NEO4J_REPLICA_MAX_LAG
+secondes et à jour pour le client (signet ci-dessous) ; sinon le primaire.
+
+py2neo ne transmet ni le mode lecture seule au routage ni les signets (bookmarks) de Neo4j :
+le signet est donc porté par l'application. Un thread de chaque processus incrémente toutes
+les NEO4J_REPLICA_REFRESH_INTERVAL secondes un compteur (:ReplicationMarker) sur le primaire
+et relit sa valeur sur chaque réplique : position appliquée et retard de la réplique. Après une
+écriture, la réponse porte le signet valeur du compteur + 1 (en-tête Neo4j-Bookmark et cookie de
+session) : l'incrément suivant est validé après l'écriture, une réplique qui l'a appliqué a donc
+aussi appliqué l'écriture. Un client qui renvoie son signet lit ses écritures ; juste après une
+écriture, ses lectures vont au primaire le temps que les répliques le rattrapent.
+
+Mesures : GET /db/replicas (position, retard, lectures servies, replis sur le primaire).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from flask import current_app, g, jsonify, request
+from app.database import GraphPool, get_pool, is_read_request
+
+BOOKMARK_HEADER = 'Neo4j-Bookmark'
+BOOKMARK_COOKIE = 'neo4j_bookmark'
+
+# Positions du primaire gardées pour estimer le retard des répliques
+MARKER_HISTORY = 1000
+
+HEARTBEAT = """
+MERGE (m:ReplicationMarker {id: 'primary'})
+SET m.seq = coalesce(m.seq, 0) + 1
+RETURN m.seq AS seq
+"""
+
+MARKER_SEQ = "MATCH (m:ReplicationMarker {id: 'primary'}) RETURN m.seq AS seq"
+
+
+class Replica:
+    def __init__(self, uri, pool):
+        self.uri = uri
+        self.pool = pool
+        self.applied = 0
+        self.lag = None
+        self.healthy = False
+        self.error = None
+        self.checked_at = None
+        self.reads = 0
+
+
+class ReplicaSet:
+    """Répliques de lecture du processus et leur suivi."""
+
+    def __init__(self, app, uris, refresh_interval=1.0, max_lag=10.0):
+        self.app = app
+        self.refresh_interval = refresh_interval
+        self.max_lag = max_lag
+        config = app.config
+        self.replicas = [Replica(uri, GraphPool(
+            uri, auth=(config['NEO4J_USER'], config['NEO4J_PASSWORD']),
+            max_size=config['NEO4J_MAX_CONNECTION_POOL_SIZE'],
+            acquisition_timeout=config['NEO4J_CONNECTION_ACQUISITION_TIMEOUT'],
+            max_lifetime=config['NEO4J_MAX_CONNECTION_LIFETIME'],
+            liveness_check_timeout=config['NEO4J_LIVENESS_CHECK_TIMEOUT'],
+        )) for uri in uris]
+        self.primary_seq = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+        self.bookmarks = 0
+        self._history = deque(maxlen=MARKER_HISTORY)
+        self._turn = itertools.count()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def pools(self):
+        return [replica.pool for replica in self.replicas]
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Après un fork (gunicorn --preload) le thread du parent n'existe pas ici
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._run, name="replica-monitor", daemon=True).start()
+
+    def read_pool(self, bookmark=None):
+        """Pool d'une réplique à jour pour `bookmark` (celui de la requête par défaut), ou None (primaire)."""
+        self.ensure_started()
+        if bookmark is None:
+            bookmark = request_bookmark()
+        eligible = [r for r in self.replicas
+                    if r.healthy and r.lag is not None and r.lag <= self.max_lag and r.applied >= bookmark]
+        with self._lock:
+            if not eligible:
+                self.primary_reads += 1
+                if self.replicas and bookmark:
+                    self.fallbacks += 1
+                return None
+            replica = eligible[next(self._turn) % len(eligible)]
+            replica.reads += 1
+        return replica.pool
+
+    def mark_down(self, pool, error):
+        """Réplique injoignable depuis une requête : écartée jusqu'à la prochaine vérification."""
+        for replica in self.replicas:
+            if replica.pool is pool:
+                replica.healthy = False
+                replica.error = str(error)
+
+    def bookmark(self, graph):
+        """Signet d'une écriture validée, lu sur le primaire après le commit."""
+        seq = graph.evaluate(MARKER_SEQ) or 0
+        with self._lock:
+            self.bookmarks += 1
+        return seq + 1
+
+    def refresh(self):
+        pool = get_pool(self.app)
+        graph = pool.acquire()
+        try:
+            seq = graph.evaluate(HEARTBEAT)
+        finally:
+            pool.release()
+        now = time.monotonic()
+        with self._lock:
+            self.primary_seq = seq
+            self._history.append((seq, now))
+        for replica in self.replicas:
+            try:
+                graph = replica.pool.acquire()
+                try:
+                    applied = graph.evaluate(MARKER_SEQ) or 0
+                finally:
+                    replica.pool.release()
+            except Exception as e:
+                replica.healthy, replica.error = False, str(e)
+                continue
+            replica.applied, replica.healthy, replica.error = applied, True, None
+            replica.checked_at = time.time()
+            replica.lag = self.lag(applied, now)
+
+    def lag(self, applied, now):
+        """Âge de la plus ancienne position du primaire que la réplique n'a pas encore appliquée."""
+        with self._lock:
+            for seq, seen_at in self._history:
+                if seq > applied:
+                    return now - seen_at
+        return 0.0
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Replica monitor failed: {e}")
+            time.sleep(self.refresh_interval)
+
+    def stats(self):
+        self.ensure_started()
+        with self._lock:
+            return {
+                "primary_seq": self.primary_seq,
+                "primary_reads": self.primary_reads,
+                "bookmark_fallbacks": self.fallbacks,
+                "bookmarks_issued": self.bookmarks,
+                "max_lag_seconds": self.max_lag,
+                "replicas": [{
+                    "uri": r.uri,
+                    "healthy": r.healthy,
+                    "applied_seq": r.applied,
+                    "lag_seconds": round(r.lag, 3) if r.lag is not None else None,
+                    "reads": r.reads,
+                    "error": r.error,
+                    "pool": r.pool.stats(),
+                } for r in self.replicas],
+            }
+
+
+def get_replicas(app=None):
+    app = app or current_app
+    return app.extensions.get('neo4j_replicas')
+
+def request_bookmark():
+    """Signet du client (en-tête, sinon cookie) ; 0 sans signet valide."""
+    value = request.headers.get(BOOKMARK_HEADER) or request.cookies.get(BOOKMARK_COOKIE)
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
+
+def _issue_bookmark(response):
+    """Après une écriture réussie sur le primaire, signet à renvoyer par le client."""
+    graph = g.get('graph')
+    if graph is None or is_read_request() or response.status_code >= 400:
+        return response
+    try:
+        bookmark = get_replicas().bookmark(graph)
+    except Exception as e:
+        print(f"Error reading replication bookmark: {e}")
+        return response
+    response.headers[BOOKMARK_HEADER] = str(bookmark)
+    response.set_cookie(BOOKMARK_COOKIE, str(bookmark), httponly=True, samesite='Lax')
+    return response
+
+
+def init_app(app):
+    """Active le routage des lectures (NEO4J_READ_ROUTING) et expose GET /db/replicas."""
+    uris = [uri.strip() for uri in app.config['NEO4J_READ_URIS'].split(',') if uri.strip()]
+    if not app.config['NEO4J_READ_ROUTING'] or not uris:
+        return
+    app.extensions['neo4j_replicas'] = ReplicaSet(
+        app, uris,
+        refresh_interval=app.config['NEO4J_REPLICA_REFRESH_INTERVAL'],
+        max_lag=app.config['NEO4J_REPLICA_MAX_LAG'],
+    )
+    app.after_request(_issue_bookmark)
+
+    @app.route('/db/replicas')
+    def db_replicas_stats():
+        return jsonify(get_replicas().stats()), 200
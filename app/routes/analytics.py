@@ -0,0 +1,59 @@
+# app/routes/analytics.py
+"""
+GET /analytics/* : statistiques globales du graphe d'amitié, calculées sur la copie en
+mémoire du processus (FRIEND_SNAPSHOT_ENABLED, voir app/snapshot.py et app/analytics.py).
+Chaque réponse indique la génération de la copie utilisée et la date de son dernier chargement.
+"""
+from flask import Blueprint, request, jsonify
+from app import analytics, snapshot
+
+analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
+
+
+# Helper: exécute un calcul sur la copie courante, ou 503 si elle n'est pas (encore) chargée
+def snapshot_response(compute):
+    holder = snapshot.get_holder()
+    if holder is None:
+        return jsonify({"error": "Friend snapshot is disabled (FRIEND_SNAPSHOT_ENABLED)"}), 503
+    friends = holder.get()
+    if friends is None:
+        return jsonify({"error": "Friend snapshot is not available yet", "last_error": holder.last_error}), 503
+    try:
+        top = int(request.args.get('top', 10))
+    except ValueError:
+        return jsonify({"error": "'top' must be an integer"}), 400
+    if top < 0 or top > 100:
+        return jsonify({"error": "'top' must be between 0 and 100"}), 400
+    try:
+        result = compute(friends, top)
+    except Exception as e:
+        print(f"Error computing {request.path}: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+    result["snapshot"] = {"generation": holder.generation, "loaded_at": friends.loaded_at,
+                          "users": friends.num_nodes, "friendships": friends.num_edges // 2}
+    return jsonify(result), 200
+
+
+# GET /analytics/snapshot : état de la copie et mémoire occupée (octets par relation)
+@analytics_bp.route('/snapshot', methods=['GET'])
+def get_snapshot_stats():
+    holder = snapshot.get_holder()
+    if holder is None:
+        return jsonify({"error": "Friend snapshot is disabled (FRIEND_SNAPSHOT_ENABLED)"}), 503
+    holder.get()
+    return jsonify({**holder.stats(), "vectorized": analytics.np is not None}), 200
+
+# GET /analytics/degrees?top=10
+@analytics_bp.route('/degrees', methods=['GET'])
+def get_degree_distribution():
+    return snapshot_response(analytics.degrees)
+
+# GET /analytics/components?top=10
+@analytics_bp.route('/components', methods=['GET'])
+def get_components():
+    return snapshot_response(analytics.components)
+
+# GET /analytics/triangles?top=10
+@analytics_bp.route('/triangles', methods=['GET'])
+def get_triangles():
+    return snapshot_response(analytics.triangles)
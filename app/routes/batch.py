@@ -0,0 +1,97 @@
+# app/routes/batch.py
+"""
+Lectures groupées : POST /users:batchGet, /posts:batchGet, /comments:batchGet.
+
+Corps : {"ids": [...]} (au plus BATCH_GET_MAX_IDS ids). Les ids présents dans le cache
+(app/cache.py) sont lus en un seul accès, les autres en une seule requête UNWIND $ids ;
+les entrées lues dans la base sont remises dans le cache, au même format que les GET
+unitaires. Réponse : {"items": [...] dans l'ordre des ids demandés, "missing": [ids introuvables]}.
+"""
+from flask import Blueprint, current_app, request, jsonify
+from app.database import get_db, read_only
+from app.routes.users import user_cache_entry
+from app.routes.posts import post_cache_entry
+from app.routes.comments import comment_cache_entry
+from app import cache
+
+# Pas de url_prefix : le nom de la méthode suit la collection sans "/" (/users:batchGet)
+batch_bp = Blueprint('batch', __name__)
+
+USERS_QUERY = """
+UNWIND $ids AS id
+MATCH (u:User {id: id})
+RETURN u
+"""
+
+POSTS_QUERY = """
+UNWIND $ids AS id
+MATCH (p:Post {id: id})<-[:CREATED]-(u:User)
+RETURN p, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev
+"""
+
+COMMENTS_QUERY = """
+UNWIND $ids AS id
+MATCH (c:Comment {id: id})<-[:CREATED]-(u:User)
+MATCH (p:Post)-[:HAS_COMMENT]->(c)
+RETURN c, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev, p.id as post_id
+"""
+
+
+# Helper: lit la liste d'ids du corps -> (ids sans doublons, dans l'ordre, None) ou (None, erreur)
+def get_request_ids():
+    data = request.get_json(silent=True)
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, str) for i in ids):
+        return None, "Request body must be {\"ids\": [...]} with a non-empty list of string ids"
+    ids = list(dict.fromkeys(ids))
+    max_ids = current_app.config['BATCH_GET_MAX_IDS']
+    if len(ids) > max_ids:
+        return None, f"Too many ids ({len(ids)}), at most {max_ids} per call"
+    return ids, None
+
+def batch_get(name, key, query, node_key, to_entry):
+    """
+    `key(id)` donne la clé de cache, `query` lit les ids absents du cache, `node_key` est
+    la colonne du nœud dans le résultat et `to_entry(record)` construit l'entrée de cache.
+    """
+    ids, error = get_request_ids()
+    if error:
+        return jsonify({"error": error}), 400
+
+    cached = cache.get_many([key(i) for i in ids])
+    entries = {i: cached[key(i)] for i in ids if key(i) in cached}
+    wanted = [i for i in ids if i not in entries]
+    if wanted:
+        graph = get_db()
+        if not graph: return jsonify({"error": "Database connection failed"}), 500
+        try:
+            fetched = {}
+            for record in graph.run(query, ids=wanted).data():
+                fetched[record[node_key].get('id')] = to_entry(record)
+        except Exception as e:
+            print(f"Error fetching {len(wanted)} {name}: {e}")
+            return jsonify({"error": "An unexpected error occurred"}), 500
+        cache.set_many({key(i): entry for i, entry in fetched.items()})
+        entries.update(fetched)
+
+    return jsonify({"items": [entries[i]['data'] for i in ids if i in entries],
+                    "missing": [i for i in ids if i not in entries]}), 200
+
+
+@batch_bp.route('/users:batchGet', methods=['POST'])
+@read_only
+def batch_get_users():
+    """Plusieurs utilisateurs par id en un appel : {"ids": [...]}."""
+    return batch_get('users', cache.user_key, USERS_QUERY, 'u', lambda record: user_cache_entry(record['u']))
+
+@batch_bp.route('/posts:batchGet', methods=['POST'])
+@read_only
+def batch_get_posts():
+    """Plusieurs posts par id en un appel : {"ids": [...]}."""
+    return batch_get('posts', cache.post_key, POSTS_QUERY, 'p', post_cache_entry)
+
+@batch_bp.route('/comments:batchGet', methods=['POST'])
+@read_only
+def batch_get_comments():
+    """Plusieurs commentaires par id en un appel : {"ids": [...]}."""
+    return batch_get('comments', cache.comment_key, COMMENTS_QUERY, 'c', comment_cache_entry)
@@ -0,0 +1,283 @@
+# app/routes/bulk.py
+"""
+Ingestion en masse : /bulk/users, /bulk/posts, /bulk/comments, /bulk/friendships, /bulk/likes.
+
+Le corps est un tableau JSON ou un flux NDJSON (`Content-Type: application/x-ndjson`,
+un objet par ligne, lu au fil de l'eau). Les éléments valides sont écrits par lots de
+BULK_BATCH_SIZE via UNWIND, un lot par transaction explicite. La réponse donne le
+résultat de chaque élément (index dans l'entrée, statut HTTP équivalent, id ou erreur) :
+un élément invalide ou un lot en échec n'empêche pas l'écriture des autres.
+"""
+import datetime
+import itertools
+import json
+import uuid
+from flask import Blueprint, current_app, request, jsonify
+from app.database import get_db
+from app import cache, feed, snapshot, transactions
+from app.routes.users import SUGGESTIONS_AFFECTED
+
+bulk_bp = Blueprint('bulk', __name__, url_prefix='/bulk')
+
+
+# Helper: lit les éléments du corps (tableau JSON ou NDJSON) -> (index, élément ou None, erreur ou None)
+def iter_request_items():
+    if request.mimetype == 'application/x-ndjson':
+        index = 0
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line), None
+            except ValueError:
+                yield index, None, "Invalid JSON line"
+            index += 1
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            raise ValueError("Request body must be a JSON array or an NDJSON stream")
+        for index, item in enumerate(data):
+            yield index, item, None
+
+def now_iso():
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+# --- Préparation des lignes : retourne (ligne pour UNWIND, None) ou (None, message d'erreur) ---
+
+def require_fields(item, *fields):
+    if not isinstance(item, dict):
+        return "Item must be a JSON object"
+    missing = [f for f in fields if not item.get(f)]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    return None
+
+def prepare_user(item):
+    error = require_fields(item, 'name', 'email')
+    if error: return None, error
+    return {'id': str(uuid.uuid4()), 'name': item['name'], 'email': item['email'], 'created_at': now_iso()}, None
+
+def prepare_post(item):
+    error = require_fields(item, 'user_id', 'title', 'content')
+    if error: return None, error
+    return {'id': str(uuid.uuid4()), 'user_id': item['user_id'], 'title': item['title'],
+            'content': item['content'], 'created_at': now_iso()}, None
+
+def prepare_comment(item):
+    error = require_fields(item, 'user_id', 'post_id', 'content')
+    if error: return None, error
+    return {'id': str(uuid.uuid4()), 'user_id': item['user_id'], 'post_id': item['post_id'],
+            'content': item['content'], 'created_at': now_iso()}, None
+
+def prepare_friendship(item):
+    error = require_fields(item, 'user_id', 'friend_id')
+    if error: return None, error
+    if item['user_id'] == item['friend_id']:
+        return None, "User cannot be friends with themselves"
+    return {'user_id': item['user_id'], 'friend_id': item['friend_id']}, None
+
+def prepare_like(item):
+    error = require_fields(item, 'user_id')
+    if error: return None, error
+    if bool(item.get('post_id')) == bool(item.get('comment_id')):
+        return None, "Exactly one of post_id or comment_id is required"
+    return {'user_id': item['user_id'], 'post_id': item.get('post_id'), 'comment_id': item.get('comment_id')}, None
+
+
+# --- Requêtes UNWIND : chaque ligne renvoie idx, status et error (null si succès) ---
+
+# MERGE sur l'email : un email déjà pris (en base ou plus tôt dans le lot) donne un 409 pour
+# cet élément au lieu de faire échouer tout le lot sur la contrainte d'unicité
+USERS_QUERY = """
+UNWIND $rows AS row
+MERGE (u:User {email: row.email})
+ON CREATE SET u.id = row.id, u.name = row.name, u.created_at = datetime(row.created_at)
+RETURN row.idx AS idx,
+       CASE WHEN u.id = row.id THEN 201 ELSE 409 END AS status,
+       CASE WHEN u.id = row.id THEN null ELSE 'Email ' + row.email + ' already exists' END AS error
+"""
+
+# Comme create_post_for_user : les amis dont la timeline reçoit le post (voir app/feed.py)
+POSTS_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u:User {id: row.user_id})
+FOREACH (_ IN CASE WHEN u IS NOT NULL THEN [1] ELSE [] END |
+    CREATE (u)-[:CREATED]->(:Post {id: row.id, title: row.title, content: row.content,
+                                   created_at: datetime(row.created_at)})
+)
+RETURN row.idx AS idx,
+       CASE WHEN u IS NOT NULL THEN 201 ELSE 404 END AS status,
+       CASE WHEN u IS NOT NULL THEN null ELSE 'User ' + row.user_id + ' not found' END AS error,
+       datetime(row.created_at) AS created_at,
+       CASE WHEN u IS NOT NULL AND coalesce(u.friend_count, 0) <= $fanout_max
+            THEN [(u)-[:FRIENDS_WITH]->(f:User) | f.id] ELSE [] END AS followers
+"""
+
+COMMENTS_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u:User {id: row.user_id})
+OPTIONAL MATCH (p:Post {id: row.post_id})
+FOREACH (_ IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+    CREATE (c:Comment {id: row.id, content: row.content, created_at: datetime(row.created_at)})
+    CREATE (u)-[:CREATED]->(c)
+    CREATE (p)-[:HAS_COMMENT]->(c)
+    SET p.comments_rev = coalesce(p.comments_rev, 0) + 1,
+        p.comment_count = coalesce(p.comment_count, 0) + 1, p.rev = coalesce(p.rev, 0) + 1
+)
+RETURN row.idx AS idx,
+       CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN 201 ELSE 404 END AS status,
+       CASE WHEN u IS NULL THEN 'User ' + row.user_id + ' not found'
+            WHEN p IS NULL THEN 'Post ' + row.post_id + ' not found' END AS error
+"""
+
+FRIENDSHIPS_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u1:User {id: row.user_id})
+OPTIONAL MATCH (u2:User {id: row.friend_id})
+FOREACH (_ IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (u1)-[:FRIENDS_WITH]->(u2)
+    ON CREATE SET u1.friend_count = coalesce(u1.friend_count, 0) + 1, u1.rev = coalesce(u1.rev, 0) + 1
+    MERGE (u2)-[:FRIENDS_WITH]->(u1)
+    ON CREATE SET u2.friend_count = coalesce(u2.friend_count, 0) + 1, u2.rev = coalesce(u2.rev, 0) + 1
+)
+WITH row, u1, u2
+FOREACH (f IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL
+                   THEN [(u1)-[:FRIENDS_WITH]->(f:User) | f] + [(u2)-[:FRIENDS_WITH]->(f:User) | f] ELSE [] END |
+    SET f.friends_rev = coalesce(f.friends_rev, 0) + 1
+)
+RETURN row.idx AS idx,
+       CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL THEN 201 ELSE 404 END AS status,
+       CASE WHEN u1 IS NULL THEN 'User ' + row.user_id + ' not found'
+            WHEN u2 IS NULL THEN 'User ' + row.friend_id + ' not found' END AS error,
+       CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL THEN """ + SUGGESTIONS_AFFECTED + """ ELSE [] END AS affected_ids
+"""
+
+LIKES_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u:User {id: row.user_id})
+OPTIONAL MATCH (p:Post {id: row.post_id})
+OPTIONAL MATCH (c:Comment {id: row.comment_id})
+WITH row, u, coalesce(p, c) AS target
+FOREACH (_ IN CASE WHEN u IS NOT NULL AND target IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (u)-[:LIKES]->(target)
+    ON CREATE SET target.like_count = coalesce(target.like_count, 0) + 1, target.rev = coalesce(target.rev, 0) + 1
+)
+WITH row, u, target
+OPTIONAL MATCH (parent:Post)-[:HAS_COMMENT]->(target:Comment)
+FOREACH (post IN CASE WHEN u IS NOT NULL AND parent IS NOT NULL THEN [parent] ELSE [] END |
+    SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+)
+RETURN row.idx AS idx,
+       CASE WHEN u IS NOT NULL AND target IS NOT NULL THEN 201 ELSE 404 END AS status,
+       CASE WHEN u IS NULL THEN 'User ' + row.user_id + ' not found'
+            WHEN target IS NULL THEN coalesce('Post ' + row.post_id, 'Comment ' + row.comment_id) + ' not found'
+       END AS error
+"""
+
+
+def write_batch(graph, query, rows, parameters=None):
+    """Écrit un lot dans une transaction (rejouée sur erreur transitoire) et retourne {idx: ligne de résultat}."""
+    records = transactions.run_write(graph, query, rows=rows, **(parameters or {}))
+    return {r['idx']: r for r in records}
+
+def run_bulk(prepare, query, result_key=None, cache_keys=None, written=None, parameters=None):
+    """
+    Valide les éléments, les écrit par lots et construit la réponse.
+    `result_key` est la clé de l'identifiant généré (ex: 'id') à renvoyer pour chaque élément créé.
+    `cache_keys(row)` donne les clés de cache à invalider pour chaque élément écrit.
+    `written(row)` est appelé pour chaque élément écrit (ex: événements du snapshot d'amitié).
+    Les colonnes renvoyées par la requête en plus de idx, status et error (ex: followers) sont
+    ajoutées à `row` avant ces deux appels. `parameters` complète $rows dans la requête.
+    """
+    graph = get_db()
+    if not graph: return jsonify({"error": "Database connection failed"}), 500
+
+    batch_size = current_app.config['BULK_BATCH_SIZE']
+    results = []
+    try:
+        items = iter_request_items()
+        while True:
+            chunk = list(itertools.islice(items, batch_size))
+            if not chunk:
+                break
+            rows = []
+            for index, item, error in chunk:
+                row, error = (None, error) if error else prepare(item)
+                if error:
+                    results.append({"index": index, "status": 400, "error": error})
+                else:
+                    row['idx'] = index
+                    rows.append(row)
+            if not rows:
+                continue
+            try:
+                outcome = write_batch(graph, query, rows, parameters)
+            except Exception as e:
+                # Échec du lot entier (transaction annulée) : on continue avec les lots suivants
+                print(f"Error writing bulk batch on {request.path}: {e}")
+                outcome = {row['idx']: {'status': 500, 'error': "Batch failed, nothing written"} for row in rows}
+            stale = []
+            for row in rows:
+                record = outcome.get(row['idx'], {'status': 500, 'error': "No result returned"})
+                status, error = record['status'], record['error']
+                result = {"index": row['idx'], "status": status}
+                if error:
+                    result["error"] = error
+                else:
+                    row.update((key, value) for key, value in record.items() if key not in ('idx', 'status', 'error'))
+                    if result_key:
+                        result[result_key] = row[result_key]
+                    if cache_keys:
+                        stale += cache_keys(row)
+                    if written:
+                        written(row)
+                results.append(result)
+            if stale:
+                cache.invalidate(*set(stale))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results.sort(key=lambda r: r["index"])
+    succeeded = sum(1 for r in results if r["status"] < 300)
+    return jsonify({"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}), 200
+
+
+@bulk_bp.route('/users', methods=['POST'])
+def bulk_create_users():
+    """Crée des utilisateurs en masse : [{"name", "email"}, ...]."""
+    return run_bulk(prepare_user, USERS_QUERY, result_key='id', written=lambda row: snapshot.user_added(row['id']))
+
+@bulk_bp.route('/posts', methods=['POST'])
+def bulk_create_posts():
+    """Crée des posts en masse : [{"user_id", "title", "content"}, ...]."""
+    return run_bulk(prepare_post, POSTS_QUERY, result_key='id',
+                    written=lambda row: feed.push(row['followers'], feed.iso(row['created_at']), row['id']),
+                    parameters={'fanout_max': current_app.config['FEED_FANOUT_MAX_FRIENDS']})
+
+@bulk_bp.route('/comments', methods=['POST'])
+def bulk_create_comments():
+    """Crée des commentaires en masse : [{"user_id", "post_id", "content"}, ...]."""
+    return run_bulk(prepare_comment, COMMENTS_QUERY, result_key='id',
+                    cache_keys=lambda row: [cache.post_key(row['post_id'])])
+
+def friendship_written(row):
+    # Comme add_friend : les timelines des deux utilisateurs changent de composition
+    feed.drop(row['user_id'], row['friend_id'])
+    snapshot.friendship_added(row['user_id'], row['friend_id'])
+
+@bulk_bp.route('/friendships', methods=['POST'])
+def bulk_add_friendships():
+    """Crée des amitiés (dans les deux sens) en masse : [{"user_id", "friend_id"}, ...]."""
+    return run_bulk(prepare_friendship, FRIENDSHIPS_QUERY,
+                    cache_keys=lambda row: [cache.user_key(row['user_id']), cache.user_key(row['friend_id'])]
+                                           + [cache.suggestions_key(user_id) for user_id in row['affected_ids']],
+                    written=friendship_written,
+                    parameters={'degree_cap': current_app.config['SUGGESTIONS_DEGREE_CAP']})
+
+@bulk_bp.route('/likes', methods=['POST'])
+def bulk_add_likes():
+    """Ajoute des likes en masse : [{"user_id", "post_id"} ou {"user_id", "comment_id"}, ...]."""
+    return run_bulk(prepare_like, LIKES_QUERY,
+                    cache_keys=lambda row: [cache.post_key(row['post_id']) if row['post_id'] else cache.comment_key(row['comment_id'])])
@@ -1,7 +1,10 @@
 # app/routes/comments.py
 import uuid
 from flask import Blueprint, request, jsonify
-from app.database import get_db
+from app.database import get_db, split_optional_rows
+from app.pagination import InvalidPageParams, get_page_params, paginate, set_next_page
+from app import streaming, cache, etag, writebehind, transactions
+from app.projection import Include, InvalidProjection, ProjectionSpec, plain
 import datetime
 # Importer les helpers si besoin
 # from .users import user_node_to_dict
@@ -19,9 +22,32 @@ def comment_node_to_dict(node):
     return {
         "id": node.get("id"),
         "content": node.get("content"),
-        "created_at": created_at
+        "created_at": created_at,
+        # Compteur dénormalisé tenu à jour par like_comment / unlike_comment (voir app/counters.py)
+        "likeCount": node.get("like_count") or 0,
     }
 
+# Helper: commentaire + auteur (+ post_id si présent) tels que renvoyés par les requêtes de lecture
+def comment_record_to_dict(record):
+    comment_data = comment_node_to_dict(record['c'])
+    comment_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
+    if 'post_id' in record.keys():
+        comment_data['post_id'] = record['post_id']
+    return comment_data
+
+# Helper: entrée de cache de GET /comments/<id> (partagée avec /comments:batchGet)
+def comment_cache_entry(record):
+    comment = record['c']
+    return {'etag': etag.make_etag('comment', comment.get('id'), [comment.get('rev') or 0, record['author_rev']]),
+            'data': comment_record_to_dict(record)}
+
+# ?fields= / ?include= des listes de commentaires (voir app/projection.py) ; `u` est l'auteur, `p` le post
+COMMENT_PROJECTION = ProjectionSpec('c', ('id', 'content', 'created_at'), {
+    'author': Include('author', "{id: u.id, name: u.name}"),
+    'likeCount': Include('likeCount', "coalesce(c.like_count, 0)"),
+    'post': Include('post_id', "p.id"),
+})
+
 # Helper function to get user ID from request body (pour LIKES et création)
 def get_user_id_from_request():
     data = request.get_json()
@@ -32,28 +58,39 @@ def get_user_id_from_request():
 
 @comments_bp.route('/posts/<string:post_id>/comments', methods=['GET'])
 def get_post_comments(post_id):
-    """Récupère les commentaires d'un post."""
+    """Récupère les commentaires d'un post (`fields` et `include`, voir app/projection.py)."""
+    try:
+        projection = COMMENT_PROJECTION.parse(('author', 'likeCount'))
+    except InvalidProjection as e:
+        return jsonify({"error": str(e)}), 400
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier si le post existe
-    post_check = graph.evaluate("MATCH (p:Post {id: $id}) RETURN count(p) > 0", id=post_id)
-    if not post_check:
-        return jsonify({"error": f"Post with id {post_id} not found"}), 404
-
-    query = """
-    MATCH (p:Post {id: $post_id})-[:HAS_COMMENT]->(c:Comment)<-[:CREATED]-(u:User)
-    RETURN c, u.id as author_id, u.name as author_name
+    # Vérifier si le post existe et lire ses commentaires dans la même requête ;
+    # la révision de la liste (comments_rev) sert d'ETag
+    query = f"""
+    OPTIONAL MATCH (p:Post {{id: $post_id}})
+    OPTIONAL MATCH (p)-[:HAS_COMMENT]->(c:Comment)<-[:CREATED]-(u:User)
+    RETURN p IS NOT NULL as post_found, coalesce(p.comments_rev, 0) as version, {projection.cypher} as item
     ORDER BY c.created_at ASC // Afficher les commentaires du plus ancien au plus récent
     """
+    key = projection.etag_key('post-comments', post_id)
     try:
-        results = graph.run(query, post_id=post_id).data()
-        comments = []
-        for record in results:
-            comment_data = comment_node_to_dict(record['c'])
-            comment_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
-            comments.append(comment_data)
-        return jsonify(comments), 200
+        not_modified = etag.precondition(graph, "MATCH (p:Post {id: $id}) RETURN coalesce(p.comments_rev, 0)",
+                                         key, id=post_id)
+        if not_modified: return not_modified
+
+        first, records = split_optional_rows(graph.run(query, post_id=post_id), 'item')
+        if not first['post_found']:
+            return jsonify({"error": f"Post with id {post_id} not found"}), 404
+
+        tag = etag.make_etag(*key, first['version'])
+        stream = streaming.requested_mode()
+        if stream:
+            return etag.set_etag(streaming.stream_records(records, lambda r: projection.to_dict(r['item']), stream), tag)
+        comments = [projection.to_dict(record['item']) for record in records]
+        return etag.set_etag(jsonify(comments), tag), 200
     except Exception as e:
         print(f"Error fetching comments for post {post_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -76,35 +113,43 @@ def add_comment_to_post(post_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier existence User et Post
-    check_u = graph.evaluate("MATCH (n:User {id: $id}) RETURN count(n)>0", id=user_id)
-    check_p = graph.evaluate("MATCH (n:Post {id: $id}) RETURN count(n)>0", id=post_id)
-    if not check_u: return jsonify({"error": f"User {user_id} not found"}), 404
-    if not check_p: return jsonify({"error": f"Post {post_id} not found"}), 404
-
+    # Vérification de User et Post, création et lecture de l'auteur en une seule requête :
+    # le FOREACH ne crée le commentaire que si les deux existent
     query = """
-    MATCH (u:User {id: $user_id})
-    MATCH (p:Post {id: $post_id})
-    CREATE (c:Comment {
-        id: $comment_id,
-        content: $content,
-        created_at: datetime($created_at)
-    })
-    CREATE (u)-[:CREATED]->(c)
-    CREATE (p)-[:HAS_COMMENT]->(c)
-    RETURN c
+    OPTIONAL MATCH (u:User {id: $user_id})
+    OPTIONAL MATCH (p:Post {id: $post_id})
+    FOREACH (_ IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+        CREATE (c:Comment {
+            id: $comment_id,
+            content: $content,
+            created_at: datetime($created_at)
+        })
+        CREATE (u)-[:CREATED]->(c)
+        CREATE (p)-[:HAS_COMMENT]->(c)
+        SET p.comments_rev = coalesce(p.comments_rev, 0) + 1,
+            p.comment_count = coalesce(p.comment_count, 0) + 1, p.rev = coalesce(p.rev, 0) + 1
+    )
+    WITH u, p
+    OPTIONAL MATCH (p)-[:HAS_COMMENT]->(c:Comment {id: $comment_id})
+    RETURN u IS NOT NULL as user_found, p IS NOT NULL as post_found, c, u.id as author_id, u.name as author_name
     """
+    def create(tx):
+        record = tx.run(query, user_id=user_id, post_id=post_id, comment_id=comment_id, content=content,
+                        created_at=created_at).data()[0]
+        if not record['user_found']: return {"error": f"User {user_id} not found"}, 404
+        if not record['post_found']: return {"error": f"Post {post_id} not found"}, 404
+        if record['c'] is None:
+            return {"error": "Failed to create comment"}, 500
+        return comment_record_to_dict(record), 201
+
     try:
-        result = graph.run(query, user_id=user_id, post_id=post_id, comment_id=comment_id, content=content, created_at=created_at).data()
-        if result:
-            comment_node = result[0]['c']
-            # Récupérer l'auteur pour la réponse
-            author_info = graph.run("MATCH (u:User {id:$uid}) RETURN u.id as id, u.name as name", uid=user_id).data()[0]
-            comment_data = comment_node_to_dict(comment_node)
-            comment_data['author'] = author_info
-            return jsonify(comment_data), 201
-        else:
-            return jsonify({"error": "Failed to create comment"}), 500
+        # Avec un en-tête Idempotency-Key, un renvoi de la requête rend le même commentaire (voir app/transactions.py)
+        body, status, replayed = transactions.idempotent(graph, create)
+        if status == 201 and not replayed:
+            cache.invalidate(cache.post_key(post_id))
+        return transactions.respond(body, status, replayed)
+    except transactions.InvalidIdempotencyKey as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error creating comment for post {post_id} by user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -118,22 +163,20 @@ def delete_comment_from_post(post_id, comment_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier si le commentaire existe et est lié au post
-    check_query = """
-    MATCH (p:Post {id: $post_id})-[:HAS_COMMENT]->(c:Comment {id: $comment_id})
-    RETURN count(c) as count
-    """
-    count_result = graph.run(check_query, post_id=post_id, comment_id=comment_id).data()
-    if count_result[0]['count'] == 0:
-        return jsonify({"error": "Comment not found or not associated with this post"}), 404
-
-    # Supprimer le commentaire et ses relations LIKES
+    # Supprimer le commentaire (et ses relations LIKES) seulement s'il est lié au post ;
+    # count(*) vaut 0 sinon, ce qui évite une requête de vérification séparée
     query = """
-    MATCH (c:Comment {id: $comment_id})
+    MATCH (p:Post {id: $post_id})-[:HAS_COMMENT]->(c:Comment {id: $comment_id})
+    SET p.comments_rev = coalesce(p.comments_rev, 0) + 1,
+        p.comment_count = coalesce(p.comment_count, 0) - 1, p.rev = coalesce(p.rev, 0) + 1
     DETACH DELETE c
+    RETURN count(*) as deleted
     """
     try:
-        graph.run(query, comment_id=comment_id)
+        result = transactions.run_write(graph, query, post_id=post_id, comment_id=comment_id)
+        if result[0]['deleted'] == 0:
+            return jsonify({"error": "Comment not found or not associated with this post"}), 404
+        cache.invalidate(cache.comment_key(comment_id), cache.post_key(post_id))
         return jsonify({"message": "Comment deleted successfully"}), 200
     except Exception as e:
         print(f"Error deleting comment {comment_id}: {e}")
@@ -141,48 +184,87 @@ def delete_comment_from_post(post_id, comment_id):
 
 @comments_bp.route('/comments', methods=['GET'])
 def get_all_comments():
-    """Récupère tous les commentaires."""
+    """
+    Récupère une page de commentaires, du plus récent au plus ancien (paramètres `limit` et `cursor`,
+    `fields` et `include`, voir app/projection.py).
+    """
+    try:
+        limit, after = get_page_params()
+        projection = COMMENT_PROJECTION.parse(('author', 'likeCount', 'post'))
+    except (InvalidPageParams, InvalidProjection) as e:
+        return jsonify({"error": str(e)}), 400
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    query = """
-    MATCH (c:Comment)<-[:CREATED]-(u:User)
-    MATCH (p:Post)-[:HAS_COMMENT]->(c) // Trouver le post associé
-    RETURN c, u.id as author_id, u.name as author_name, p.id as post_id
-    ORDER BY c.created_at DESC
-    """
+    # Le curseur porte sur (created_at, id) ; la borne "<=" permet un parcours de l'index comment_created_at
+    params = {'limit': limit + 1}
+    keyset = """
+        WHERE c.created_at <= datetime($after_created_at)
+          AND (c.created_at < datetime($after_created_at) OR c.id < $after_id)
+        """
+    where = ""
+    if after is not None:
+        where = keyset
+        params['after_created_at'], params['after_id'] = after
+    stream = streaming.requested_mode()
+
+    def page_query(where):
+        return f"""
+        MATCH (c:Comment)<-[:CREATED]-(u:User)
+        MATCH (p:Post)-[:HAS_COMMENT]->(c) // Trouver le post associé
+        {where}
+        RETURN {projection.cypher} as item, c.created_at as created_at, c.id as id
+        ORDER BY c.created_at DESC, c.id DESC
+        LIMIT $limit
+        """
+
+    def fetch_page(page_after, page_limit):
+        """Page du mode flux (voir streaming.stream_pages)."""
+        page_params = {**params, 'limit': page_limit}
+        if page_after is not None:
+            page_params['after_created_at'], page_params['after_id'] = page_after
+        return graph.run(page_query(keyset if page_after is not None else ""), page_params).data()
+
+    query = page_query(where)
     try:
-        results = graph.run(query).data()
-        comments = []
-        for record in results:
-            comment_data = comment_node_to_dict(record['c'])
-            comment_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
-            comment_data['post_id'] = record['post_id']
-            comments.append(comment_data)
-        return jsonify(comments), 200
+        if stream:
+            return streaming.stream_pages(fetch_page, lambda r: (plain(r['created_at']), r['id']),
+                                          lambda r: projection.to_dict(r['item']), stream, after)
+        results = graph.run(query, params).data()
+        page, next_cursor = paginate(results, limit, lambda r: (plain(r['created_at']), r['id']))
+        comments = [projection.to_dict(record['item']) for record in page]
+        return set_next_page(jsonify(comments), next_cursor, limit), 200
     except Exception as e:
         print(f"Error fetching all comments: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @comments_bp.route('/comments/<string:comment_id>', methods=['GET'])
 def get_comment_by_id(comment_id):
-    """Récupère un commentaire par son ID."""
+    """Récupère un commentaire par son ID (cache, voir app/cache.py, et ETag, voir app/etag.py)."""
+    cached = cache.get(cache.comment_key(comment_id))
+    if cached is not None:
+        return etag.cached_response(cached)
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
     query = """
     MATCH (c:Comment {id: $id})<-[:CREATED]-(u:User)
     MATCH (p:Post)-[:HAS_COMMENT]->(c)
-    RETURN c, u.id as author_id, u.name as author_name, p.id as post_id
+    RETURN c, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev, p.id as post_id
     """
     try:
+        not_modified = etag.precondition(
+            graph, "MATCH (c:Comment {id: $id})<-[:CREATED]-(u:User) RETURN [coalesce(c.rev, 0), coalesce(u.rev, 0)]",
+            ('comment', comment_id), id=comment_id)
+        if not_modified: return not_modified
+
         result = graph.run(query, id=comment_id).data()
         if result:
-            record = result[0]
-            comment_data = comment_node_to_dict(record['c'])
-            comment_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
-            comment_data['post_id'] = record['post_id']
-            return jsonify(comment_data), 200
+            entry = comment_cache_entry(result[0])
+            cache.set(cache.comment_key(comment_id), entry)
+            return etag.cached_response(entry)
         else:
             return jsonify({"error": "Comment not found"}), 404
     except Exception as e:
@@ -202,13 +284,19 @@ def update_comment(comment_id):
 
     query = """
     MATCH (c:Comment {id: $id})
-    SET c.content = $content
+    SET c.content = $content, c.rev = coalesce(c.rev, 0) + 1
+    WITH c
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    FOREACH (post IN CASE WHEN p IS NOT NULL THEN [p] ELSE [] END |
+        SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+    )
     RETURN c
     """
     try:
-        result = graph.run(query, id=comment_id, content=content).data()
+        result = transactions.run_write(graph, query, id=comment_id, content=content)
         if result:
             comment_node = result[0]['c']
+            cache.invalidate(cache.comment_key(comment_id))
             return jsonify(comment_node_to_dict(comment_node)), 200
         else:
             return jsonify({"error": "Comment not found"}), 404
@@ -222,19 +310,23 @@ def delete_comment(comment_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier si le commentaire existe
-    check_query = "MATCH (c:Comment {id: $id}) RETURN count(c) as count"
-    count_result = graph.run(check_query, id=comment_id).data()
-    if count_result[0]['count'] == 0:
-        return jsonify({"error": "Comment not found"}), 404
-
     # Supprimer le commentaire et ses relations (CREATED, HAS_COMMENT, LIKES)
+    # count(*) vaut 0 si le commentaire n'existe pas
     query = """
     MATCH (c:Comment {id: $id})
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    FOREACH (post IN CASE WHEN p IS NOT NULL THEN [p] ELSE [] END |
+        SET post.comments_rev = coalesce(post.comments_rev, 0) + 1,
+            post.comment_count = coalesce(post.comment_count, 0) - 1, post.rev = coalesce(post.rev, 0) + 1
+    )
     DETACH DELETE c
+    RETURN count(*) as deleted, collect(p.id) as post_ids
     """
     try:
-        graph.run(query, id=comment_id)
+        result = transactions.run_write(graph, query, id=comment_id)
+        if result[0]['deleted'] == 0:
+            return jsonify({"error": "Comment not found"}), 404
+        cache.invalidate(cache.comment_key(comment_id), *[cache.post_key(p) for p in result[0]['post_ids']])
         return jsonify({"message": "Comment deleted successfully"}), 200
     except Exception as e:
         print(f"Error deleting comment {comment_id}: {e}")
@@ -249,26 +341,34 @@ def like_comment(comment_id):
     user_id = get_user_id_from_request()
     if not user_id:
         return jsonify({"error": "Missing 'user_id' in request body"}), 400
+    # Mode différé (LIKES_WRITE_BEHIND) : 202 sans attendre Neo4j, écriture par lots (voir app/writebehind.py)
+    if writebehind.get_likes() is not None:
+        return writebehind.accept_like(user_id, True, comment_id=comment_id)
 
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
     query = """
-    MATCH (u:User {id: $user_id})
-    MATCH (c:Comment {id: $comment_id})
-    MERGE (u)-[r:LIKES]->(c)
-    RETURN count(r) > 0 as liked
+    OPTIONAL MATCH (u:User {id: $user_id})
+    OPTIONAL MATCH (c:Comment {id: $comment_id})
+    FOREACH (_ IN CASE WHEN u IS NOT NULL AND c IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (u)-[:LIKES]->(c)
+        ON CREATE SET c.like_count = coalesce(c.like_count, 0) + 1, c.rev = coalesce(c.rev, 0) + 1
+    )
+    // like_count figure dans la liste des commentaires du post
+    WITH u, c
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    FOREACH (post IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [p] ELSE [] END |
+        SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+    )
+    RETURN u IS NOT NULL as user_found, c IS NOT NULL as comment_found
     """
     try:
-        result = graph.run(query, user_id=user_id, comment_id=comment_id).data()
-        if result:
-            return jsonify({"message": f"User {user_id} liked comment {comment_id}"}), 201
-        else:
-            check_u = graph.evaluate("MATCH (n:User {id: $id}) RETURN count(n)>0", id=user_id)
-            check_c = graph.evaluate("MATCH (n:Comment {id: $id}) RETURN count(n)>0", id=comment_id)
-            if not check_u: return jsonify({"error": f"User {user_id} not found"}), 404
-            if not check_c: return jsonify({"error": f"Comment {comment_id} not found"}), 404
-            return jsonify({"error": "Failed to like comment"}), 500
+        result = transactions.run_write(graph, query, user_id=user_id, comment_id=comment_id)
+        if not result[0]['user_found']: return jsonify({"error": f"User {user_id} not found"}), 404
+        if not result[0]['comment_found']: return jsonify({"error": f"Comment {comment_id} not found"}), 404
+        cache.invalidate(cache.comment_key(comment_id))
+        return jsonify({"message": f"User {user_id} liked comment {comment_id}"}), 201
     except Exception as e:
         print(f"Error liking comment {comment_id} by user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -279,31 +379,36 @@ def unlike_comment(comment_id):
     user_id = get_user_id_from_request()
     if not user_id:
         return jsonify({"error": "Missing 'user_id' in request body"}), 400
+    # Mode différé (LIKES_WRITE_BEHIND) : 202 sans attendre Neo4j, écriture par lots (voir app/writebehind.py)
+    if writebehind.get_likes() is not None:
+        return writebehind.accept_like(user_id, False, comment_id=comment_id)
 
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
     query = """
-    MATCH (u:User {id: $user_id})-[r:LIKES]->(c:Comment {id: $comment_id})
+    OPTIONAL MATCH (u:User {id: $user_id})
+    OPTIONAL MATCH (c:Comment {id: $comment_id})
+    OPTIONAL MATCH (u)-[r:LIKES]->(c)
     DELETE r
-    RETURN count(r) as deleted_count
+    WITH u, c, count(r) as deleted_count
+    OPTIONAL MATCH (p:Post)-[:HAS_COMMENT]->(c)
+    FOREACH (_ IN CASE WHEN deleted_count > 0 THEN [1] ELSE [] END |
+        SET c.like_count = coalesce(c.like_count, 0) - deleted_count, c.rev = coalesce(c.rev, 0) + 1
+    )
+    FOREACH (post IN CASE WHEN deleted_count > 0 AND p IS NOT NULL THEN [p] ELSE [] END |
+        SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+    )
+    RETURN u IS NOT NULL AND c IS NOT NULL as found, deleted_count
     """
     try:
-        result = graph.run(query, user_id=user_id, comment_id=comment_id).data()
-        if result and result[0]['deleted_count'] > 0:
-            return jsonify({"message": f"User {user_id} unliked comment {comment_id}"}), 200
-        else:
-            check_query = """
-            MATCH (u:User {id: $user_id}), (c:Comment {id: $comment_id})
-            RETURN exists((u)-[:LIKES]->(c)) as liked
-            """
-            check_result = graph.run(check_query, user_id=user_id, comment_id=comment_id).data()
-            if not check_result:
-                return jsonify({"error": "User or Comment not found"}), 404
-            elif not check_result[0]['liked']:
-                return jsonify({"error": "Like relationship does not exist"}), 404
-            else:
-                return jsonify({"error": "Failed to unlike comment"}), 500
+        result = transactions.run_write(graph, query, user_id=user_id, comment_id=comment_id)
+        if not result[0]['found']:
+            return jsonify({"error": "User or Comment not found"}), 404
+        if result[0]['deleted_count'] == 0:
+            return jsonify({"error": "Like relationship does not exist"}), 404
+        cache.invalidate(cache.comment_key(comment_id))
+        return jsonify({"message": f"User {user_id} unliked comment {comment_id}"}), 200
     except Exception as e:
         print(f"Error unliking comment {comment_id} by user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
\ No newline at end of file
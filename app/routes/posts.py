@@ -1,7 +1,10 @@
 # app/routes/posts.py
 import uuid
-from flask import Blueprint, request, jsonify
-from app.database import get_db
+from flask import Blueprint, current_app, request, jsonify
+from app.database import get_db, split_optional_rows
+from app.pagination import InvalidPageParams, get_page_params, paginate, set_next_page
+from app import streaming, cache, etag, feed, writebehind, deletion, transactions
+from app.projection import Include, InvalidProjection, ProjectionSpec, plain
 import datetime
 # Importer le helper depuis users.py ou le définir ici aussi
 # from .users import user_node_to_dict (si user_node_to_dict est global)
@@ -19,9 +22,42 @@ def post_node_to_dict(node):
         "id": node.get("id"),
         "title": node.get("title"),
         "content": node.get("content"),
-        "created_at": created_at
+        "created_at": created_at,
+        # Compteurs dénormalisés tenus à jour par les routes d'écriture (voir app/counters.py)
+        "likeCount": node.get("like_count") or 0,
+        "commentCount": node.get("comment_count") or 0,
     }
 
+# Helper: post + auteur tels que renvoyés par "RETURN p, u.id as author_id, u.name as author_name"
+def post_record_to_dict(record):
+    post_data = post_node_to_dict(record['p'])
+    post_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
+    return post_data
+
+# Helper: entrée de cache de GET /posts/<id> (partagée avec /posts:batchGet)
+def post_cache_entry(record):
+    post = record['p']
+    return {'etag': etag.make_etag('post', post.get('id'), [post.get('rev') or 0, record['author_rev']]),
+            'data': post_record_to_dict(record)}
+
+# ?fields= / ?include= des routes de lecture des posts (voir app/projection.py) ;
+# `u` est l'auteur, include=comments embarque les PROJECTION_COMMENTS_MAX premiers commentaires
+POST_PROJECTION = ProjectionSpec('p', ('id', 'title', 'content', 'created_at'), {
+    'author': Include('author', "{id: u.id, name: u.name}"),
+    'likeCount': Include('likeCount', "coalesce(p.like_count, 0)"),
+    'commentCount': Include('commentCount', "coalesce(p.comment_count, 0)"),
+    'comments': Include('comments', "comments", clause="""
+    CALL {
+        WITH p
+        OPTIONAL MATCH (p)-[:HAS_COMMENT]->(cc:Comment)<-[:CREATED]-(cu:User)
+        WITH cc, cu ORDER BY cc.created_at ASC LIMIT $comments_max
+        RETURN collect(cc {.id, .content, .created_at, likeCount: coalesce(cc.like_count, 0),
+                           author: {id: cu.id, name: cu.name}}) AS comments
+    }
+    """, version="coalesce(p.comments_rev, 0)", params={'comments_max': 'PROJECTION_COMMENTS_MAX'}),
+})
+POST_DEFAULT_INCLUDES = ('author', 'likeCount', 'commentCount')
+
 # Helper function to get user ID from request body (pour LIKES)
 def get_user_id_from_request():
     data = request.get_json()
@@ -32,71 +68,176 @@ def get_user_id_from_request():
 
 @posts_bp.route('/posts', methods=['GET'])
 def get_posts():
-    """Récupère tous les posts."""
+    """
+    Récupère une page de posts, du plus récent au plus ancien (paramètres `limit` et `cursor`,
+    `fields` et `include`, voir app/projection.py).
+    """
+    try:
+        limit, after = get_page_params()
+        projection = POST_PROJECTION.parse(POST_DEFAULT_INCLUDES)
+    except (InvalidPageParams, InvalidProjection) as e:
+        return jsonify({"error": str(e)}), 400
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Récupérer les posts et optionnellement leur auteur
-    query = """
+    # Récupérer les posts et leur auteur ; le curseur porte sur (created_at, id)
+    # et la borne "<=" permet un parcours de l'index post_created_at à partir du curseur
+    params = {'limit': limit + 1, **projection.params}
+    keyset = """
+        WHERE p.created_at <= datetime($after_created_at)
+          AND (p.created_at < datetime($after_created_at) OR p.id < $after_id)
+        """
+    where = ""
+    if after is not None:
+        where = keyset
+        params['after_created_at'], params['after_id'] = after
+    stream = streaming.requested_mode()
+
+    # Seules les propriétés demandées sont projetées ; les sous-requêtes des `include`
+    # ne s'exécutent que sur les posts de la page
+    def page_query(where):
+        return f"""
+        MATCH (p:Post)<-[:CREATED]-(u:User)
+        {where}
+        WITH p, u ORDER BY p.created_at DESC, p.id DESC
+        LIMIT $limit
+        {projection.clauses}
+        RETURN {projection.cypher} as item, p.created_at as created_at, p.id as id,
+               [coalesce(p.rev, 0), coalesce(u.rev, 0)] + {projection.versions} as version
+        ORDER BY p.created_at DESC, p.id DESC
+        """
+
+    def fetch_page(page_after, page_limit):
+        """Page du mode flux (voir streaming.stream_pages)."""
+        page_params = {**params, 'limit': page_limit}
+        if page_after is not None:
+            page_params['after_created_at'], page_params['after_id'] = page_after
+        return graph.run(page_query(keyset if page_after is not None else ""), page_params).data()
+
+    query = page_query(where)
+    # ETag de la page : ids et révisions des posts et auteurs de la page, sans leur contenu
+    version_query = f"""
     MATCH (p:Post)<-[:CREATED]-(u:User)
-    RETURN p, u.id as author_id, u.name as author_name
-    ORDER BY p.created_at DESC
+    {where}
+    WITH p, u ORDER BY p.created_at DESC, p.id DESC LIMIT $limit
+    RETURN collect([p.id] + [coalesce(p.rev, 0), coalesce(u.rev, 0)] + {projection.versions})
     """
+    page_key = projection.etag_key('posts', request.args.get('cursor'), limit)
     try:
-        results = graph.run(query).data()
-        posts = []
-        for record in results:
-            post_data = post_node_to_dict(record['p'])
-            post_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
-            posts.append(post_data)
-        return jsonify(posts), 200
+        if stream:
+            return streaming.stream_pages(fetch_page, lambda r: (plain(r['created_at']), r['id']),
+                                          lambda r: projection.to_dict(r['item']), stream, after)
+        not_modified = etag.precondition(graph, version_query, page_key, **params)
+        if not_modified: return not_modified
+
+        results = graph.run(query, params).data()
+        tag = etag.make_etag(*page_key, [[r['id']] + r['version'] for r in results])
+        page, next_cursor = paginate(results, limit, lambda r: (plain(r['created_at']), r['id']))
+        posts = [projection.to_dict(record['item']) for record in page]
+        return etag.set_etag(set_next_page(jsonify(posts), next_cursor, limit), tag), 200
     except Exception as e:
         print(f"Error fetching posts: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 @posts_bp.route('/posts/<string:post_id>', methods=['GET'])
 def get_post_by_id(post_id):
-    """Récupère un post par son ID."""
+    """
+    Récupère un post par son ID (cache, voir app/cache.py, et ETag, voir app/etag.py).
+    Avec `fields` / `include` (voir app/projection.py), le post projeté est lu sans passer par le cache.
+    """
+    try:
+        projection = POST_PROJECTION.parse(POST_DEFAULT_INCLUDES)
+    except InvalidProjection as e:
+        return jsonify({"error": str(e)}), 400
+    if not projection.default:
+        return get_projected_post(post_id, projection)
+
+    cached = cache.get(cache.post_key(post_id))
+    if cached is not None:
+        return etag.cached_response(cached)
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
     query = """
     MATCH (p:Post {id: $id})<-[:CREATED]-(u:User)
-    RETURN p, u.id as author_id, u.name as author_name
+    RETURN p, u.id as author_id, u.name as author_name, coalesce(u.rev, 0) as author_rev
     """
     try:
+        not_modified = etag.precondition(
+            graph, "MATCH (p:Post {id: $id})<-[:CREATED]-(u:User) RETURN [coalesce(p.rev, 0), coalesce(u.rev, 0)]",
+            ('post', post_id), id=post_id)
+        if not_modified: return not_modified
+
         result = graph.run(query, id=post_id).data()
         if result:
-            record = result[0]
-            post_data = post_node_to_dict(record['p'])
-            post_data['author'] = {'id': record['author_id'], 'name': record['author_name']}
-            # On pourrait aussi compter les likes et commentaires ici
-            return jsonify(post_data), 200
+            entry = post_cache_entry(result[0])
+            cache.set(cache.post_key(post_id), entry)
+            return etag.cached_response(entry)
         else:
             return jsonify({"error": "Post not found"}), 404
     except Exception as e:
         print(f"Error fetching post {post_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+def get_projected_post(post_id, projection):
+    """GET /posts/<id> avec `fields` / `include` : ETag propre à la projection, pas de cache."""
+    graph = get_db()
+    if not graph: return jsonify({"error": "Database connection failed"}), 500
+
+    query = f"""
+    MATCH (p:Post {{id: $id}})<-[:CREATED]-(u:User)
+    {projection.clauses}
+    RETURN {projection.cypher} as item, [coalesce(p.rev, 0), coalesce(u.rev, 0)] + {projection.versions} as version
+    """
+    version_query = f"""
+    MATCH (p:Post {{id: $id}})<-[:CREATED]-(u:User)
+    RETURN [coalesce(p.rev, 0), coalesce(u.rev, 0)] + {projection.versions}
+    """
+    key = projection.etag_key('post', post_id)
+    try:
+        not_modified = etag.precondition(graph, version_query, key, id=post_id)
+        if not_modified: return not_modified
+
+        result = graph.run(query, id=post_id, **projection.params).data()
+        if not result:
+            return jsonify({"error": "Post not found"}), 404
+        tag = etag.make_etag(*key, result[0]['version'])
+        return etag.set_etag(jsonify(projection.to_dict(result[0]['item'])), tag), 200
+    except Exception as e:
+        print(f"Error fetching post {post_id}: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
 @posts_bp.route('/users/<string:user_id>/posts', methods=['GET'])
 def get_user_posts(user_id):
-    """Récupère les posts créés par un utilisateur spécifique."""
+    """Récupère les posts créés par un utilisateur spécifique (`fields` et `include`, voir app/projection.py)."""
+    try:
+        projection = POST_PROJECTION.parse(('likeCount', 'commentCount'))
+    except InvalidProjection as e:
+        return jsonify({"error": str(e)}), 400
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier si l'utilisateur existe
-    user_check = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=user_id)
-    if not user_check:
-        return jsonify({"error": f"User with id {user_id} not found"}), 404
-
-    query = """
-    MATCH (u:User {id: $user_id})-[:CREATED]->(p:Post)
-    RETURN p
+    # Vérifier si l'utilisateur existe et lire ses posts dans la même requête
+    query = f"""
+    OPTIONAL MATCH (u:User {{id: $user_id}})
+    OPTIONAL MATCH (u)-[:CREATED]->(p:Post)
+    WITH u, p
+    {projection.clauses}
+    RETURN u IS NOT NULL as user_found, {projection.cypher} as item
     ORDER BY p.created_at DESC
     """
     try:
-        results = graph.run(query, user_id=user_id).data()
-        posts = [post_node_to_dict(record['p']) for record in results]
+        first, records = split_optional_rows(graph.run(query, user_id=user_id, **projection.params), 'item')
+        if not first['user_found']:
+            return jsonify({"error": f"User with id {user_id} not found"}), 404
+
+        stream = streaming.requested_mode()
+        if stream:
+            return streaming.stream_records(records, lambda r: projection.to_dict(r['item']), stream)
+        posts = [projection.to_dict(record['item']) for record in records]
         return jsonify(posts), 200
     except Exception as e:
         print(f"Error fetching posts for user {user_id}: {e}")
@@ -117,11 +258,9 @@ def create_post_for_user(user_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Vérifier si l'utilisateur existe avant de créer le post
-    user_check = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=user_id)
-    if not user_check:
-        return jsonify({"error": f"User with id {user_id} not found, cannot create post"}), 404
-
+    # Si l'utilisateur n'existe pas, le MATCH ne renvoie rien et aucun post n'est créé.
+    # La même requête renvoie les amis dont la timeline reçoit le post (voir app/feed.py) ;
+    # aucun si l'auteur a trop d'amis : ses posts sont alors lus à la demande.
     query = """
     MATCH (u:User {id: $user_id})
     CREATE (p:Post {
@@ -131,16 +270,27 @@ def create_post_for_user(user_id):
         created_at: datetime($created_at)
     })
     CREATE (u)-[:CREATED]->(p)
-    RETURN p
+    RETURN p, CASE WHEN coalesce(u.friend_count, 0) <= $fanout_max
+                   THEN [(u)-[:FRIENDS_WITH]->(f:User) | f.id] ELSE [] END as followers
     """
+    followers = []
+
+    def create(tx):
+        result = tx.run(query, user_id=user_id, post_id=post_id, title=title, content=content, created_at=created_at,
+                        fanout_max=current_app.config['FEED_FANOUT_MAX_FRIENDS']).data()
+        if not result:
+            return {"error": f"User with id {user_id} not found, cannot create post"}, 404
+        followers[:] = result[0]['followers']
+        return post_node_to_dict(result[0]['p']), 201
+
     try:
-        result = graph.run(query, user_id=user_id, post_id=post_id, title=title, content=content, created_at=created_at).data()
-        if result:
-            post_node = result[0]['p']
-            return jsonify(post_node_to_dict(post_node)), 201
-        else:
-            # Ne devrait pas arriver si le MATCH user réussit
-            return jsonify({"error": "Failed to create post"}), 500
+        # Avec un en-tête Idempotency-Key, un renvoi de la requête rend le même post (voir app/transactions.py)
+        body, status, replayed = transactions.idempotent(graph, create)
+        if status == 201 and not replayed:
+            feed.push(followers, body['created_at'], post_id)
+        return transactions.respond(body, status, replayed)
+    except transactions.InvalidIdempotencyKey as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error creating post for user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -166,13 +316,14 @@ def update_post(post_id):
 
     query = f"""
     MATCH (p:Post {{id: $id}})
-    SET {', '.join(set_clauses)}
+    SET {', '.join(set_clauses)}, p.rev = coalesce(p.rev, 0) + 1
     RETURN p
     """
     try:
-        result = graph.run(query, params).data()
+        result = transactions.run_write(graph, query, params)
         if result:
             post_node = result[0]['p']
+            cache.invalidate(cache.post_key(post_id))
             return jsonify(post_node_to_dict(post_node)), 200
         else:
             return jsonify({"error": "Post not found"}), 404
@@ -182,30 +333,14 @@ def update_post(post_id):
 
 @posts_bp.route('/posts/<string:post_id>', methods=['DELETE'])
 def delete_post(post_id):
-    """Supprime un post par son ID."""
+    """
+    Supprime un post avec ses commentaires et leurs likes, par lots (voir app/deletion.py) :
+    202 et job en arrière-plan, ou 200 sans CASCADE_DELETE_ASYNC.
+    """
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
-
-    # Vérifier si le post existe
-    check_query = "MATCH (p:Post {id: $id}) RETURN count(p) as count"
-    count_result = graph.run(check_query, id=post_id).data()
-    if count_result[0]['count'] == 0:
-        return jsonify({"error": "Post not found"}), 404
-
-    # Supprimer le post et ses relations (CREATED, LIKES, HAS_COMMENT)
-    # Aussi supprimer les commentaires liés et leurs relations LIKES
-    query = """
-    MATCH (p:Post {id: $id})
-    // Optionnel : trouver et supprimer les commentaires liés et leurs likes
-    OPTIONAL MATCH (p)-[:HAS_COMMENT]->(c:Comment)
-    OPTIONAL MATCH (c)<-[cl:LIKES]-(:User)
-    DETACH DELETE c, cl
-    // Supprimer le post et ses propres relations (CREATED, LIKES)
-    DETACH DELETE p
-    """
     try:
-        graph.run(query, id=post_id)
-        return jsonify({"message": "Post and associated comments deleted successfully"}), 200
+        return deletion.delete(graph, "post", post_id)
     except Exception as e:
         print(f"Error deleting post {post_id}: {e}")
         return jsonify({"error": "An unexpected error occurred while deleting post"}), 500
@@ -218,29 +353,30 @@ def like_post(post_id):
     user_id = get_user_id_from_request()
     if not user_id:
         return jsonify({"error": "Missing 'user_id' in request body"}), 400
+    # Mode différé (LIKES_WRITE_BEHIND) : 202 sans attendre Neo4j, écriture par lots (voir app/writebehind.py)
+    if writebehind.get_likes() is not None:
+        return writebehind.accept_like(user_id, True, post_id=post_id)
 
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
     query = """
-    MATCH (u:User {id: $user_id})
-    MATCH (p:Post {id: $post_id})
-    // MERGE évite de créer un doublon de la relation LIKES
-    MERGE (u)-[r:LIKES]->(p)
-    RETURN count(r) > 0 as liked // Pour savoir si MERGE a créé ou trouvé
+    OPTIONAL MATCH (u:User {id: $user_id})
+    OPTIONAL MATCH (p:Post {id: $post_id})
+    // MERGE évite de créer un doublon de la relation LIKES ; rien n'est créé si une entité manque
+    // et le compteur n'augmente que si le like est nouveau
+    FOREACH (_ IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (u)-[:LIKES]->(p)
+        ON CREATE SET p.like_count = coalesce(p.like_count, 0) + 1, p.rev = coalesce(p.rev, 0) + 1
+    )
+    RETURN u IS NOT NULL as user_found, p IS NOT NULL as post_found
     """
     try:
-        result = graph.run(query, user_id=user_id, post_id=post_id).data()
-        if result: # Si les MATCH ont réussi
-             # liked = result[0]['liked'] # Indique si la relation existait déjà ou vient d'être créée
-            return jsonify({"message": f"User {user_id} liked post {post_id}"}), 201 # Ou 200 si existait déjà
-        else:
-             # Vérifier quelle entité manque
-            check_u = graph.evaluate("MATCH (n:User {id: $id}) RETURN count(n)>0", id=user_id)
-            check_p = graph.evaluate("MATCH (n:Post {id: $id}) RETURN count(n)>0", id=post_id)
-            if not check_u: return jsonify({"error": f"User {user_id} not found"}), 404
-            if not check_p: return jsonify({"error": f"Post {post_id} not found"}), 404
-            return jsonify({"error": "Failed to like post"}), 500 # Autre erreur
+        result = transactions.run_write(graph, query, user_id=user_id, post_id=post_id)
+        if not result[0]['user_found']: return jsonify({"error": f"User {user_id} not found"}), 404
+        if not result[0]['post_found']: return jsonify({"error": f"Post {post_id} not found"}), 404
+        cache.invalidate(cache.post_key(post_id))
+        return jsonify({"message": f"User {user_id} liked post {post_id}"}), 201 # Ou 200 si existait déjà
     except Exception as e:
         print(f"Error liking post {post_id} by user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -251,32 +387,33 @@ def unlike_post(post_id):
     user_id = get_user_id_from_request()
     if not user_id:
         return jsonify({"error": "Missing 'user_id' in request body"}), 400
+    # Mode différé (LIKES_WRITE_BEHIND) : 202 sans attendre Neo4j, écriture par lots (voir app/writebehind.py)
+    if writebehind.get_likes() is not None:
+        return writebehind.accept_like(user_id, False, post_id=post_id)
 
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
+    # Suppression et diagnostic (entité manquante ou like inexistant) en une seule requête
     query = """
-    MATCH (u:User {id: $user_id})-[r:LIKES]->(p:Post {id: $post_id})
+    OPTIONAL MATCH (u:User {id: $user_id})
+    OPTIONAL MATCH (p:Post {id: $post_id})
+    OPTIONAL MATCH (u)-[r:LIKES]->(p)
     DELETE r
-    RETURN count(r) as deleted_count // Pour vérifier
+    WITH u, p, count(r) as deleted_count
+    FOREACH (post IN CASE WHEN deleted_count > 0 THEN [p] ELSE [] END |
+        SET post.like_count = coalesce(post.like_count, 0) - deleted_count, post.rev = coalesce(post.rev, 0) + 1
+    )
+    RETURN u IS NOT NULL AND p IS NOT NULL as found, deleted_count
     """
     try:
-        result = graph.run(query, user_id=user_id, post_id=post_id).data()
-        if result and result[0]['deleted_count'] > 0:
-            return jsonify({"message": f"User {user_id} unliked post {post_id}"}), 200
-        else:
-            # Vérifier si les entités existent mais la relation n'existe pas
-            check_query = """
-            MATCH (u:User {id: $user_id}), (p:Post {id: $post_id})
-            RETURN exists((u)-[:LIKES]->(p)) as liked
-            """
-            check_result = graph.run(check_query, user_id=user_id, post_id=post_id).data()
-            if not check_result:
-                return jsonify({"error": "User or Post not found"}), 404
-            elif not check_result[0]['liked']:
-                return jsonify({"error": "Like relationship does not exist"}), 404
-            else:
-                return jsonify({"error": "Failed to unlike post"}), 500
+        result = transactions.run_write(graph, query, user_id=user_id, post_id=post_id)
+        if not result[0]['found']:
+            return jsonify({"error": "User or Post not found"}), 404
+        if result[0]['deleted_count'] == 0:
+            return jsonify({"error": "Like relationship does not exist"}), 404
+        cache.invalidate(cache.post_key(post_id))
+        return jsonify({"message": f"User {user_id} unliked post {post_id}"}), 200
     except Exception as e:
         print(f"Error unliking post {post_id} by user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
\ No newline at end of file
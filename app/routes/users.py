@@ -1,7 +1,10 @@
 # app/routes/users.py
 import uuid
-from flask import Blueprint, request, jsonify
-from app.database import get_db
+from flask import Blueprint, current_app, request, jsonify
+from app.database import get_db, split_optional_rows
+from app.pagination import InvalidPageParams, get_page_params, paginate, set_next_page
+from app.routes.posts import post_node_to_dict, post_record_to_dict
+from app import streaming, cache, deletion, etag, feed, paths, snapshot, transactions
 # Remplacer ConstraintError par une exception plus générale et/ou vérifier le code d'erreur
 from py2neo.errors import ClientError # Erreur probable pour les violations de contrainte
 from datetime import datetime
@@ -11,14 +14,39 @@ users_bp = Blueprint('users', __name__, url_prefix='/users')
 # Helper function to convert Node object to dictionary
 def user_node_to_dict(node):
     # Utiliser .get() pour éviter les erreurs si une propriété manque (peu probable ici)
+    created_at = node.get("created_at")
+    # Convertir le datetime Neo4j en string ISO si ce n'est pas déjà fait
+    if created_at and not isinstance(created_at, str):
+        created_at = created_at.isoformat()
     return {
         "id": node.get("id"),
         "name": node.get("name"),
         "email": node.get("email"),
-        # Convertir le datetime Neo4j en string ISO si ce n'est pas déjà fait
-        "created_at": datetime.now().timestamp(),
+        "created_at": created_at,
+        # Compteur dénormalisé tenu à jour par add_friend / remove_friend (voir app/counters.py)
+        "friendCount": node.get("friend_count") or 0,
     }
 
+# Helper: entrée de cache de GET /users/<id> (partagée avec /users:batchGet)
+def user_cache_entry(node):
+    return {'etag': etag.make_etag('user', node.get('id'), node.get('rev') or 0), 'data': user_node_to_dict(node)}
+
+# Suggestions dont le résultat change quand l'amitié u1 - u2 change : celles de u1 et u2, et
+# celles des amis de chacun, sauf pour un super-nœud (jamais utilisé comme intermédiaire)
+SUGGESTIONS_AFFECTED = """
+[u1.id, u2.id]
++ CASE WHEN coalesce(u1.friend_count, 0) <= $degree_cap THEN [(u1)-[:FRIENDS_WITH]->(f:User) | f.id] ELSE [] END
++ CASE WHEN coalesce(u2.friend_count, 0) <= $degree_cap THEN [(u2)-[:FRIENDS_WITH]->(f:User) | f.id] ELSE [] END
+"""
+
+# Helper: invalide l'utilisateur, les posts / commentaires qu'il a créés ou aimés et ses amis
+def invalidate_user(user_id, content_ids=(), friend_ids=()):
+    keys = [cache.user_key(user_id)] + [cache.user_key(friend_id) for friend_id in friend_ids]
+    for content_id in content_ids:
+        # Les ids sont des UUID : on ne sait pas s'il s'agit d'un post ou d'un commentaire
+        keys += [cache.post_key(content_id), cache.comment_key(content_id)]
+    cache.invalidate(*keys)
+
 @users_bp.route('', methods=['POST'])
 def create_user():
     """Crée un nouvel utilisateur."""
@@ -34,8 +62,7 @@ def create_user():
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
 
-    # Assurez-vous d'avoir créé la contrainte dans Neo4j !
-    # Exemple: CREATE CONSTRAINT unique_user_email IF NOT EXISTS FOR (u:User) REQUIRE u.email IS UNIQUE
+    # La contrainte d'unicité sur l'email (user_email_unique) est créée par app/schema.py
 
     query = """
     CREATE (u:User {
@@ -46,14 +73,21 @@ def create_user():
     })
     RETURN u
     """
-    try:
-        result = graph.run(query, id=user_id, name=name, email=email, created_at=created_at).data()
+    def create(tx):
+        result = tx.run(query, id=user_id, name=name, email=email, created_at=created_at).data()
         if result:
-            user_node = result[0]['u']
-            return jsonify(user_node_to_dict(user_node)), 201
-        else:
-            # Ne devrait pas arriver si la query est correcte et la DB fonctionne
-            return jsonify({"error": "Failed to create user, no result returned"}), 500
+            return user_node_to_dict(result[0]['u']), 201
+        # Ne devrait pas arriver si la query est correcte et la DB fonctionne
+        return {"error": "Failed to create user, no result returned"}, 500
+
+    try:
+        # Avec un en-tête Idempotency-Key, un renvoi de la requête rend le même utilisateur (voir app/transactions.py)
+        body, status, replayed = transactions.idempotent(graph, create)
+        if status == 201 and not replayed:
+            snapshot.user_added(user_id)
+        return transactions.respond(body, status, replayed)
+    except transactions.InvalidIdempotencyKey as e:
+        return jsonify({"error": str(e)}), 400
     except ClientError as e:
          # Vérifier si l'erreur est une violation de contrainte
          error_code = getattr(e, 'code', '') # Obtenir le code d'erreur Neo4j
@@ -104,15 +138,23 @@ def update_user(user_id):
     if not set_clauses: # Si le JSON est vide après filtrage
         return jsonify({"error": "No valid fields provided for update"}), 400
 
+    # Le nom de l'auteur est recopié dans les posts / commentaires en cache : s'il change,
+    # la même requête renvoie leurs ids pour les invalider.
+    # Les révisions (ETag) de l'utilisateur, des listes d'amis qui l'affichent et des listes de
+    # commentaires des posts qu'il a commentés sont incrémentées dans la même requête.
+    created_ids = "[(u)-[:CREATED]->(x) | x.id]" if 'name' in data else "[]"
     query = f"""
     MATCH (u:User {{id: $id}})
-    SET {', '.join(set_clauses)}
-    RETURN u
+    SET {', '.join(set_clauses)}, u.rev = coalesce(u.rev, 0) + 1
+    FOREACH (f IN [(u)-[:FRIENDS_WITH]->(f:User) | f] | SET f.friends_rev = coalesce(f.friends_rev, 0) + 1)
+    FOREACH (p IN [(u)-[:CREATED]->(:Comment)<-[:HAS_COMMENT]-(p:Post) | p] | SET p.comments_rev = coalesce(p.comments_rev, 0) + 1)
+    RETURN u, {created_ids} as created_ids
     """
     try:
-        result = graph.run(query, params).data()
+        result = transactions.run_write(graph, query, params)
         if result:
             user_node = result[0]['u']
+            invalidate_user(user_id, result[0]['created_ids'])
             return jsonify(user_node_to_dict(user_node)), 200
         else:
             # Le MATCH a échoué, l'utilisateur n'existe pas
@@ -139,17 +181,51 @@ def update_user(user_id):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
 # --- Les autres routes (GET, DELETE, Friends) restent inchangées ---
-# GET /users (inchangé)
+# GET /users (paginé par curseur sur name + id)
 @users_bp.route('', methods=['GET'])
 def get_users():
-    """Récupère la liste de tous les utilisateurs."""
+    """Récupère une page d'utilisateurs triés par nom (paramètres `limit` et `cursor`)."""
+    try:
+        limit, after = get_page_params()
+    except InvalidPageParams as e:
+        return jsonify({"error": str(e)}), 400
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
-    query = "MATCH (u:User) RETURN u ORDER BY u.name"
+
+    stream = streaming.requested_mode()
+    params = {'limit': limit + 1}
+    # La borne ">=" sur name permet un parcours de l'index user_name à partir du curseur
+    keyset = "WHERE u.name >= $after_name AND (u.name > $after_name OR u.id > $after_id)"
+    where = ""
+    if after is not None:
+        where = keyset
+        params['after_name'], params['after_id'] = after
+
+    def page_query(where):
+        return f"""
+        MATCH (u:User)
+        {where}
+        RETURN u ORDER BY u.name, u.id
+        LIMIT $limit
+        """
+
+    def fetch_page(page_after, page_limit):
+        """Page du mode flux (voir streaming.stream_pages)."""
+        page_params = {'limit': page_limit}
+        if page_after is not None:
+            page_params['after_name'], page_params['after_id'] = page_after
+        return graph.run(page_query(keyset if page_after is not None else ""), page_params).data()
+
+    query = page_query(where)
     try:
-        results = graph.run(query).data()
-        users = [user_node_to_dict(record['u']) for record in results]
-        return jsonify(users), 200
+        if stream:
+            return streaming.stream_pages(fetch_page, lambda r: (r['u'].get('name'), r['u'].get('id')),
+                                          lambda r: user_node_to_dict(r['u']), stream, after)
+        results = graph.run(query, params).data()
+        page, next_cursor = paginate(results, limit, lambda r: (r['u'].get('name'), r['u'].get('id')))
+        users = [user_node_to_dict(record['u']) for record in page]
+        return set_next_page(jsonify(users), next_cursor, limit), 200
     except Exception as e:
         print(f"Error fetching users: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -157,35 +233,41 @@ def get_users():
 # GET /users/<id> (inchangé)
 @users_bp.route('/<string:user_id>', methods=['GET'])
 def get_user_by_id(user_id):
-    """Récupère un utilisateur par son ID."""
+    """Récupère un utilisateur par son ID (cache, voir app/cache.py, et ETag, voir app/etag.py)."""
+    cached = cache.get(cache.user_key(user_id))
+    if cached is not None:
+        return etag.cached_response(cached)
+
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
     query = "MATCH (u:User {id: $id}) RETURN u"
     try:
+        not_modified = etag.precondition(graph, "MATCH (u:User {id: $id}) RETURN coalesce(u.rev, 0)",
+                                         ('user', user_id), id=user_id)
+        if not_modified: return not_modified
+
         result = graph.run(query, id=user_id).data()
         if result:
-            user_node = result[0]['u']
-            return jsonify(user_node_to_dict(user_node)), 200
+            entry = user_cache_entry(result[0]['u'])
+            cache.set(cache.user_key(user_id), entry)
+            return etag.cached_response(entry)
         else:
             return jsonify({"error": "User not found"}), 404
     except Exception as e:
         print(f"Error fetching user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
-# DELETE /users/<id> (inchangé)
+# DELETE /users/<id>
 @users_bp.route('/<string:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    """Supprime un utilisateur par son ID."""
+    """
+    Supprime un utilisateur avec ses posts, ses commentaires, ses likes et ses amitiés, par lots
+    (voir app/deletion.py) : 202 et job en arrière-plan, ou 200 sans CASCADE_DELETE_ASYNC.
+    """
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
-    check_query = "MATCH (u:User {id: $id}) RETURN count(u) as count"
-    count_result = graph.run(check_query, id=user_id).data()
-    if count_result[0]['count'] == 0:
-        return jsonify({"error": "User not found"}), 404
-    query = "MATCH (u:User {id: $id}) DETACH DELETE u"
     try:
-        graph.run(query, id=user_id)
-        return jsonify({"message": "User deleted successfully"}), 200
+        return deletion.delete(graph, "user", user_id)
     except Exception as e:
         print(f"Error deleting user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred while deleting user"}), 500
@@ -195,19 +277,29 @@ def delete_user(user_id):
 def get_user_friends(user_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
+    # La révision de la liste (friends_rev) sert d'ETag ; un utilisateur inconnu donne une liste vide
     query = """
-    MATCH (u:User {id: $id})-[:FRIENDS_WITH]->(friend:User)
-    RETURN friend
+    MATCH (u:User {id: $id})
+    OPTIONAL MATCH (u)-[:FRIENDS_WITH]->(friend:User)
+    RETURN coalesce(u.friends_rev, 0) as version, friend
     """
     try:
-        results = graph.run(query, id=user_id).data()
-        friends = [user_node_to_dict(record['friend']) for record in results]
-        return jsonify(friends), 200
+        not_modified = etag.precondition(graph, "MATCH (u:User {id: $id}) RETURN coalesce(u.friends_rev, 0)",
+                                         ('user-friends', user_id), id=user_id)
+        if not_modified: return not_modified
+
+        first, records = split_optional_rows(graph.run(query, id=user_id), 'friend')
+        tag = etag.make_etag('user-friends', user_id, first['version']) if first else None
+        stream = streaming.requested_mode()
+        if stream:
+            return etag.set_etag(streaming.stream_records(records, lambda r: user_node_to_dict(r['friend']), stream), tag)
+        friends = [user_node_to_dict(record['friend']) for record in records]
+        return etag.set_etag(jsonify(friends), tag), 200
     except Exception as e:
         print(f"Error fetching friends for user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
-# POST /users/<id>/friends (inchangé)
+# POST /users/<id>/friends
 @users_bp.route('/<string:user_id>/friends', methods=['POST'])
 def add_friend(user_id):
     data = request.get_json()
@@ -218,62 +310,81 @@ def add_friend(user_id):
         return jsonify({"error": "User cannot be friends with themselves"}), 400
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
+    # OPTIONAL MATCH + FOREACH : les relations ne sont créées que si les deux utilisateurs existent,
+    # et la requête renvoie toujours une ligne indiquant lequel manque.
+    # friend_count n'augmente que pour une relation réellement créée (ON CREATE) ; les listes
+    # d'amis qui affichent u1 ou u2 (dont la leur) changent : leurs révisions sont incrémentées.
     query = """
-    MATCH (u1:User {id: $user_id})
-    MATCH (u2:User {id: $friend_id})
-    MERGE (u1)-[r1:FRIENDS_WITH]->(u2)
-    MERGE (u2)-[r2:FRIENDS_WITH]->(u1)
-    RETURN count(u1) > 0 as u1_found, count(u2) > 0 as u2_found
+    OPTIONAL MATCH (u1:User {id: $user_id})
+    OPTIONAL MATCH (u2:User {id: $friend_id})
+    FOREACH (_ IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL THEN [1] ELSE [] END |
+        MERGE (u1)-[:FRIENDS_WITH]->(u2)
+        ON CREATE SET u1.friend_count = coalesce(u1.friend_count, 0) + 1, u1.rev = coalesce(u1.rev, 0) + 1
+        MERGE (u2)-[:FRIENDS_WITH]->(u1)
+        ON CREATE SET u2.friend_count = coalesce(u2.friend_count, 0) + 1, u2.rev = coalesce(u2.rev, 0) + 1
+    )
+    WITH u1, u2
+    FOREACH (f IN CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL
+                       THEN [(u1)-[:FRIENDS_WITH]->(f:User) | f] + [(u2)-[:FRIENDS_WITH]->(f:User) | f] ELSE [] END |
+        SET f.friends_rev = coalesce(f.friends_rev, 0) + 1
+    )
+    RETURN u1 IS NOT NULL as u1_found, u2 IS NOT NULL as u2_found,
+           CASE WHEN u1 IS NOT NULL AND u2 IS NOT NULL THEN """ + SUGGESTIONS_AFFECTED + """ ELSE [] END as affected_ids
     """
     try:
-        result = graph.run(query, user_id=user_id, friend_id=friend_id).data()
-        if result and result[0]['u1_found'] and result[0]['u2_found']:
-             return jsonify({"message": f"User {user_id} and {friend_id} are now friends (or already were)"}), 201 # Ou 200
-        else:
-            # Vérifier quel utilisateur manque si MERGE n'a rien retourné ou si les flags sont false
-            check_u1 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=user_id)
-            check_u2 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=friend_id)
-            if not check_u1: return jsonify({"error": f"User with id {user_id} not found"}), 404
-            if not check_u2: return jsonify({"error": f"User with id {friend_id} not found"}), 404
-            return jsonify({"error": "Failed to add friend relationship"}), 500 # Autre erreur
+        result = transactions.run_write(graph, query, user_id=user_id, friend_id=friend_id,
+                                        degree_cap=current_app.config['SUGGESTIONS_DEGREE_CAP'])
+        if not result[0]['u1_found']: return jsonify({"error": f"User with id {user_id} not found"}), 404
+        if not result[0]['u2_found']: return jsonify({"error": f"User with id {friend_id} not found"}), 404
+        cache.invalidate(cache.user_key(user_id), cache.user_key(friend_id),
+                         *[cache.suggestions_key(u) for u in result[0]['affected_ids']])
+        feed.drop(user_id, friend_id)
+        snapshot.friendship_added(user_id, friend_id)
+        return jsonify({"message": f"User {user_id} and {friend_id} are now friends (or already were)"}), 201 # Ou 200
     except Exception as e:
         print(f"Error adding friend for user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
-# DELETE /users/<id>/friends/<friend_id> (inchangé)
+# DELETE /users/<id>/friends/<friend_id>
 @users_bp.route('/<string:user_id>/friends/<string:friend_id>', methods=['DELETE'])
 def remove_friend(user_id, friend_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
+    # Suppression des deux sens de la relation et vérification des utilisateurs en une seule requête.
+    # Chaque utilisateur perd une unité de friend_count par relation sortante supprimée ; les listes
+    # d'amis qui les affichent (relevées avant la suppression) changent de révision.
     query = """
-    MATCH (u1:User {id: $user_id})-[r1:FRIENDS_WITH]->(u2:User {id: $friend_id})
-    MATCH (u2)-[r2:FRIENDS_WITH]->(u1) // S'assurer que u2 existe aussi
-    DELETE r1, r2
-    RETURN count(u1) // Simple check que u1 a été trouvé
+    OPTIONAL MATCH (u1:User {id: $user_id})
+    OPTIONAL MATCH (u2:User {id: $friend_id})
+    OPTIONAL MATCH (u1)-[r:FRIENDS_WITH]-(u2)
+    WITH u1, u2, collect(r) as rels
+    WITH u1, u2, rels, size([rel IN rels WHERE startNode(rel) = u1]) as removed1,
+         size([rel IN rels WHERE startNode(rel) = u2]) as removed2
+    FOREACH (f IN CASE WHEN size(rels) > 0
+                       THEN [(u1)-[:FRIENDS_WITH]->(f:User) | f] + [(u2)-[:FRIENDS_WITH]->(f:User) | f] ELSE [] END |
+        SET f.friends_rev = coalesce(f.friends_rev, 0) + 1
+    )
+    WITH u1, u2, rels, removed1, removed2,
+         CASE WHEN size(rels) > 0 THEN """ + SUGGESTIONS_AFFECTED + """ ELSE [] END as affected_ids
+    FOREACH (rel IN rels | DELETE rel)
+    FOREACH (_ IN CASE WHEN size(rels) > 0 THEN [1] ELSE [] END |
+        SET u1.friend_count = coalesce(u1.friend_count, 0) - removed1, u1.rev = coalesce(u1.rev, 0) + 1,
+            u2.friend_count = coalesce(u2.friend_count, 0) - removed2, u2.rev = coalesce(u2.rev, 0) + 1
+    )
+    RETURN u1 IS NOT NULL as u1_found, u2 IS NOT NULL as u2_found, size(rels) as removed, affected_ids
     """
     try:
-        result = graph.run(query, user_id=user_id, friend_id=friend_id).data()
-        if result : # Si la requête s'exécute et supprime (ou tente de supprimer)
-            # Il faut vérifier si la relation existait vraiment
-             check_query = "RETURN exists( (:User {id:$user_id})-[:FRIENDS_WITH]-(:User {id:$friend_id}) )"
-             was_friend = graph.evaluate(check_query, user_id=user_id, friend_id=friend_id)
-             # Si le résultat de DELETE est non vide, la suppression a eu lieu ou aurait eu lieu
-             # Si was_friend était true avant, c'est un succès 200
-             # Si was_friend était false, on peut retourner un message indiquant qu'ils n'étaient pas amis (ou 404)
-             # Le plus simple est de retourner 200 si la requête DELETE ne lève pas d'erreur et que les noeuds existent.
-             # Si la relation n'existait pas, DELETE ne fait rien mais ne lève pas d'erreur si les noeuds sont trouvés.
-
-             # Vérifions l'existence des noeuds au cas où MATCH échouerait silencieusement
-             check_u1 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=user_id)
-             check_u2 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=friend_id)
-             if not check_u1 or not check_u2:
-                 return jsonify({"error": "One or both users not found"}), 404
-
-             return jsonify({"message": f"Friendship between {user_id} and {friend_id} removed (if existed)"}), 200
-
-        else: # Si le MATCH initial échoue (un des users n'existe pas)
-             return jsonify({"error": "One or both users not found"}), 404
-
+        result = transactions.run_write(graph, query, user_id=user_id, friend_id=friend_id,
+                                        degree_cap=current_app.config['SUGGESTIONS_DEGREE_CAP'])
+        if not result[0]['u1_found'] or not result[0]['u2_found']:
+            return jsonify({"error": "One or both users not found"}), 404
+        if result[0]['removed']:
+            cache.invalidate(cache.user_key(user_id), cache.user_key(friend_id),
+                             *[cache.suggestions_key(u) for u in result[0]['affected_ids']])
+            feed.drop(user_id, friend_id)
+            snapshot.friendship_removed(user_id, friend_id)
+        # Si la relation n'existait pas, on répond quand même 200 (suppression idempotente)
+        return jsonify({"message": f"Friendship between {user_id} and {friend_id} removed (if existed)"}), 200
     except Exception as e:
         print(f"Error removing friend for user {user_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
@@ -297,27 +408,151 @@ def check_friendship(user_id, friend_id):
         print(f"Error checking friendship between {user_id} and {friend_id}: {e}")
         return jsonify({"error": "An unexpected error occurred"}), 500
 
-# GET /users/<id>/mutual_friends/<other_id> (inchangé)
+# GET /users/<id>/feed
+@users_bp.route('/<string:user_id>/feed', methods=['GET'])
+def get_user_feed(user_id):
+    """Posts des amis, du plus récent au plus ancien (paramètres `limit` et `cursor`, voir app/feed.py)."""
+    try:
+        limit, after = get_page_params()
+    except InvalidPageParams as e:
+        return jsonify({"error": str(e)}), 400
+
+    graph = get_db()
+    if not graph: return jsonify({"error": "Database connection failed"}), 500
+    try:
+        records = feed.read_page(graph, user_id, limit + 1, after)
+        if records is None:
+            return jsonify({"error": "User not found"}), 404
+        page, next_cursor = paginate(records, limit, lambda r: (post_node_to_dict(r['p'])['created_at'], r['p'].get('id')))
+        posts = [post_record_to_dict(record) for record in page]
+        return set_next_page(jsonify(posts), next_cursor, limit), 200
+    except Exception as e:
+        print(f"Error fetching feed for user {user_id}: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+# GET /users/<id>/suggestions
+@users_bp.route('/<string:user_id>/suggestions', methods=['GET'])
+def get_friend_suggestions(user_id):
+    """
+    Amis d'amis classés par nombre d'amis communs (paramètre `limit`).
+    Un seul parcours borné : au plus SUGGESTIONS_MAX_FRIENDS amis, et aucun super-nœud
+    (plus de SUGGESTIONS_DEGREE_CAP amis) comme intermédiaire. Le résultat est mis en cache
+    par utilisateur et invalidé par add_friend / remove_friend.
+    """
+    config = current_app.config
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    if limit < 1 or limit > config['SUGGESTIONS_MAX']:
+        return jsonify({"error": f"'limit' must be between 1 and {config['SUGGESTIONS_MAX']}"}), 400
+
+    cached = cache.get(cache.suggestions_key(user_id))
+    if cached is not None:
+        return jsonify(cached[:limit]), 200
+
+    graph = get_db()
+    if not graph: return jsonify({"error": "Database connection failed"}), 500
+    # UNWIND [null] si aucun ami : la requête renvoie toujours au moins une ligne (indicateur found)
+    query = """
+    OPTIONAL MATCH (me:User {id: $id})
+    OPTIONAL MATCH (me)-[:FRIENDS_WITH]->(f:User)
+    WHERE coalesce(f.friend_count, 0) <= $degree_cap
+    WITH me, collect(f)[..$max_friends] AS friends
+    UNWIND CASE WHEN size(friends) = 0 THEN [null] ELSE friends END AS f
+    OPTIONAL MATCH (f)-[:FRIENDS_WITH]->(s:User)
+    WHERE s <> me AND NOT (me)-[:FRIENDS_WITH]->(s)
+    WITH me, s, count(DISTINCT f) AS mutual
+    ORDER BY s IS NULL, mutual DESC, s.id
+    LIMIT $max
+    RETURN me IS NOT NULL AS found, s, mutual
+    """
+    try:
+        rows = graph.run(query, id=user_id, degree_cap=config['SUGGESTIONS_DEGREE_CAP'],
+                         max_friends=config['SUGGESTIONS_MAX_FRIENDS'], max=config['SUGGESTIONS_MAX']).data()
+        if not rows or not rows[0]['found']:
+            return jsonify({"error": "User not found"}), 404
+        suggestions = [dict(user_node_to_dict(r['s']), mutual_friends=r['mutual']) for r in rows if r['s'] is not None]
+        cache.set(cache.suggestions_key(user_id), suggestions)
+        return jsonify(suggestions[:limit]), 200
+    except Exception as e:
+        print(f"Error fetching suggestions for user {user_id}: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+# GET /users/<id>/path/<other_id>
+@users_bp.route('/<string:user_id>/path/<string:other_user_id>', methods=['GET'])
+def get_friendship_path(user_id, other_user_id):
+    """
+    Plus court chemin d'amitié entre deux utilisateurs (voir app/paths.py).
+    Paramètres : `max_depth` (défaut et maximum PATH_MAX_DEPTH), `source` (snapshot | bfs | cypher)
+    et `include=users` pour renvoyer les utilisateurs du chemin en plus de leurs ids.
+    """
+    config = current_app.config
+    try:
+        max_depth = int(request.args.get('max_depth', config['PATH_MAX_DEPTH']))
+    except ValueError:
+        return jsonify({"error": "'max_depth' must be an integer"}), 400
+    if max_depth < 1 or max_depth > config['PATH_MAX_DEPTH']:
+        return jsonify({"error": f"'max_depth' must be between 1 and {config['PATH_MAX_DEPTH']}"}), 400
+    source = request.args.get('source')
+    if source not in (None, 'snapshot', 'bfs', 'cypher'):
+        return jsonify({"error": "'source' must be one of snapshot, bfs, cypher"}), 400
+
+    friends = snapshot.get_snapshot()
+    if source == 'snapshot' and friends is None:
+        return jsonify({"error": "Friend snapshot is not available"}), 503
+    # Le snapshot répond sans connexion Neo4j ; la base n'est réservée que si nécessaire
+    needs_db = friends is None or source in ('bfs', 'cypher') or request.args.get('include') == 'users' \
+        or user_id not in friends.index or other_user_id not in friends.index
+    graph = get_db() if needs_db else None
+    if needs_db and not graph: return jsonify({"error": "Database connection failed"}), 500
+    try:
+        result = paths.find_path(graph, friends, user_id, other_user_id, max_depth,
+                                 config['PATH_MAX_EXPANSIONS'], source)
+        if 'missing' in result:
+            return jsonify({"error": f"User(s) not found: {', '.join(result['missing'])}"}), 404
+        if result['path'] is None:
+            return jsonify({"error": f"No path within {max_depth} hops", "source": result['source'],
+                            "expanded": result['expanded']}), 404
+        response = {"length": len(result['path']) - 1, "path": result['path'],
+                    "source": result['source'], "expanded": result['expanded']}
+        if request.args.get('include') == 'users':
+            rows = graph.run("UNWIND $ids AS id MATCH (u:User {id: id}) RETURN u", ids=result['path']).data()
+            by_id = {row['u'].get('id'): user_node_to_dict(row['u']) for row in rows}
+            response['users'] = [by_id.get(u) for u in result['path']]
+        return jsonify(response), 200
+    except paths.PathBudgetExceeded as e:
+        return jsonify({"error": str(e), "expanded": e.expanded}), 422
+    except Exception as e:
+        print(f"Error finding path between {user_id} and {other_user_id}: {e}")
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+# GET /users/<id>/mutual_friends/<other_id>
 @users_bp.route('/<string:user_id>/mutual_friends/<string:other_user_id>', methods=['GET'])
 def get_mutual_friends(user_id, other_user_id):
     graph = get_db()
     if not graph: return jsonify({"error": "Database connection failed"}), 500
+    # Vérification des deux utilisateurs et lecture des amis communs dans la même requête :
+    # la première ligne porte toujours les indicateurs d'existence
     query = """
-    MATCH (u1:User {id: $user_id})-[:FRIENDS_WITH]->(mutual_friend:User)
-          <-[:FRIENDS_WITH]-(u2:User {id: $other_user_id})
+    OPTIONAL MATCH (u1:User {id: $user_id})
+    OPTIONAL MATCH (u2:User {id: $other_user_id})
+    OPTIONAL MATCH (u1)-[:FRIENDS_WITH]->(mutual_friend:User)<-[:FRIENDS_WITH]-(u2)
     WHERE u1 <> u2
-    RETURN mutual_friend
+    RETURN u1 IS NOT NULL as u1_found, u2 IS NOT NULL as u2_found, mutual_friend
     """
     try:
-        check_u1 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=user_id)
-        check_u2 = graph.evaluate("MATCH (u:User {id: $id}) RETURN count(u) > 0", id=other_user_id)
-        if not check_u1 or not check_u2:
-             missing = [u for u, exists in [(user_id, check_u1), (other_user_id, check_u2)] if not exists]
+        cursor = graph.run(query, user_id=user_id, other_user_id=other_user_id)
+        first, records = split_optional_rows(cursor, 'mutual_friend')
+        if not first['u1_found'] or not first['u2_found']:
+             missing = [u for u, exists in [(user_id, first['u1_found']), (other_user_id, first['u2_found'])] if not exists]
              return jsonify({"error": f"User(s) not found: {', '.join(missing)}"}), 404
 
-        results = graph.run(query, user_id=user_id, other_user_id=other_user_id).data()
-        mutual_friends = [user_node_to_dict(record['mutual_friend']) for record in results]
+        stream = streaming.requested_mode()
+        if stream:
+            return streaming.stream_records(records, lambda r: user_node_to_dict(r['mutual_friend']), stream)
+        mutual_friends = [user_node_to_dict(record['mutual_friend']) for record in records]
         return jsonify(mutual_friends), 200
     except Exception as e:
         print(f"Error fetching mutual friends for {user_id} and {other_user_id}: {e}")
-        return jsonify({"error": "An unexpected error occurred"}), 500
\ No newline at end of file
+        return jsonify({"error": "An unexpected error occurred"}), 500
@@ -0,0 +1,127 @@
+# app/schema.py
+"""
+Schéma Neo4j (contraintes et index) requis par l'application.
+
+Presque toutes les routes font un MATCH sur {id: $id} : sans contrainte d'unicité (qui crée
+aussi l'index), chaque recherche parcourt tout le label. Les routes de liste trient sur
+created_at / name et paginent par curseur (app/pagination.py) : sans index de tri, chaque
+page relirait tout le label. Toutes les instructions utilisent IF NOT EXISTS et peuvent
+donc être rejouées sans risque (au démarrage ou via `flask schema apply`).
+"""
+import click
+from flask import current_app, jsonify
+from app.database import get_pool
+
+# (nom, label, propriété) — contraintes d'unicité (chacune est adossée à un index)
+CONSTRAINTS = [
+    ("user_id_unique", "User", "id"),
+    ("user_email_unique", "User", "email"),
+    ("post_id_unique", "Post", "id"),
+    ("comment_id_unique", "Comment", "id"),
+    ("deletion_job_id_unique", "DeletionJob", "id"),
+    ("deletion_job_target_unique", "DeletionJob", "target"),
+    ("idempotency_key_unique", "IdempotencyKey", "key"),
+    ("replication_marker_id_unique", "ReplicationMarker", "id"),
+]
+
+# (nom, label, propriété) — index "range" utilisés par les ORDER BY / WHERE des curseurs
+INDEXES = [
+    ("user_name", "User", "name"),
+    ("post_created_at", "Post", "created_at"),
+    ("comment_created_at", "Comment", "created_at"),
+    ("deletion_job_status", "DeletionJob", "status"),
+    ("idempotency_key_expires_at", "IdempotencyKey", "expires_at"),
+]
+
+def apply_schema(graph):
+    """
+    Crée les contraintes et index manquants.
+    Retourne la liste des éléments en échec (ex: doublons d'email empêchant la contrainte)
+    sous forme de tuples (nom, message) ; les autres éléments sont tout de même créés.
+    """
+    statements = [
+        (name, f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+        for name, label, prop in CONSTRAINTS
+    ] + [
+        (name, f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})")
+        for name, label, prop in INDEXES
+    ]
+    failures = []
+    for name, statement in statements:
+        try:
+            graph.run(statement)
+        except Exception as e:
+            failures.append((name, str(e)))
+    return failures
+
+def schema_status(graph):
+    """
+    Retourne l'état de chaque contrainte / index attendu :
+    {"name", "kind", "label", "property", "present", "state", "population_percent"}.
+    """
+    constraints = {r['name'] for r in graph.run("SHOW CONSTRAINTS YIELD name RETURN name").data()}
+    indexes = {
+        r['name']: r for r in graph.run(
+            "SHOW INDEXES YIELD name, state, populationPercent "
+            "RETURN name, state, populationPercent").data()
+    }
+    report = []
+    for kind, items in (("constraint", CONSTRAINTS), ("index", INDEXES)):
+        for name, label, prop in items:
+            present = name in (constraints if kind == "constraint" else indexes)
+            # L'index qui porte une contrainte a le nom de la contrainte
+            index = indexes.get(name, {})
+            report.append({
+                "name": name,
+                "kind": kind,
+                "label": label,
+                "property": prop,
+                "present": present,
+                "state": index.get('state'),
+                "population_percent": index.get('populationPercent'),
+            })
+    return report
+
+def bootstrap(app):
+    """Applique le schéma au démarrage ; une base indisponible ne doit pas empêcher l'app de démarrer."""
+    try:
+        failures = apply_schema(get_pool(app).graph)
+    except Exception as e:
+        print(f"Schema bootstrap skipped, Neo4j unavailable: {e}")
+        return
+    for name, message in failures:
+        print(f"Schema bootstrap: could not create {name}: {message}")
+
+def init_app(app):
+    """Enregistre les commandes `flask schema ...`, la route /db/schema et le bootstrap éventuel."""
+    @app.cli.group('schema')
+    def schema_cli():
+        """Gestion des contraintes et index Neo4j."""
+
+    @schema_cli.command('apply')
+    def apply_command():
+        """Crée les contraintes et index manquants (idempotent)."""
+        failures = apply_schema(get_pool(current_app).graph)
+        for name, message in failures:
+            click.echo(f"FAILED {name}: {message}", err=True)
+        click.echo(f"{len(CONSTRAINTS) + len(INDEXES) - len(failures)} schema item(s) ensured.")
+        if failures:
+            raise SystemExit(1)
+
+    @schema_cli.command('status')
+    def status_command():
+        """Affiche l'état des contraintes et index attendus."""
+        for item in schema_status(get_pool(current_app).graph):
+            state = item['state'] or ('MISSING' if not item['present'] else '-')
+            click.echo(f"{item['kind']:<11} {item['name']:<22} {item['label']}.{item['property']:<12} {state}")
+
+    @app.route('/db/schema')
+    def db_schema_status():
+        try:
+            return jsonify(schema_status(get_pool().graph)), 200
+        except Exception as e:
+            print(f"Error fetching schema status: {e}")
+            return jsonify({"error": "An unexpected error occurred"}), 500
+
+    if app.config['NEO4J_SCHEMA_BOOTSTRAP']:
+        bootstrap(app)
@@ -0,0 +1,192 @@
+# app/slowlog.py
+"""
+Journal des requêtes Cypher lentes, alimenté par l'instrumentation de app/metrics.py
+(nécessite METRICS_ENABLED).
+
+Toute requête dont la durée (réponse de Neo4j + lecture des lignes) dépasse
+SLOW_QUERY_THRESHOLD secondes produit un enregistrement structuré, écrit sur la sortie
+standard en une ligne JSON et gardé dans les SLOW_QUERY_LOG_SIZE derniers (GET /metrics/slow-queries) :
+empreinte, route, durée, nombre de lignes, temps côté serveur, db hits du dernier PROFILE et
+paramètres masqués (les chaînes sont remplacées par leur longueur, les listes par leur taille).
+
+Avec SLOW_QUERY_PROFILE_SAMPLE > 0, cette fraction des requêtes lentes est rejouée par un
+thread de fond : sous PROFILE pour une lecture (plan avec db hits et lignes par opérateur),
+sous EXPLAIN pour une écriture (plan sans exécution). Le dernier plan de chaque empreinte est
+gardé ; un plan dont la forme change est signalé (`plan_changed`) et les opérateurs de parcours
+complet (AllNodesScan, NodeByLabelScan) sont relevés : signe habituel d'un index manquant.
+"""
+import hashlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from flask import current_app, jsonify
+from app.database import get_pool
+
+# Requêtes en attente de PROFILE au-delà desquelles les nouvelles sont ignorées
+PROFILE_QUEUE_SIZE = 100
+
+# Opérateurs qui lisent tous les nœuds (d'un label) au lieu d'un index
+SCAN_OPERATORS = ('AllNodesScan', 'NodeByLabelScan')
+
+_WRITE_CLAUSES = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+
+
+def redact(value):
+    """Paramètres sans données : nombres et booléens gardés (limites, tailles), le reste résumé."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, dict):
+        return {key: redact(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return f"<list:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+def is_write(query):
+    return _WRITE_CLAUSES.search(query) is not None
+
+def compact_plan(plan):
+    """Plan Bolt (EXPLAIN ou PROFILE) réduit à l'opérateur, ses détails, ses lignes et db hits."""
+    args = plan.get('args', {})
+    node = {"operator": plan.get('operatorType'), "details": args.get('Details'),
+            "estimated_rows": args.get('EstimatedRows')}
+    if 'dbHits' in plan:
+        node.update(rows=plan.get('rows'), db_hits=plan.get('dbHits'))
+    node["children"] = [compact_plan(child) for child in plan.get('children', [])]
+    return node
+
+def plan_operators(plan):
+    yield plan['operator']
+    for child in plan['children']:
+        yield from plan_operators(child)
+
+def plan_signature(plan):
+    """Forme du plan (arbre des opérateurs), indépendante des compteurs."""
+    shape = json.dumps([plan['operator'], plan['details'], [plan_signature(c) for c in plan['children']]])
+    return hashlib.sha1(shape.encode('utf-8')).hexdigest()[:12]
+
+def total_db_hits(plan):
+    return (plan.get('db_hits') or 0) + sum(total_db_hits(child) for child in plan['children'])
+
+
+class SlowQueryLog:
+    def __init__(self, app, threshold, profile_sample=0.0, size=100):
+        self.app = app
+        self.threshold = threshold
+        self.profile_sample = profile_sample
+        self.records = deque(maxlen=size)
+        self.plans = {}
+        self.slow_queries = 0
+        self.profiled = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=PROFILE_QUEUE_SIZE)
+        self._thread = None
+
+    def check(self, fingerprint, query, parameters, elapsed, rows, route=None, summary=None):
+        """Appelé pour chaque requête terminée ; ne fait rien sous le seuil."""
+        if elapsed < self.threshold:
+            return
+        record = {
+            "event": "slow_query",
+            "at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "query": fingerprint,
+            "route": route,
+            "duration_ms": round(elapsed * 1000, 3),
+            "rows": rows,
+            "parameters": redact(parameters),
+            # db hits du dernier PROFILE de cette empreinte (inconnus sans PROFILE)
+            "db_hits": self.plans[fingerprint]["db_hits"] if fingerprint in self.plans else None,
+        }
+        if summary:
+            # Temps mesurés par le serveur (ms) : jusqu'à la première ligne, puis jusqu'à la dernière
+            record.update(server_available_ms=summary.get('t_first'), server_consumed_ms=summary.get('t_last'))
+        print(json.dumps(record, default=str))
+        with self._lock:
+            self.slow_queries += 1
+            self.records.append(record)
+        if self.profile_sample > 0 and random.random() < self.profile_sample:
+            self._enqueue(fingerprint, query, parameters)
+
+    def _enqueue(self, fingerprint, query, parameters):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-query-profiler", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((fingerprint, query, parameters))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def profile(self, fingerprint, query, parameters):
+        """Rejoue la requête sous PROFILE (lecture) ou EXPLAIN (écriture) et garde son plan."""
+        mode = 'EXPLAIN' if is_write(query) else 'PROFILE'
+        pool = get_pool(self.app)
+        graph = pool.acquire()
+        try:
+            cursor = graph.run(f"{mode} {query}", parameters)
+            cursor.data()
+            raw = cursor.plan()
+        finally:
+            pool.release()
+        if raw is None:
+            return
+        plan = compact_plan(raw)
+        signature = plan_signature(plan)
+        entry = {
+            "query": fingerprint,
+            "mode": mode,
+            "profiled_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "signature": signature,
+            "db_hits": total_db_hits(plan) if mode == 'PROFILE' else None,
+            "scans": sorted({op for op in plan_operators(plan) if op and op.startswith(SCAN_OPERATORS)}),
+            "plan": plan,
+        }
+        with self._lock:
+            previous = self.plans.get(fingerprint)
+            entry["plan_changed"] = previous is not None and previous["signature"] != signature
+            entry["previous_signature"] = previous["signature"] if previous else None
+            self.plans[fingerprint] = entry
+            self.profiled += 1
+        print(json.dumps({"event": "query_plan", **{k: v for k, v in entry.items() if k != 'plan'}}))
+
+    def _run(self):
+        while True:
+            fingerprint, query, parameters = self._queue.get()
+            try:
+                self.profile(fingerprint, query, parameters)
+            except Exception as e:
+                print(f"Slow query profiling failed for {fingerprint}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_seconds": self.threshold,
+                "profile_sample": self.profile_sample,
+                "slow_queries": self.slow_queries,
+                "profiled": self.profiled,
+                "profiles_dropped": self.dropped,
+                "recent": list(self.records),
+                "plans": dict(self.plans),
+            }
+
+
+def init_app(app):
+    """Journal des requêtes lentes (SLOW_QUERY_THRESHOLD >= 0), branché sur app/metrics.py."""
+    registry = app.extensions.get('metrics')
+    if registry is None or app.config['SLOW_QUERY_THRESHOLD'] < 0:
+        return
+    registry.slow_log = SlowQueryLog(app, app.config['SLOW_QUERY_THRESHOLD'],
+                                     profile_sample=app.config['SLOW_QUERY_PROFILE_SAMPLE'],
+                                     size=app.config['SLOW_QUERY_LOG_SIZE'])
+
+    # Dernières requêtes lentes et dernier plan PROFILE/EXPLAIN de chaque empreinte
+    @app.route('/metrics/slow-queries')
+    def slow_queries():
+        return jsonify(current_app.extensions['metrics'].slow_log.stats()), 200
@@ -0,0 +1,308 @@
+# app/snapshot.py
+"""
+Copie en mémoire du graphe d'amitié (FRIENDS_WITH), pour les parcours et les calculs globaux
+qui doivent répondre sans aller-retour Neo4j (plus court chemin, voir app/paths.py ;
+/analytics/*, voir app/analytics.py).
+
+Les ids des utilisateurs (UUID) sont remplacés par des entiers 0..n-1 et l'adjacence est
+stockée au format CSR dans deux tableaux `array` : `offsets` (n + 1 entrées) et `targets`
+(une entrée par relation, 4 octets) ; les voisins du nœud i sont targets[offsets[i]:offsets[i + 1]].
+
+Activée par FRIEND_SNAPSHOT_ENABLED : chaque processus charge sa copie dans un thread en
+arrière-plan au premier usage, puis la recharge entièrement toutes les FRIEND_SNAPSHOT_REFRESH
+secondes. Entre deux chargements, les routes d'écriture du processus signalent leurs
+modifications (user_added, user_removed, friendship_added, friendship_removed) : le même
+thread les regroupe toutes les FRIEND_SNAPSHOT_APPLY_INTERVAL secondes et reconstruit le CSR
+en mémoire, sans relire la base. Les écritures des autres processus ne sont visibles qu'au
+chargement complet suivant. Tant que la copie n'est pas prête, les routes passent par la base.
+"""
+import os
+import sys
+import threading
+import time
+from array import array
+from flask import current_app
+from app.database import get_pool
+
+# Événements d'écriture appliqués entre deux chargements complets
+USER_ADDED, USER_REMOVED, FRIENDSHIP_ADDED, FRIENDSHIP_REMOVED = "user+", "user-", "friend+", "friend-"
+# Au-delà, les événements en attente sont abandonnés au profit d'un chargement complet
+MAX_PENDING_EVENTS = 100000
+# Utilisateurs lus par requête au chargement complet (pagination keyset sur id)
+LOAD_BATCH_SIZE = 10000
+
+
+class FriendGraph:
+    """Adjacence CSR immuable du graphe d'amitié."""
+
+    def __init__(self, ids, offsets, targets, loaded_at=None, index=None):
+        self.ids = ids                      # entier -> id utilisateur (None : utilisateur supprimé depuis le chargement)
+        self.index = index if index is not None else {user_id: i for i, user_id in enumerate(ids)}
+        self.offsets = offsets              # array('i') ou array('q'), n + 1 entrées
+        self.targets = targets              # array('i'), une entrée par relation
+        self.loaded_at = loaded_at or time.time()
+        # Résultats des calculs globaux (app/analytics.py), valables pour cette copie seulement
+        self.results = {}
+
+    @property
+    def num_nodes(self):
+        """Utilisateurs présents (les entiers des utilisateurs supprimés restent réservés)."""
+        return len(self.index)
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def neighbors(self, node):
+        """Voisins (entiers) du nœud entier `node`."""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degree(self, node):
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def memory(self):
+        """Octets occupés par le CSR (par relation) et par la correspondance des ids."""
+        csr_bytes = self.offsets.itemsize * len(self.offsets) + self.targets.itemsize * len(self.targets)
+        id_map_bytes = sys.getsizeof(self.ids) + sys.getsizeof(self.index) + sum(
+            sys.getsizeof(user_id) for user_id in self.index)
+        return {"csr_bytes": csr_bytes, "id_map_bytes": id_map_bytes,
+                "bytes_per_edge": round(csr_bytes / max(1, self.num_edges), 2)}
+
+    def apply(self, events):
+        """
+        Nouvelle copie avec les événements appliqués dans l'ordre. Idempotent : une amitié déjà
+        présente ou un utilisateur déjà connu (écriture vue aussi par le chargement) sont ignorés.
+        """
+        ids, index = list(self.ids), dict(self.index)
+        added, removed, dropped = {}, set(), set()
+        for kind, *users in events:
+            if kind == USER_ADDED:
+                if users[0] not in index:
+                    index[users[0]] = len(ids)
+                    ids.append(users[0])
+            elif kind == USER_REMOVED:
+                node = index.pop(users[0], None)
+                if node is not None:
+                    ids[node] = None
+                    dropped.add(node)
+            elif users[0] in index and users[1] in index:
+                a, b = index[users[0]], index[users[1]]
+                for edge in ((a, b), (b, a)):
+                    if kind == FRIENDSHIP_ADDED:
+                        removed.discard(edge)
+                        added[edge] = None
+                    else:
+                        added.pop(edge, None)
+                        removed.add(edge)
+
+        sources, destinations = array('i'), array('i')
+        base_nodes = len(self.offsets) - 1
+        for node in range(base_nodes):
+            neighbors = self.neighbors(node)
+            if node in dropped:
+                continue
+            if not dropped and not removed:
+                sources.extend([node] * len(neighbors))
+                destinations.extend(neighbors)
+                continue
+            for other in neighbors:
+                if other not in dropped and (node, other) not in removed:
+                    sources.append(node)
+                    destinations.append(other)
+        for a, b in added:
+            exists = a < base_nodes and b in self.neighbors(a) and (a, b) not in removed
+            if not exists and a not in dropped and b not in dropped:
+                sources.append(a)
+                destinations.append(b)
+        offsets, targets = build_csr(len(ids), sources, destinations)
+        return FriendGraph(ids, offsets, targets, loaded_at=self.loaded_at, index=index)
+
+
+def build_csr(num_nodes, sources, destinations):
+    """Construit (offsets, targets) à partir de deux tableaux d'extrémités (tri par comptage)."""
+    # Décalages sur 4 octets tant que le nombre de relations le permet
+    typecode = 'i' if len(sources) < 2 ** 31 else 'q'
+    offsets = array(typecode, bytes(array(typecode).itemsize * (num_nodes + 1)))
+    for node in sources:
+        offsets[node + 1] += 1
+    for node in range(num_nodes):
+        offsets[node + 1] += offsets[node]
+    targets = array('i', bytes(4 * len(sources)))
+    cursor = array(typecode, offsets[:-1])
+    for node, other in zip(sources, destinations):
+        targets[cursor[node]] = other
+        cursor[node] += 1
+    return offsets, targets
+
+USER_IDS_BATCH = """
+MATCH (u:User) WHERE $after IS NULL OR u.id > $after
+RETURN u.id AS id ORDER BY u.id LIMIT $batch_size
+"""
+
+# Une ligne par utilisateur du lot : les amis d'un utilisateur ne sont jamais coupés entre deux lots
+FRIENDS_BATCH = """
+MATCH (a:User) WHERE $after IS NULL OR a.id > $after
+WITH a ORDER BY a.id LIMIT $batch_size
+RETURN a.id AS id, [(a)-[:FRIENDS_WITH]->(b:User) | b.id] AS friends
+"""
+
+def _batches(graph, query, batch_size):
+    """Lignes d'une requête paginée sur l'id (keyset), lot par lot."""
+    after = None
+    while True:
+        rows = graph.run(query, after=after, batch_size=batch_size).data()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = rows[-1]['id']
+
+def load_friend_graph(graph, batch_size=LOAD_BATCH_SIZE):
+    """
+    Lit tous les utilisateurs puis toutes les relations FRIENDS_WITH par lots de `batch_size`
+    utilisateurs (py2neo lit le résultat entier d'une requête avant de le rendre) : en plus des
+    deux tableaux d'entiers du CSR en construction, seul un lot est gardé en objets Python.
+    """
+    ids = []
+    index = {}
+    for row in _batches(graph, USER_IDS_BATCH, batch_size):
+        index[row['id']] = len(ids)
+        ids.append(row['id'])
+    sources, destinations = array('i'), array('i')
+    for row in _batches(graph, FRIENDS_BATCH, batch_size):
+        a = index.get(row['id'])
+        # Un utilisateur créé entre les deux lectures est ignoré jusqu'au prochain chargement
+        if a is None:
+            continue
+        for b in row['friends']:
+            if b in index:
+                sources.append(a)
+                destinations.append(index[b])
+    offsets, targets = build_csr(len(ids), sources, destinations)
+    return FriendGraph(ids, offsets, targets)
+
+
+class SnapshotHolder:
+    """Snapshot courant du processus et thread qui le (re)charge et lui applique les écritures."""
+
+    def __init__(self, app, refresh_interval, apply_interval=1.0):
+        self.app = app
+        self.refresh_interval = refresh_interval
+        self.apply_interval = apply_interval
+        self.current = None
+        self.last_error = None
+        self.generation = 0                 # incrémentée à chaque nouvelle copie (chargement ou événements)
+        self.full_loads = 0
+        self.events_applied = 0
+        self._pending = []
+        self._reload = False
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def get(self):
+        """Snapshot prêt ou None ; démarre le chargement dans ce processus au premier appel."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Après un fork (gunicorn --preload) le thread du parent n'existe pas ici
+                    self._pid = os.getpid()
+                    self.current = None
+                    threading.Thread(target=self._run, name="friend-snapshot", daemon=True).start()
+        return self.current
+
+    def record(self, *event):
+        """Signale une écriture ; sans effet tant que le thread n'a pas démarré dans ce processus."""
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING_EVENTS:
+                self._pending = []
+                self._reload = True
+            else:
+                self._pending.append(event)
+        self._wake.set()
+
+    def refresh(self):
+        """Chargement complet depuis la base."""
+        # Les événements déjà signalés sont dans la base ; ceux qui arrivent pendant la lecture
+        # seront appliqués ensuite (sans effet s'ils y figuraient déjà)
+        with self._lock:
+            self._pending = []
+            self._reload = False
+        pool = get_pool(self.app)
+        graph = pool.acquire()
+        try:
+            snapshot = load_friend_graph(graph)
+        finally:
+            pool.release()
+        self.current = snapshot
+        self.generation += 1
+        self.full_loads += 1
+        self.last_error = None
+
+    def apply_pending(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+        if events and self.current is not None:
+            self.current = self.current.apply(events)
+            self.generation += 1
+            self.events_applied += len(events)
+
+    def stats(self):
+        snapshot = self.current
+        with self._lock:
+            pending = len(self._pending)
+        stats = {"ready": snapshot is not None, "generation": self.generation, "full_loads": self.full_loads,
+                 "events_applied": self.events_applied, "pending_events": pending,
+                 "refresh_interval": self.refresh_interval, "last_error": self.last_error}
+        if snapshot is not None:
+            stats.update(users=snapshot.num_nodes, friendships=snapshot.num_edges // 2,
+                         relationships=snapshot.num_edges, loaded_at=snapshot.loaded_at, **snapshot.memory())
+        return stats
+
+    def _run(self):
+        next_load = 0.0
+        while True:
+            try:
+                if self._reload or time.monotonic() >= next_load:
+                    next_load = time.monotonic() + self.refresh_interval
+                    self.refresh()
+                self.apply_pending()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Friend snapshot load failed: {e}")
+            self._wake.wait(max(0.0, next_load - time.monotonic()))
+            self._wake.clear()
+            # Regroupe les écritures d'une rafale en une seule reconstruction
+            time.sleep(self.apply_interval)
+
+
+def get_holder():
+    return current_app.extensions.get('friend_snapshot')
+
+def get_snapshot():
+    """Snapshot du graphe d'amitié s'il est activé et chargé, sinon None."""
+    holder = get_holder()
+    return holder.get() if holder else None
+
+def record(*event):
+    holder = get_holder()
+    if holder:
+        holder.record(*event)
+
+def user_added(user_id):
+    record(USER_ADDED, user_id)
+
+def user_removed(user_id):
+    record(USER_REMOVED, user_id)
+
+def friendship_added(user_id, friend_id):
+    record(FRIENDSHIP_ADDED, user_id, friend_id)
+
+def friendship_removed(user_id, friend_id):
+    record(FRIENDSHIP_REMOVED, user_id, friend_id)
+
+def init_app(app):
+    if app.config['FRIEND_SNAPSHOT_ENABLED']:
+        app.extensions['friend_snapshot'] = SnapshotHolder(app, app.config['FRIEND_SNAPSHOT_REFRESH'],
+                                                           app.config['FRIEND_SNAPSHOT_APPLY_INTERVAL'])
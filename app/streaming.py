@@ -0,0 +1,101 @@
+# app/streaming.py
+"""
+Réponses en flux pour les routes de liste.
+
+Mode opt-in : `Accept: application/x-ndjson` (un objet JSON par ligne) ou `?stream=true`
+(tableau JSON envoyé en chunks). Les enregistrements sont convertis, encodés et écrits dans
+la réponse par morceaux, sans construire le corps JSON complet.
+
+py2neo (2021.2) lit tout le résultat d'un run() avant de rendre le curseur : un flux tiré d'une
+seule requête garderait toutes les lignes en mémoire et n'enverrait rien avant la dernière.
+Les listes globales (GET /users, /posts, /comments) sont donc lues par stream_pages en pages
+keyset de STREAM_PAGE_SIZE lignes : la mémoire est bornée par une page et le premier octet
+part dès la première page. En mode flux, `limit` est ignoré : on renvoie toutes les lignes à
+partir du `cursor` éventuel. Les listes rattachées à une entité (amis, posts d'un utilisateur,
+commentaires d'un post) sont lues en une requête et passées à stream_records.
+"""
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON = 'application/x-ndjson'
+JSON_ARRAY = 'application/json'
+
+# Taille des morceaux écrits dans la réponse (évite un write() par enregistrement)
+CHUNK_SIZE = 16 * 1024
+
+
+def requested_mode():
+    """Retourne NDJSON, JSON_ARRAY ou None (réponse classique) selon la requête."""
+    if request.accept_mimetypes.best_match([JSON_ARRAY, NDJSON]) == NDJSON:
+        return NDJSON
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return JSON_ARRAY
+    return None
+
+def _ndjson_chunks(records, to_dict):
+    dumps = current_app.json.dumps
+    buffer = []
+    size = 0
+    try:
+        for record in records:
+            line = dumps(to_dict(record)) + '\n'
+            buffer.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+    except Exception as e:
+        print(f"Error while streaming {request.path}: {e}")
+        buffer.append(dumps({"error": "An unexpected error occurred"}) + '\n')
+    if buffer:
+        yield ''.join(buffer)
+
+def _json_array_chunks(records, to_dict):
+    dumps = current_app.json.dumps
+    buffer = ['[']
+    size = 1
+    separator = ''
+    try:
+        for record in records:
+            item = separator + dumps(to_dict(record))
+            separator = ','
+            buffer.append(item)
+            size += len(item)
+            if size >= CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+    except Exception as e:
+        # Le statut 200 est déjà parti : on coupe le tableau, le JSON invalide signale l'échec
+        print(f"Error while streaming {request.path}: {e}")
+        if buffer:
+            yield ''.join(buffer)
+        return
+    buffer.append(']')
+    yield ''.join(buffer)
+
+def stream_records(records, to_dict, mode):
+    """
+    Construit une réponse en flux à partir d'un itérable d'enregistrements (curseur py2neo,
+    déjà lu en entier par py2neo, ou générateur de stream_pages).
+    `to_dict` convertit un enregistrement en objet sérialisable.
+    La connexion réservée par get_db reste tenue jusqu'à la fin du flux (stream_with_context).
+    """
+    chunks = _ndjson_chunks if mode == NDJSON else _json_array_chunks
+    return Response(stream_with_context(chunks(records, to_dict)), mimetype=mode)
+
+def keyset_pages(fetch_page, key, after=None, page_size=None):
+    """
+    Enregistrements de toutes les pages, lues à la demande : `fetch_page(after, limit)` retourne
+    une liste d'au plus `limit` lignes après la clé `after` (None : depuis le début), `key`
+    extrait la clé de tri d'une ligne.
+    """
+    page_size = page_size or current_app.config['STREAM_PAGE_SIZE']
+    while True:
+        rows = fetch_page(after, page_size)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = key(rows[-1])
+
+def stream_pages(fetch_page, key, to_dict, mode, after=None):
+    """Réponse en flux d'une liste lue par pages keyset (voir keyset_pages)."""
+    return stream_records(keyset_pages(fetch_page, key, after), to_dict, mode)
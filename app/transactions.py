@@ -0,0 +1,286 @@
+# app/transactions.py
+"""
+Transactions d'écriture avec reprise automatique des erreurs transitoires de Neo4j.
+
+Chaque écriture des routes est une fonction de transaction `work(tx, ...)` exécutée par
+write() : transaction explicite, commit, et en cas d'erreur transitoire (verrou mortel,
+délai de verrou dépassé, changement de leader, connexion coupée) annulation puis nouvel
+essai après une attente exponentielle avec gigue (WRITE_RETRY_INITIAL_DELAY, doublée à chaque
+essai jusqu'à WRITE_RETRY_MAX_DELAY), au plus WRITE_RETRY_MAX_ATTEMPTS fois. La fonction peut
+donc être exécutée plusieurs fois : elle ne fait qu'écrire dans `tx` et lire le résultat ;
+les effets hors Neo4j (cache, fil d'actualité, snapshot) restent dans la route, après le commit.
+
+Idempotency-Key : sur les routes POST de création, un client qui renvoie sa requête (délai
+dépassé, connexion coupée) avec le même en-tête reçoit la réponse d'origine au lieu de créer un
+doublon. La clé est un nœud (:IdempotencyKey) créé dans la même transaction que l'écriture, avant
+elle : la contrainte d'unicité fait attendre un doublon concurrent jusqu'au commit de l'original,
+puis lui renvoie la réponse enregistrée (en-tête Idempotent-Replayed). Seules les réponses 2xx
+sont enregistrées ; une clé réutilisée pour une autre requête donne 422. Les clés expirent après
+IDEMPOTENCY_KEY_TTL secondes.
+
+Mesures : GET /db/transactions et, avec METRICS_ENABLED, les compteurs
+neo4j_write_retries_total, neo4j_write_conflicts_total et neo4j_write_failures_total sur /metrics.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from flask import current_app, jsonify, request
+from py2neo.errors import ClientError, ConnectionBroken, ConnectionUnavailable, Neo4jError, ServiceUnavailable
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Erreurs transitoires dues à la concurrence entre transactions (et non à la base ou au réseau)
+CONFLICTS = ('DeadlockDetected', 'LockAcquisitionTimeout', 'Outdated')
+# Transitoires mais provoquées par un arrêt volontaire de la transaction : pas de nouvel essai
+NOT_RETRIED = ('Terminated', 'LockClientStopped')
+
+# Lots de clés expirées supprimés au plus une fois par IDEMPOTENCY_PURGE_INTERVAL secondes
+IDEMPOTENCY_PURGE_INTERVAL = 60
+
+
+def retry_reason(error):
+    """Titre de l'erreur si l'écriture peut être retentée, sinon None."""
+    if isinstance(error, (ConnectionBroken, ConnectionUnavailable, ServiceUnavailable)):
+        return type(error).__name__
+    if isinstance(error, Neo4jError) and error.should_retry() and error.title not in NOT_RETRIED:
+        return error.title
+    return None
+
+def is_constraint_violation(error):
+    return isinstance(error, ClientError) and error.title == 'ConstraintValidationFailed'
+
+
+class WriteTransactions:
+    """Politique de reprise des écritures du processus et ses compteurs."""
+
+    def __init__(self, app):
+        config = app.config
+        self.max_attempts = max(1, config['WRITE_RETRY_MAX_ATTEMPTS'])
+        self.initial_delay = config['WRITE_RETRY_INITIAL_DELAY']
+        self.max_delay = config['WRITE_RETRY_MAX_DELAY']
+        self.key_ttl = config['IDEMPOTENCY_KEY_TTL']
+        self.transactions = 0
+        self.retries = {}
+        self.conflicts = 0
+        self.failures = {}
+        self.replayed = 0
+        self._next_purge = 0.0
+        self._lock = threading.Lock()
+        registry = app.extensions.get('metrics')
+        self._metrics = registry
+        if registry is not None:
+            self._retries_total = registry.counter(
+                'neo4j_write_retries_total', 'Write transactions retried after a transient error.', ('reason',))
+            self._conflicts_total = registry.counter(
+                'neo4j_write_conflicts_total', 'Write transactions that hit a deadlock or a lock timeout.', ())
+            self._failures_total = registry.counter(
+                'neo4j_write_failures_total', 'Write transactions abandoned after the last attempt.', ('reason',))
+
+    def delay(self, attempt):
+        """Attente avant l'essai `attempt + 1` : exponentielle plafonnée, gigue complète."""
+        return random.uniform(0, min(self.max_delay, self.initial_delay * 2 ** (attempt - 1)))
+
+    def write(self, graph, work, *args, **kwargs):
+        """Exécute `work(tx, *args, **kwargs)` dans une transaction d'écriture et retourne son résultat."""
+        attempt = 0
+        while True:
+            attempt += 1
+            tx = None
+            try:
+                tx = graph.begin()
+                result = work(tx, *args, **kwargs)
+                graph.commit(tx)
+            except Exception as e:
+                self._rollback(graph, tx)
+                reason = retry_reason(e)
+                if reason is None:
+                    raise
+                self._count(reason, attempt < self.max_attempts)
+                if attempt >= self.max_attempts:
+                    raise
+                time.sleep(self.delay(attempt))
+                continue
+            with self._lock:
+                self.transactions += 1
+            return result
+
+    def _rollback(self, graph, tx):
+        try:
+            graph.rollback(tx)
+        except Exception:
+            # Transaction déjà close côté serveur (erreur) ou connexion perdue
+            pass
+
+    def _count(self, reason, retried):
+        counts = self.retries if retried else self.failures
+        with self._lock:
+            counts[reason] = counts.get(reason, 0) + 1
+            if reason in CONFLICTS:
+                self.conflicts += 1
+        if self._metrics is not None:
+            self._metrics.increment(self._retries_total if retried else self._failures_total, (reason,))
+            if reason in CONFLICTS:
+                self._metrics.increment(self._conflicts_total, ())
+
+    def purge_due(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_purge:
+                return False
+            self._next_purge = now + IDEMPOTENCY_PURGE_INTERVAL
+            return True
+
+    def count_replay(self):
+        with self._lock:
+            self.replayed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_attempts": self.max_attempts,
+                "committed": self.transactions,
+                "retries": dict(self.retries),
+                "conflicts": self.conflicts,
+                "failures": dict(self.failures),
+                "idempotent_replays": self.replayed,
+            }
+
+
+def get_writer(app=None):
+    app = app or current_app
+    return app.extensions['write_transactions']
+
+def write(graph, work, *args, **kwargs):
+    """write() de l'application courante (voir WriteTransactions.write)."""
+    return get_writer().write(graph, work, *args, **kwargs)
+
+def run_write(graph, query, parameters=None, **kwparameters):
+    """Une requête d'écriture dans une transaction avec reprise ; retourne ses lignes (cursor.data())."""
+    return write(graph, lambda tx: tx.run(query, parameters, **kwparameters).data())
+
+
+# --- Idempotency-Key ---
+
+# Une clé expirée est remplacée ; sinon la contrainte idempotency_key_unique fait échouer le
+# CREATE (après le commit d'une transaction concurrente qui la détient)
+CLAIM_KEY = """
+OPTIONAL MATCH (old:IdempotencyKey {key: $key}) WHERE old.expires_at < datetime()
+DELETE old
+WITH count(*) AS purged
+CREATE (k:IdempotencyKey {key: $key, request: $request, created_at: datetime(),
+                          expires_at: datetime() + duration({seconds: $ttl})})
+RETURN k.key AS key
+"""
+
+SAVE_RESPONSE = """
+MATCH (k:IdempotencyKey {key: $key})
+SET k.status = $status, k.body = $body
+"""
+
+STORED_RESPONSE = """
+MATCH (k:IdempotencyKey {key: $key}) WHERE k.expires_at >= datetime()
+RETURN k.request AS request, k.status AS status, k.body AS body
+"""
+
+PURGE_KEYS = """
+MATCH (k:IdempotencyKey) WHERE k.expires_at < datetime()
+WITH k LIMIT 1000
+DELETE k
+"""
+
+
+class InvalidIdempotencyKey(ValueError):
+    pass
+
+class _KeyTaken(Exception):
+    """La clé existe déjà : réponse à rejouer."""
+
+class _NotRecorded(Exception):
+    """Réponse non 2xx : la transaction (et la clé) est annulée, la réponse renvoyée telle quelle."""
+
+    def __init__(self, body, status):
+        super().__init__(status)
+        self.body = body
+        self.status = status
+
+
+def get_idempotency_key():
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise InvalidIdempotencyKey(f"{IDEMPOTENCY_HEADER} must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    return key
+
+def request_fingerprint():
+    """Même clé, autre requête (méthode, chemin ou corps différents) : refusée."""
+    digest = hashlib.sha1(f"{request.method} {request.path}\n".encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def idempotent(graph, work, *args, **kwargs):
+    """
+    Écriture d'une route de création : `work(tx, ...)` retourne (corps, statut).
+    Retourne (corps, statut, rejouée) ; une réponse rejouée ne doit pas refaire les effets
+    hors Neo4j de la route. Lève InvalidIdempotencyKey si l'en-tête est invalide.
+    """
+    key = get_idempotency_key()
+    if key is None:
+        body, status = write(graph, work, *args, **kwargs)
+        return body, status, False
+    writer = get_writer()
+    fingerprint = request_fingerprint()
+
+    def attempt(tx):
+        try:
+            tx.run(CLAIM_KEY, key=key, request=fingerprint, ttl=writer.key_ttl).data()
+        except ClientError as e:
+            # Seule requête de la transaction à ce stade : c'est bien la clé qui existe
+            if is_constraint_violation(e):
+                raise _KeyTaken() from e
+            raise
+        body, status = work(tx, *args, **kwargs)
+        if not 200 <= status < 300:
+            raise _NotRecorded(body, status)
+        tx.run(SAVE_RESPONSE, key=key, status=status, body=json.dumps(body, default=str)).data()
+        return body, status
+
+    try:
+        body, status = writer.write(graph, attempt)
+    except _NotRecorded as e:
+        return e.body, e.status, False
+    except _KeyTaken:
+        return replay(graph, key, fingerprint)
+    if writer.purge_due():
+        try:
+            graph.run(PURGE_KEYS)
+        except Exception as e:
+            print(f"Idempotency key purge failed: {e}")
+    return body, status, False
+
+def replay(graph, key, fingerprint):
+    stored = graph.run(STORED_RESPONSE, key=key).data()
+    if not stored:
+        # Expirée entre le CREATE refusé et la lecture : le client peut renvoyer sa requête
+        return {"error": f"{IDEMPOTENCY_HEADER} is being reused, retry the request"}, 409, False
+    if stored[0]['request'] != fingerprint:
+        return {"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}, 422, False
+    get_writer().count_replay()
+    return json.loads(stored[0]['body']), stored[0]['status'], True
+
+def respond(body, status, replayed):
+    """Réponse d'idempotent() : la réponse rejouée porte l'en-tête Idempotent-Replayed."""
+    if replayed:
+        return jsonify(body), status, {REPLAYED_HEADER: 'true'}
+    return jsonify(body), status
+
+
+def init_app(app):
+    """Crée la politique de reprise des écritures et expose ses compteurs sur GET /db/transactions."""
+    app.extensions['write_transactions'] = WriteTransactions(app)
+
+    @app.route('/db/transactions')
+    def db_transactions_stats():
+        return jsonify(get_writer().stats()), 200
@@ -0,0 +1,374 @@
+# app/writebehind.py
+"""
+Écritures différées (write-behind) pour les écritures nombreuses et de faible valeur : les
+likes et unlikes de posts et de commentaires, si LIKES_WRITE_BEHIND est actif.
+
+La route répond 202 tout de suite, sans connexion à Neo4j ; l'événement est ajouté à une
+file du processus, coalescée par clé (utilisateur, cible) : seul le dernier état demandé est
+écrit, si bien qu'un like suivi d'un unlike ne donne plus qu'un DELETE (sans effet si le like
+n'avait pas encore été écrit). Un thread de fond vide la file toutes les LIKES_FLUSH_INTERVAL
+secondes, ou dès que LIKES_FLUSH_BATCH clés attendent, en transactions UNWIND de
+LIKES_FLUSH_BATCH lignes. Les écritures sont idempotentes (MERGE, DELETE d'une relation
+existante) : rejouer un lot déjà écrit ne change rien.
+
+- Contre-pression : au-delà de LIKES_QUEUE_MAX_PENDING clés en attente, les nouveaux
+  événements sont refusés (503 + Retry-After) ; un événement sur une clé déjà en attente est
+  toujours accepté puisqu'il ne fait que la remplacer.
+- Journal : avec LIKES_JOURNAL_DIR, chaque événement accepté est d'abord ajouté à un fichier
+  local (segments verrouillés par flock, un par processus). Un segment n'est supprimé qu'après
+  l'écriture réussie de son contenu ; les segments laissés par un processus arrêté sont repris
+  par le premier processus qui utilise la file.
+- Mesures : /likes/queue (attente, coalescences, refus, retard d'écriture) et, avec
+  METRICS_ENABLED, les histogrammes likes_flush_lag_seconds et likes_flush_rows sur /metrics.
+
+La validation (utilisateur ou cible inexistants) n'a lieu qu'à l'écriture : ces lignes sont
+ignorées et comptées dans `skipped`.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from flask import current_app, jsonify
+from app.database import get_pool
+from app import cache, transactions
+
+LIKES_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u:User {id: row.user_id})
+OPTIONAL MATCH (p:Post {id: row.post_id})
+OPTIONAL MATCH (c:Comment {id: row.comment_id})
+WITH row, u, coalesce(p, c) AS target
+FOREACH (_ IN CASE WHEN u IS NOT NULL AND target IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (u)-[:LIKES]->(target)
+    ON CREATE SET target.like_count = coalesce(target.like_count, 0) + 1, target.rev = coalesce(target.rev, 0) + 1
+)
+WITH row, u, target
+// like_count figure dans la liste des commentaires du post
+OPTIONAL MATCH (parent:Post)-[:HAS_COMMENT]->(target:Comment)
+FOREACH (post IN CASE WHEN u IS NOT NULL AND parent IS NOT NULL THEN [parent] ELSE [] END |
+    SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+)
+RETURN count(CASE WHEN u IS NOT NULL AND target IS NOT NULL THEN 1 END) AS applied
+"""
+
+UNLIKES_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (u:User {id: row.user_id})
+OPTIONAL MATCH (p:Post {id: row.post_id})
+OPTIONAL MATCH (c:Comment {id: row.comment_id})
+WITH row, u, coalesce(p, c) AS target
+OPTIONAL MATCH (u)-[r:LIKES]->(target)
+DELETE r
+WITH row, u, target, count(r) AS deleted
+FOREACH (_ IN CASE WHEN deleted > 0 THEN [1] ELSE [] END |
+    SET target.like_count = coalesce(target.like_count, 0) - deleted, target.rev = coalesce(target.rev, 0) + 1
+)
+WITH row, u, target, deleted
+OPTIONAL MATCH (parent:Post)-[:HAS_COMMENT]->(target:Comment)
+FOREACH (post IN CASE WHEN deleted > 0 AND parent IS NOT NULL THEN [parent] ELSE [] END |
+    SET post.comments_rev = coalesce(post.comments_rev, 0) + 1
+)
+RETURN count(CASE WHEN u IS NOT NULL AND target IS NOT NULL THEN 1 END) AS applied
+"""
+
+LAG_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+ROWS_BUCKETS = (1, 10, 100, 500, 1000, 5000, 10000, 50000)
+
+
+class Journal:
+    """
+    Journal local en segments append-only (une ligne JSON par événement). Chaque segment est
+    verrouillé (flock) par le processus qui l'écrit ou l'a repris, jusqu'à sa suppression.
+    """
+
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.sealed = []          # segments fermés, supprimés après une écriture réussie
+        self._file = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, entry):
+        if self._file is None:
+            self._sequence += 1
+            path = os.path.join(self.directory, f"{self.name}-{os.getpid()}-{self._sequence}.log")
+            self._file = open(path, 'a', encoding='utf-8')
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # flush() : l'événement survit à l'arrêt du processus (pas à celui de la machine)
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+
+    def seal(self):
+        """Ferme le segment courant ; les événements suivants vont dans un nouveau segment."""
+        if self._file is not None:
+            self.sealed.append(self._file)
+            self._file = None
+
+    def discard_sealed(self):
+        for file in self.sealed:
+            os.remove(file.name)
+            file.close()
+        self.sealed = []
+
+    def recover(self):
+        """
+        Événements des segments qu'aucun processus ne verrouille, du plus ancien au plus récent.
+        Un segment supprimé entre-temps (repris et écrit par un autre processus qui démarre en
+        même temps) est ignoré. En cas d'erreur, les segments déjà repris sont relâchés.
+        """
+        entries = []
+        paths = glob.glob(os.path.join(self.directory, f"{self.name}-*.log"))
+        try:
+            for path in sorted(paths, key=_mtime):
+                try:
+                    file = open(path, 'r', encoding='utf-8')
+                except FileNotFoundError:
+                    continue
+                try:
+                    fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    file.close()    # segment d'un processus vivant
+                    continue
+                if not os.path.exists(path):
+                    file.close()    # supprimé par un autre processus avant qu'on le verrouille
+                    continue
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break       # dernière ligne tronquée par l'arrêt
+                self.sealed.append(file)
+        except Exception:
+            for file in self.sealed:
+                file.close()
+            self.sealed = []
+            raise
+        return entries
+
+
+def _mtime(path):
+    """Date de modification d'un segment ; 0 s'il a été supprimé depuis le glob (ignoré à l'ouverture)."""
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+class WriteBehindQueue:
+    """
+    File d'écritures coalescées par clé. `flush(app, items)` écrit une liste de (clé, valeur)
+    en base et retourne le nombre de lignes réellement appliquées.
+    """
+
+    def __init__(self, app, name, flush, max_pending=100000, flush_interval=0.5, batch_size=1000,
+                 journal_dir=None):
+        self.app = app
+        self.name = name
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.journal_dir = journal_dir or None
+        self.journal = None
+        self._write = flush
+        self._pending = {}        # clé -> [valeur, date d'acceptation du plus ancien événement en attente]
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self.accepted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.recovered = 0
+        self.flushes = 0
+        self.written = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_lag = None
+        self.max_lag = 0.0
+        registry = app.extensions.get('metrics')
+        self._metrics = registry
+        if registry is not None:
+            self._lag = registry.histogram(
+                f'{name}_flush_lag_seconds', 'Age of the oldest acknowledged event when its batch is written.',
+                (), LAG_BUCKETS)
+            self._rows = registry.histogram(
+                f'{name}_flush_rows', 'Coalesced rows written per flush.', (), ROWS_BUCKETS)
+
+    def ensure_started(self):
+        """Démarre le thread d'écriture (et reprend le journal) dans ce processus au premier appel."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Après un fork (gunicorn --preload) le thread du parent n'existe pas ici
+                    pending, journal, recovered = {}, None, 0
+                    if self.journal_dir:
+                        journal = Journal(self.journal_dir, self.name)
+                        for key, value, accepted_at in journal.recover():
+                            pending[tuple(key)] = [value, accepted_at]
+                            recovered += 1
+                    # Seulement une fois la reprise réussie : sinon l'appel suivant la retente
+                    self._pending, self.journal = pending, journal
+                    self.recovered += recovered
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True).start()
+                    atexit.register(self.close)
+
+    def submit(self, key, value):
+        """Ajoute un événement ; False si la file est pleine (contre-pression)."""
+        self.ensure_started()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None and len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return False
+            now = time.time()
+            if self.journal is not None:
+                self.journal.append([list(key), value, now])
+            if entry is None:
+                self._pending[key] = [value, now]
+            else:
+                entry[0] = value
+                self.coalesced += 1
+            self.accepted += 1
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """Écrit tout ce qui attend ; en cas d'échec les événements retournent dans la file."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                if self.journal is not None:
+                    self.journal.seal()
+            if not batch:
+                return 0
+            items = [(key, value) for key, (value, _) in batch.items()]
+            try:
+                applied = 0
+                for start in range(0, len(items), self.batch_size):
+                    applied += self._write(self.app, items[start:start + self.batch_size])
+            except Exception:
+                with self._lock:
+                    # Les événements arrivés entre-temps sont plus récents : ils gardent leur valeur
+                    for key, entry in batch.items():
+                        newer = self._pending.setdefault(key, entry)
+                        newer[1] = min(newer[1], entry[1])
+                    self.failures += 1
+                raise
+            lag = time.time() - min(accepted_at for _, accepted_at in batch.values())
+            with self._lock:
+                if self.journal is not None:
+                    self.journal.discard_sealed()
+                self.flushes += 1
+                self.written += applied
+                self.skipped += len(items) - applied
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self.last_error = None
+            if self._metrics is not None:
+                self._metrics.observe(self._lag, (), lag)
+                self._metrics.observe(self._rows, (), len(items))
+            return len(items)
+
+    def close(self):
+        """Dernière écriture à l'arrêt du processus ; ce qui échoue reste dans le journal."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Write-behind flush of {self.name} failed at exit: {e}")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Write-behind flush of {self.name} failed: {e}")
+
+    def stats(self):
+        self.ensure_started()
+        with self._lock:
+            oldest = min((accepted_at for _, accepted_at in self._pending.values()), default=None)
+            return {
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest is not None else None,
+                "accepted": self.accepted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "recovered": self.recovered,
+                "flushes": self.flushes,
+                "written": self.written,
+                "skipped": self.skipped,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "last_lag_seconds": round(self.last_lag, 3) if self.last_lag is not None else None,
+                "max_lag_seconds": round(self.max_lag, 3),
+                "journal": self.journal_dir,
+            }
+
+
+def write_likes(app, items):
+    """Écrit un lot de ((user_id, 'post' | 'comment', id), liké ?) en une transaction."""
+    rows = {True: [], False: []}
+    keys = []
+    for (user_id, kind, target_id), liked in items:
+        rows[liked].append({'user_id': user_id, 'post_id': target_id if kind == 'post' else None,
+                            'comment_id': target_id if kind == 'comment' else None})
+        keys.append(cache.post_key(target_id) if kind == 'post' else cache.comment_key(target_id))
+    def write(tx):
+        applied = 0
+        for query, batch in ((LIKES_QUERY, rows[True]), (UNLIKES_QUERY, rows[False])):
+            if batch:
+                applied += tx.run(query, rows=batch).evaluate()
+        return applied
+
+    pool = get_pool(app)
+    graph = pool.acquire()
+    try:
+        applied = transactions.get_writer(app).write(graph, write)
+    finally:
+        pool.release()
+    with app.app_context():
+        cache.invalidate(*dict.fromkeys(keys))
+    return applied
+
+
+def get_likes():
+    """File des likes si LIKES_WRITE_BEHIND est actif, sinon None (écriture synchrone)."""
+    return current_app.extensions.get('likes_queue')
+
+def accept_like(user_id, liked, post_id=None, comment_id=None):
+    """Réponse des routes like / unlike en mode différé : 202, ou 503 si la file est pleine."""
+    if not isinstance(user_id, str):
+        return jsonify({"error": "'user_id' must be a string"}), 400
+    kind, target_id = ('post', post_id) if post_id else ('comment', comment_id)
+    if not get_likes().submit((user_id, kind, target_id), liked):
+        return jsonify({"error": "Too many pending likes, retry later"}), 503, {"Retry-After": "1"}
+    action = "Like" if liked else "Unlike"
+    return jsonify({"message": f"{action} of {kind} {target_id} by user {user_id} accepted"}), 202
+
+def init_app(app):
+    """Crée la file des likes (LIKES_WRITE_BEHIND) et expose ses compteurs sur /likes/queue."""
+    if not app.config['LIKES_WRITE_BEHIND']:
+        return
+    app.extensions['likes_queue'] = WriteBehindQueue(
+        app, 'likes', write_likes,
+        max_pending=app.config['LIKES_QUEUE_MAX_PENDING'],
+        flush_interval=app.config['LIKES_FLUSH_INTERVAL'],
+        batch_size=app.config['LIKES_FLUSH_BATCH'],
+        journal_dir=app.config['LIKES_JOURNAL_DIR'],
+    )
+
+    @app.route('/likes/queue')
+    def likes_queue_stats():
+        return jsonify(get_likes().stats()), 200
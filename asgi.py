@@ -0,0 +1,5 @@
+# asgi.py
+# Point d'entrée du mode asynchrone : uvicorn asgi:app (voir app/asgi.py)
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,76 @@
+"""
+Benchmark: /analytics computations and memory per edge of the in-memory friend snapshot.
+
+Runs in-process, no Neo4j needed: builds the CSR snapshot of a synthetic Barabási–Albert
+graph (same generator as bench_suggestions.py), reports its memory, then times the degree,
+component and triangle computations with numpy (if installed) and in pure Python, and the
+incremental application of a burst of write events.
+
+    python benchmarks/bench_analytics.py --users 200000 --edges 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import power_law_edges
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200000)
+    parser.add_argument('--edges', type=int, default=5, help="friendships created per new user")
+    parser.add_argument('--events', type=int, default=1000, help="write events applied incrementally")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from app import analytics
+    from app.snapshot import FRIENDSHIP_ADDED, FriendGraph, build_csr
+
+    rng = random.Random(args.seed)
+    edges, _ = power_law_edges(args.users, args.edges, rng)
+    sources, destinations = array('i'), array('i')
+    for a, b in edges:
+        sources.extend((a, b))
+        destinations.extend((b, a))
+    (offsets, targets), build_ms = timed(build_csr, args.users, sources, destinations)
+    ids = [f"user-{i:08d}" for i in range(args.users)]
+    snapshot = FriendGraph(ids, offsets, targets)
+    memory = snapshot.memory()
+    print(f"{snapshot.num_nodes} users, {snapshot.num_edges // 2} friendships, CSR built in {build_ms:.0f} ms")
+    print(f"CSR {memory['csr_bytes'] / 2 ** 20:.1f} MiB ({memory['bytes_per_edge']} bytes per relationship), "
+          f"id map {memory['id_map_bytes'] / 2 ** 20:.1f} MiB")
+
+    events = [(FRIENDSHIP_ADDED, ids[rng.randrange(args.users)], ids[rng.randrange(args.users)])
+              for _ in range(args.events)]
+    _, apply_ms = timed(snapshot.apply, events)
+    print(f"{args.events} write events applied in {apply_ms:.0f} ms")
+
+    numpy = analytics.np
+    modes = [("numpy", numpy)] if numpy is not None else []
+    modes.append(("python", None))
+    print(f"{'computation':<14}" + "".join(f"{name + ' ms':>14}" for name, _ in modes))
+    for name, fn in (("degrees", analytics.degrees), ("components", analytics.components),
+                     ("triangles", analytics.triangles)):
+        row = f"{name:<14}"
+        for _, module in modes:
+            analytics.np = module
+            snapshot.results = {}
+            _, elapsed = timed(fn, snapshot)
+            row += f"{elapsed:>14.0f}"
+        print(row)
+    analytics.np = numpy
+
+
+if __name__ == '__main__':
+    main()
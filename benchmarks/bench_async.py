@@ -0,0 +1,127 @@
+"""
+Benchmark: requests/sec and p99 latency of the sync (WSGI) and async (ASGI) serving modes.
+
+Requires a running Neo4j (see docker-compose.yaml) and `pip install -r requirements-async.txt`.
+Starts each server in a subprocess on its own port, seeds a few users / posts / comments
+through it, then keeps `--concurrency` requests in flight for `--duration` seconds on the
+GET routes served by app/asgi.py.
+
+    python benchmarks/bench_async.py --concurrency 200 --duration 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVERS = {
+    "sync": [sys.executable, '-m', 'flask', '--app', 'run', 'run', '--port', '{port}', '--with-threads'],
+    "async": [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def request(base, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            payload = response.read()
+            return response.status, json.loads(payload) if payload else None
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request(base, 'GET', '/hello')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {base} did not start")
+
+
+def seed(base):
+    stamp = time.time()
+    alice = request(base, 'POST', '/users', {"name": "Bench Alice", "email": f"alice-{stamp}@example.com"})[1]['id']
+    bob = request(base, 'POST', '/users', {"name": "Bench Bob", "email": f"bob-{stamp}@example.com"})[1]['id']
+    carol = request(base, 'POST', '/users', {"name": "Bench Carol", "email": f"carol-{stamp}@example.com"})[1]['id']
+    for a, b in [(alice, carol), (bob, carol)]:
+        request(base, 'POST', f'/users/{a}/friends', {"friend_id": b})
+    post = request(base, 'POST', f'/users/{alice}/posts', {"title": "Bench", "content": "Bench"})[1]['id']
+    comment = None
+    for i in range(20):
+        comment = request(base, 'POST', f'/posts/{post}/comments', {"user_id": bob, "content": f"c{i}"})[1]['id']
+    return [f'/users/{alice}', f'/users/{alice}/friends', f'/users/{alice}/mutual_friends/{bob}',
+            f'/posts/{post}', f'/posts/{post}/comments', f'/comments/{comment}']
+
+
+def load(base, paths, concurrency, duration):
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def worker(offset):
+        i = offset
+        while time.time() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status, _ = request(base, 'GET', path)
+            except OSError:
+                status = 599
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                samples.append(elapsed)
+                if status >= 500:
+                    errors[0] += 1
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return samples, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=5100)
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    env = dict(os.environ, NEO4J_SCHEMA_BOOTSTRAP='false', CACHE_ENABLED='false')
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f} s per mode")
+    print(f"{'mode':<8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for offset, mode in enumerate(args.modes.split(',')):
+        port = args.port + offset
+        base = f"http://127.0.0.1:{port}"
+        command = [part.format(port=port) for part in SERVERS[mode]]
+        server = subprocess.Popen(command, cwd=ROOT, env=env)
+        try:
+            wait_ready(base)
+            paths = seed(base)
+            load(base, paths, 4, 2)  # échauffement (ouverture des connexions)
+            samples, errors = load(base, paths, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode:<8}{len(samples):>10}{len(samples) / args.duration:>10.0f}"
+              f"{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: N single GETs against one batchGet call for users, posts and comments.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds users, posts and comments through
+the /bulk endpoints, then, for each entity, fetches `--ids` of them with N sequential
+GET /<entity>/<id> and with one POST /<entity>:batchGet, with the cache disabled and warm.
+`--delay` puts benchmarks/latency_proxy.py in front of Neo4j to simulate network round trips.
+
+    python benchmarks/bench_batch_get.py --ids 100 --repeat 20 --delay 0.002
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from latency_proxy import LatencyProxy
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def seed(client, count):
+    stamp = time.time()
+    users = [r['id'] for r in client.post("/bulk/users", json=[
+        {"name": f"Batch User {i}", "email": f"batch-{i}-{stamp}@example.com"} for i in range(count)]).get_json()['results']]
+    posts = [r['id'] for r in client.post("/bulk/posts", json=[
+        {"user_id": users[i], "title": f"Post {i}", "content": "Batch"} for i in range(count)]).get_json()['results']]
+    comments = [r['id'] for r in client.post("/bulk/comments", json=[
+        {"user_id": users[i], "post_id": posts[(i + 1) % count], "content": "Batch"} for i in range(count)]).get_json()['results']]
+    return {"users": users, "posts": posts, "comments": comments}
+
+
+def measure(client, entity, ids, repeat):
+    single, batch = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for entity_id in ids:
+            assert client.get(f"/{entity}/{entity_id}").status_code == 200
+        single.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        response = client.post(f"/{entity}:batchGet", json={"ids": ids})
+        batch.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200 and not response.get_json()['missing'], response.get_json()
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ids', type=int, default=100, help="ids fetched per call (at most BATCH_GET_MAX_IDS)")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--target', default='localhost:7687')
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds added per Bolt round trip")
+    args = parser.parse_args()
+
+    if args.delay:
+        host, port = args.target.rsplit(':', 1)
+        proxy = LatencyProxy(host, int(port), args.delay).start()
+        os.environ['NEO4J_URI'] = f"bolt://127.0.0.1:{proxy.port}"
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    from app import create_app
+    from app.config import Config
+
+    ids = seed(create_app(Config).test_client(), args.ids)
+    print(f"{args.ids} ids per call, {args.repeat} runs, +{args.delay * 1000:.1f} ms per round trip")
+    print(f"{'entity':<10}{'cache':<8}{'single p50':>12}{'single p99':>12}{'batch p50':>12}{'batch p99':>12}")
+    for cache_enabled in (False, True):
+        Config.CACHE_ENABLED = cache_enabled
+        client = create_app(Config).test_client()
+        for entity, entity_ids in ids.items():
+            measure(client, entity, entity_ids, 1)  # échauffement (et remplissage du cache)
+            single, batch = measure(client, entity, entity_ids, args.repeat)
+            print(f"{entity:<10}{'warm' if cache_enabled else 'off':<8}"
+                  f"{percentile(single, 0.5):>12.1f}{percentile(single, 0.99):>12.1f}"
+                  f"{percentile(batch, 0.5):>12.1f}{percentile(batch, 0.99):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: ingestion throughput of POST /users (one item per call) vs POST /bulk/users.
+
+Requires a running Neo4j (see docker-compose.yaml). Both paths go through the Flask
+test client, so the comparison measures the app and the database, not HTTP parsing.
+
+    python benchmarks/bench_bulk.py --single 1000 --bulk 100000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--single', type=int, default=1000, help="users created one call at a time")
+    parser.add_argument('--bulk', type=int, default=100000, help="users created through /bulk/users")
+    args = parser.parse_args()
+
+    client = create_app().test_client()
+    run = uuid.uuid4().hex[:8]
+
+    started = time.perf_counter()
+    for i in range(args.single):
+        response = client.post("/users", json={"name": f"single {i}", "email": f"single-{run}-{i}@example.com"})
+        assert response.status_code == 201, response.get_json()
+    single_rate = args.single / (time.perf_counter() - started)
+
+    body = "\n".join(
+        f'{{"name": "bulk {i}", "email": "bulk-{run}-{i}@example.com"}}' for i in range(args.bulk))
+    started = time.perf_counter()
+    response = client.post("/bulk/users", data=body, content_type="application/x-ndjson")
+    bulk_rate = args.bulk / (time.perf_counter() - started)
+    summary = response.get_json()
+    assert summary["failed"] == 0, summary["results"][:5]
+
+    print(f"{'path':<14}{'items':>10}{'items/s':>12}")
+    print(f"{'POST /users':<14}{args.single:>10}{single_rate:>12.0f}")
+    print(f"{'/bulk/users':<14}{args.bulk:>10}{bulk_rate:>12.0f}")
+    print(f"speed-up: {bulk_rate / single_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: write throughput under contention, without and with transaction retries.
+
+Requires a running Neo4j (see docker-compose.yaml). Many threads add and remove friendships and
+comments around a handful of "hub" users and posts, so that concurrent transactions lock the same
+nodes and deadlock. The same load runs with WRITE_RETRY_MAX_ATTEMPTS=1 (errors reach the client,
+as before) and with the default retries; the retry counters of /db/transactions are printed.
+A last pass resends every comment POST with the same Idempotency-Key and checks that no comment
+was duplicated.
+
+    python benchmarks/bench_contention.py --hubs 5 --threads 16 --requests 4000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile
+
+
+def make_app(max_attempts):
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        WRITE_RETRY_MAX_ATTEMPTS = max_attempts
+        NEO4J_SCHEMA_BOOTSTRAP = False
+    return create_app(BenchConfig)
+
+
+def seed(client, hubs, users):
+    stamp = time.time()
+    created = client.post("/bulk/users", json=[
+        {"name": f"Contender {i}", "email": f"contender-{i}-{stamp}@example.com"} for i in range(hubs + users)]).get_json()
+    ids = [r['id'] for r in sorted(created['results'], key=lambda r: r['index'])]
+    posts = [client.post(f"/users/{hub}/posts", json={"title": "Hot", "content": "x"}).get_json()['id']
+             for hub in ids[:hubs]]
+    return ids[:hubs], ids[hubs:], posts
+
+
+def hammer(app, hubs, users, posts, threads, requests):
+    samples, statuses = [], {}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local, codes = [], {}
+        for _ in range(requests // threads):
+            hub, user = rng.choice(hubs), rng.choice(users)
+            started = time.perf_counter()
+            roll = rng.random()
+            if roll < 0.4:
+                status = client.post(f"/users/{user}/friends", json={"friend_id": hub}).status_code
+            elif roll < 0.7:
+                status = client.delete(f"/users/{user}/friends/{hub}").status_code
+            else:
+                status = client.post(f"/posts/{rng.choice(posts)}/comments",
+                                     json={"user_id": user, "content": "hot take"}).status_code
+            local.append((time.perf_counter() - started) * 1000)
+            codes[status] = codes.get(status, 0) + 1
+        with lock:
+            samples.extend(local)
+            for status, n in codes.items():
+                statuses[status] = statuses.get(status, 0) + n
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, statuses, time.perf_counter() - started
+
+
+def check_idempotency(app, users, post_id, count):
+    client = app.test_client()
+    before = len(client.get(f"/posts/{post_id}/comments").get_json())
+    replayed = 0
+    for i in range(count):
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        body = {"user_id": users[i % len(users)], "content": f"once {i}"}
+        first = client.post(f"/posts/{post_id}/comments", json=body, headers=headers)
+        again = client.post(f"/posts/{post_id}/comments", json=body, headers=headers)
+        assert again.get_json()['id'] == first.get_json()['id'], (first.get_json(), again.get_json())
+        replayed += again.headers.get('Idempotent-Replayed') == 'true'
+    after = len(client.get(f"/posts/{post_id}/comments").get_json())
+    print(f"{count} comments sent twice with the same Idempotency-Key: {after - before} created, {replayed} replayed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hubs', type=int, default=5)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--idempotent', type=int, default=100, help="comments posted twice with the same key")
+    args = parser.parse_args()
+
+    app = make_app(1)
+    hubs, users, posts = seed(app.test_client(), args.hubs, args.users)
+    print(f"{args.requests} friendship / comment writes around {args.hubs} hubs, {args.threads} threads")
+    print(f"{'attempts':<10}{'req/s':>10}{'ok/s':>10}{'p50 ms':>10}{'p99 ms':>10}  statuses")
+    for attempts in (1, 5):
+        app = make_app(attempts)
+        samples, statuses, elapsed = hammer(app, hubs, users, posts, args.threads, args.requests)
+        ok = sum(n for status, n in statuses.items() if status < 300)
+        print(f"{attempts:<10}{len(samples) / elapsed:>10.0f}{ok / elapsed:>10.0f}{percentile(samples, 0.5):>10.2f}"
+              f"{percentile(samples, 0.99):>10.2f}  {dict(sorted(statuses.items()))}")
+        print(f"{'':<10}{app.test_client().get('/db/transactions').get_json()}")
+    check_idempotency(app, users, posts[0], args.idempotent)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: deleting a large account, single transaction vs batched cascade vs background job.
+
+Requires a running Neo4j (see docker-compose.yaml). For each mode, seeds one "celebrity" user with
+posts, comments from other users, likes and friendships, then deletes them while reader threads
+keep fetching the friends' profiles and friend lists. Reports the time until the DELETE answers,
+the time until the account is gone, and reader latency meanwhile.
+
+    python benchmarks/bench_delete.py --posts 2000 --comments 20000 --likes 50000 --friends 5000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile
+
+# Same cascade as the batched steps, in one transaction (counters left aside)
+SINGLE_TRANSACTION = """
+MATCH (u:User {id: $id})
+OPTIONAL MATCH (u)-[:CREATED]->(x)
+OPTIONAL MATCH (x)-[:HAS_COMMENT]->(c:Comment)
+DETACH DELETE c, x
+WITH DISTINCT u
+DETACH DELETE u
+"""
+
+
+def make_app(asynchronous, batch):
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        CASCADE_DELETE_ASYNC = asynchronous
+        CASCADE_DELETE_BATCH = batch
+        DELETE_JOB_POLL_INTERVAL = 0.1
+        NEO4J_SCHEMA_BOOTSTRAP = False
+    return create_app(BenchConfig)
+
+
+def seed(client, args, rng):
+    stamp = time.time()
+    created = client.post("/bulk/users", json=[
+        {"name": f"Fan {i}", "email": f"fan-{i}-{stamp}@example.com"} for i in range(args.friends + 1)]).get_json()
+    ids = [r['id'] for r in sorted(created['results'], key=lambda r: r['index'])]
+    celebrity, fans = ids[0], ids[1:]
+    client.post("/bulk/friendships", json=[{"user_id": celebrity, "friend_id": fan} for fan in fans])
+    posts = client.post("/bulk/posts", json=[
+        {"user_id": celebrity, "title": f"Post {i}", "content": "x"} for i in range(args.posts)]).get_json()
+    post_ids = [r['id'] for r in posts['results'] if 'id' in r]
+    client.post("/bulk/comments", json=[
+        {"user_id": rng.choice(fans), "post_id": rng.choice(post_ids), "content": "y"} for _ in range(args.comments)])
+    client.post("/bulk/likes", json=[
+        {"user_id": rng.choice(fans), "post_id": rng.choice(post_ids)} for _ in range(args.likes)])
+    return celebrity, fans
+
+
+def read_while(app, fans, stop, samples):
+    client = app.test_client()
+    rng = random.Random()
+    while not stop.is_set():
+        fan = rng.choice(fans)
+        started = time.perf_counter()
+        client.get(f"/users/{fan}")
+        client.get(f"/users/{fan}/friends")
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+def gone(client, user_id):
+    return client.get(f"/users/{user_id}").status_code == 404
+
+
+def run(mode, args):
+    app = make_app(mode == "background job", args.batch)
+    client = app.test_client()
+    celebrity, fans = seed(client, args, random.Random(args.seed))
+
+    stop, samples = threading.Event(), []
+    readers = [threading.Thread(target=read_while, args=(app, fans, stop, samples)) for _ in range(args.readers)]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.5)
+    started = time.perf_counter()
+    if mode == "single transaction":
+        from app.database import get_pool
+        get_pool(app).graph.run(SINGLE_TRANSACTION, id=celebrity)
+        status = 200
+    else:
+        status = client.delete(f"/users/{celebrity}").status_code
+    answered = time.perf_counter() - started
+    while not gone(client, celebrity):
+        time.sleep(0.05)
+    completed = time.perf_counter() - started
+    stop.set()
+    for reader in readers:
+        reader.join()
+    print(f"{mode:<20}{status:>7}{answered:>12.2f}{completed:>12.2f}"
+          f"{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--likes', type=int, default=50000)
+    parser.add_argument('--friends', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=1000, help="CASCADE_DELETE_BATCH")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.posts} posts, {args.comments} comments, {args.likes} likes, {args.friends} friends; "
+          f"{args.readers} reader threads")
+    print(f"{'mode':<20}{'status':>7}{'answer s':>12}{'gone s':>12}{'read p50':>10}{'read p99':>10}")
+    for mode in ("single transaction", "batched in request", "background job"):
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
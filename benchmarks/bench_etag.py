@@ -0,0 +1,64 @@
+"""
+Benchmark: bytes on the wire and latency of a full 200 vs a conditional 304.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds a post with many comments and a
+user with many friends, then polls the list routes with and without If-None-Match.
+The cache is disabled so that every request reaches Neo4j.
+
+    python benchmarks/bench_etag.py --comments 2000 --friends 500 --repeat 100
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def measure(client, url, headers, repeat):
+    samples, size, status = [], 0, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        size, status = len(response.get_data()), response.status_code
+    return status, size, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--comments', type=int, default=2000)
+    parser.add_argument('--friends', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    os.environ['CACHE_ENABLED'] = 'false'
+
+    from app import create_app
+    client = create_app().test_client()
+
+    stamp = time.time()
+    author = client.post("/users", json={"name": "Bench Author", "email": f"author-{stamp}@example.com"}).get_json()['id']
+    post = client.post(f"/users/{author}/posts", json={"title": "Bench", "content": "x" * 200}).get_json()['id']
+    client.post("/bulk/comments", json=[
+        {"user_id": author, "post_id": post, "content": f"comment {i} " + "y" * 100} for i in range(args.comments)])
+    friends = client.post("/bulk/users", json=[
+        {"name": f"Bench Friend {i}", "email": f"friend-{i}-{stamp}@example.com"} for i in range(args.friends)]).get_json()
+    client.post("/bulk/friendships", json=[
+        {"user_id": author, "friend_id": r['id']} for r in friends['results'] if 'id' in r])
+
+    routes = [f"/posts/{post}/comments", f"/users/{author}/friends", "/posts?limit=100"]
+    print(f"{args.repeat} requests per route, median latency")
+    print(f"{'route':<50}{'200 bytes':>11}{'200 ms':>9}{'304 bytes':>11}{'304 ms':>9}")
+    for url in routes:
+        tag = client.get(url).headers.get('ETag')
+        full_status, full_size, full_ms = measure(client, url, {}, args.repeat)
+        cond_status, cond_size, cond_ms = measure(client, url, {'If-None-Match': tag}, args.repeat)
+        assert (full_status, cond_status) == (200, 304), (url, full_status, cond_status)
+        print(f"{url[:49]:<50}{full_size:>11}{full_ms:>9.2f}{cond_size:>11}{cond_ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
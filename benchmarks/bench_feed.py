@@ -0,0 +1,84 @@
+"""
+Benchmark: GET /users/<id>/feed from precomputed timelines vs the live Cypher query.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds a reader with `--friends`
+friends who each published `--posts` posts (through the /bulk endpoints), then measures
+the first page and a deep page with FEED_ENABLED=true (timelines, fan-out on write) and
+FEED_ENABLED=false (fan-out on read on every request).
+
+    python benchmarks/bench_feed.py --friends 10000 --posts 1 --repeat 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def seed(client, friends, posts):
+    stamp = time.time()
+    reader = client.post("/users", json={"name": "Feed Reader", "email": f"reader-{stamp}@example.com"}).get_json()['id']
+    created = client.post("/bulk/users", json=[
+        {"name": f"Feed Friend {i}", "email": f"feed-{i}-{stamp}@example.com"} for i in range(friends)]).get_json()
+    friend_ids = [r['id'] for r in created['results'] if 'id' in r]
+    client.post("/bulk/friendships", json=[{"user_id": reader, "friend_id": f} for f in friend_ids])
+    client.post("/bulk/posts", json=[
+        {"user_id": f, "title": f"post {n}", "content": "x" * 100} for f in friend_ids for n in range(posts)])
+    return reader, friend_ids
+
+
+def measure(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    return response, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--friends', type=int, default=10000)
+    parser.add_argument('--posts', type=int, default=1, help="posts per friend")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    from app import create_app
+    from app.config import Config
+
+    reader = None
+    print(f"reader with {args.friends} friends x {args.posts} posts, page size {args.limit}")
+    print(f"{'mode':<10}{'page':<8}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for mode, enabled in (("timeline", True), ("live", False)):
+        Config.FEED_ENABLED = enabled
+        client = create_app(Config).test_client()
+        if reader is None:
+            reader, _ = seed(client, args.friends, args.posts)
+        url = f"/users/{reader}/feed?limit={args.limit}"
+        first, samples = measure(client, url, args.repeat)
+        print(f"{mode:<10}{'first':<8}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}"
+              f"{statistics.mean(samples):>10.2f}")
+        # Page profonde : on suit le curseur quelques pages plus loin
+        deep_url = url
+        for _ in range(5):
+            cursor = client.get(deep_url).headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            deep_url = f"{url}&cursor={cursor}"
+        _, samples = measure(client, deep_url, args.repeat)
+        print(f"{mode:<10}{'deep':<8}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}"
+              f"{statistics.mean(samples):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: serializing 10k rows of users, posts and comments to a JSON response.
+
+Runs in-process, no Neo4j needed. Builds py2neo nodes and map-projection rows (as returned
+by the routes of app/projection.py) with Neo4j datetimes, then times, for each entity:
+- the *_node_to_dict helpers + the stdlib provider (Flask's jsonify);
+- the same helpers + the orjson provider (app/json_provider.py);
+- projection maps + the stdlib provider (dates converted by projection.plain);
+- projection maps serialized as-is by the orjson provider (no intermediate dict).
+
+    python benchmarks/bench_json.py --rows 10000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def build_rows(count):
+    from interchange.time import DateTime
+    from py2neo import Node
+
+    created_at = DateTime(2024, 5, 17, 12, 30, 15.123456)
+    users, posts, comments = [], [], []
+    for i in range(count):
+        users.append({'u': Node('User', id=f"user-{i:08d}", name=f"User {i}", email=f"user{i}@example.com",
+                                created_at=created_at, friend_count=i % 300)})
+        posts.append({'p': Node('Post', id=f"post-{i:08d}", title=f"Title {i}", content="lorem ipsum " * 40,
+                                created_at=created_at, like_count=i % 50, comment_count=i % 7),
+                      'author_id': f"user-{i % 500:08d}", 'author_name': f"User {i % 500}"})
+        comments.append({'c': Node('Comment', id=f"comment-{i:08d}", content="nice post " * 5,
+                                   created_at=created_at, like_count=i % 9),
+                         'author_id': f"user-{i % 500:08d}", 'author_name': f"User {i % 500}", 'post_id': f"post-{i:08d}"})
+    # Lignes de projection : ce que renvoie `RETURN p {...} as item` (dates Neo4j non converties)
+    user_maps = [{**{k: r['u'][k] for k in ('id', 'name', 'email', 'created_at')}, 'friendCount': r['u']['friend_count']}
+                 for r in users]
+    post_maps = [{**{k: r['p'][k] for k in ('id', 'title', 'content', 'created_at')},
+                  'likeCount': r['p']['like_count'], 'commentCount': r['p']['comment_count'],
+                  'author': {'id': r['author_id'], 'name': r['author_name']}} for r in posts]
+    comment_maps = [{**{k: r['c'][k] for k in ('id', 'content', 'created_at')}, 'likeCount': r['c']['like_count'],
+                     'author': {'id': r['author_id'], 'name': r['author_name']}, 'post_id': r['post_id']} for r in comments]
+    return {"users": (users, user_maps), "posts": (posts, post_maps), "comments": (comments, comment_maps)}
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn().get_data())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    from flask import Flask
+    from app import json_provider
+    from app.projection import plain
+    from app.routes.users import user_node_to_dict
+    from app.routes.posts import post_record_to_dict
+    from app.routes.comments import comment_record_to_dict
+
+    app = Flask(__name__)
+    stdlib = json_provider.StdlibProvider(app)
+    fast = json_provider.OrjsonProvider(app) if json_provider.orjson is not None else None
+    to_dict = {"users": lambda r: user_node_to_dict(r['u']), "posts": post_record_to_dict, "comments": comment_record_to_dict}
+
+    rows = build_rows(args.rows)
+    print(f"{args.rows} rows per entity, median of {args.repeat} runs (ms)")
+    print(f"{'entity':<10}{'bytes':>10}{'dicts+stdlib':>14}{'dicts+orjson':>14}{'maps+stdlib':>14}{'maps+orjson':>14}")
+    with app.app_context():
+        for entity, (records, maps) in rows.items():
+            convert = to_dict[entity]
+            runs = [
+                lambda: stdlib.response([convert(r) for r in records]),
+                (lambda: fast.response([convert(r) for r in records])) if fast else None,
+                lambda: stdlib.response([plain(m) for m in maps]),
+                (lambda: fast.response(maps)) if fast else None,
+            ]
+            results = [timed(run, args.repeat) if run else (float('nan'), 0) for run in runs]
+            print(f"{entity:<10}{results[0][1]:>10}" + "".join(f"{ms:>14.1f}" for ms, _ in results))
+
+
+if __name__ == '__main__':
+    main()
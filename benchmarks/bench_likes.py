@@ -0,0 +1,92 @@
+"""
+Benchmark: like/unlike throughput and latency, synchronous writes vs the write-behind queue.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds users and a few "viral" posts, then
+several threads like and unlike them as fast as they can, first with LIKES_WRITE_BEHIND off
+and then on. In write-behind mode the queue is drained at the end and the flush lag reported.
+
+    python benchmarks/bench_likes.py --users 500 --posts 5 --threads 8 --requests 2000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile
+
+
+def make_app(write_behind):
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        LIKES_WRITE_BEHIND = write_behind
+        NEO4J_SCHEMA_BOOTSTRAP = False
+    return create_app(BenchConfig)
+
+
+def hammer(app, user_ids, post_ids, threads, requests):
+    samples, statuses = [], {}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local, codes = [], {}
+        for _ in range(requests // threads):
+            method = client.post if rng.random() < 0.7 else client.delete
+            started = time.perf_counter()
+            status = method(f"/posts/{rng.choice(post_ids)}/like", json={"user_id": rng.choice(user_ids)}).status_code
+            local.append((time.perf_counter() - started) * 1000)
+            codes[status] = codes.get(status, 0) + 1
+        with lock:
+            samples.extend(local)
+            for status, n in codes.items():
+                statuses[status] = statuses.get(status, 0) + n
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    sync_app = make_app(False)
+    client = sync_app.test_client()
+    stamp = time.time()
+    created = client.post("/bulk/users", json=[
+        {"name": f"Liker {i}", "email": f"liker-{i}-{stamp}@example.com"} for i in range(args.users)]).get_json()
+    user_ids = [r['id'] for r in created['results'] if 'id' in r]
+    post_ids = [client.post(f"/users/{user_ids[0]}/posts", json={"title": f"Viral {i}", "content": "x"}).get_json()['id']
+                for i in range(args.posts)]
+
+    print(f"{args.requests} like/unlike requests on {args.posts} posts, {args.threads} threads")
+    print(f"{'mode':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  statuses")
+    for mode, app in (("synchronous", sync_app), ("write-behind", make_app(True))):
+        samples, statuses, elapsed = hammer(app, user_ids, post_ids, args.threads, args.requests)
+        print(f"{mode:<14}{len(samples) / elapsed:>10.0f}{percentile(samples, 0.5):>10.2f}"
+              f"{percentile(samples, 0.99):>10.2f}  {dict(sorted(statuses.items()))}")
+        queue = app.extensions.get('likes_queue')
+        if queue is not None:
+            queue.flush()
+            stats = queue.stats()
+            print(f"{'':<14}accepted {stats['accepted']}, coalesced {stats['coalesced']}, written {stats['written']} "
+                  f"in {stats['flushes']} flushes, max lag {stats['max_lag_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
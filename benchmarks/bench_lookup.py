@@ -0,0 +1,84 @@
+"""
+Benchmark: GET /users/<id> latency without and with the schema from app/schema.py.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds synthetic users if asked,
+drops the user id constraint, times random lookups (label scan), applies the schema,
+waits for the indexes to come online and times the same lookups again (index seek).
+
+    python benchmarks/bench_lookup.py --seed 1000000 --lookups 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# Le benchmark gère lui-même le schéma
+os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+# Sans cache : les lookups répétés doivent mesurer la base, pas le cache
+os.environ['CACHE_ENABLED'] = 'false'
+
+from app import create_app
+from app.database import get_pool
+from app.schema import apply_schema
+
+SEED_BATCH = 20000
+
+
+def seed_users(graph, count):
+    """Create `count` users in UNWIND batches."""
+    for start in range(0, count, SEED_BATCH):
+        size = min(SEED_BATCH, count - start)
+        graph.run("""
+        UNWIND range($start, $start + $size - 1) AS i
+        CREATE (:User {id: 'bench-user-' + toString(i), name: 'User ' + toString(i),
+                       email: 'bench-user-' + toString(i) + '@example.com', created_at: datetime()})
+        """, start=start, size=size)
+        print(f"  seeded {start + size}/{count} users")
+
+
+def measure(client, ids):
+    samples = []
+    for user_id in ids:
+        started = time.perf_counter()
+        response = client.get(f"/users/{user_id}")
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seed', type=int, default=0, help="number of users to create first")
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    graph = get_pool(app).graph
+    if args.seed:
+        seed_users(graph, args.seed)
+
+    total = graph.evaluate("MATCH (u:User) WHERE u.id STARTS WITH 'bench-user-' RETURN count(u)")
+    if not total:
+        sys.exit("No benchmark users found: run with --seed first")
+    ids = [f"bench-user-{random.randrange(total)}" for _ in range(args.lookups)]
+
+    graph.run("DROP CONSTRAINT user_id_unique IF EXISTS")
+    before = measure(client, ids)
+
+    apply_schema(graph)
+    graph.run("CALL db.awaitIndexes(600)")
+    after = measure(client, ids)
+
+    print(f"users: {total}, lookups: {args.lookups}")
+    print(f"{'case':<16}{'p50 ms':>10}{'p99 ms':>10}")
+    print(f"{'label scan':<16}{before[0]:>10.2f}{before[1]:>10.2f}")
+    print(f"{'index seek':<16}{after[0]:>10.2f}{after[1]:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: overhead of the /metrics instrumentation (METRICS_ENABLED) on request latency.
+
+Builds two apps, with and without instrumentation, and alternates rounds of requests between
+them so that both see the same database state. `/hello` (no Neo4j) shows the fixed cost per
+request; the other routes need a running Neo4j (see docker-compose.yaml) and are skipped
+when it is unavailable. The cache is disabled so that every request reaches Neo4j.
+
+    python benchmarks/bench_metrics.py --posts 200 --rounds 20 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_client(enabled):
+    os.environ['METRICS_ENABLED'] = 'true' if enabled else 'false'
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        METRICS_ENABLED = enabled
+    return create_app(BenchConfig).test_client()
+
+
+def measure(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - started) * 1000)
+    assert response.status_code == 200, (url, response.status_code)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    os.environ['CACHE_ENABLED'] = 'false'
+    os.environ['FEED_ENABLED'] = 'false'
+
+    plain, instrumented = make_client(False), make_client(True)
+
+    routes = ["/hello"]
+    stamp = time.time()
+    created = plain.post("/users", json={"name": "Bench Author", "email": f"metrics-{stamp}@example.com"})
+    if created.status_code == 201:
+        author = created.get_json()['id']
+        post = None
+        for i in range(args.posts):
+            post = plain.post(f"/users/{author}/posts", json={"title": f"Post {i}", "content": "x" * 300}).get_json()['id']
+        routes += [f"/users/{author}", f"/posts/{post}", "/posts?limit=50", f"/users/{author}/posts"]
+    else:
+        print("Neo4j unavailable: measuring /hello only")
+
+    print(f"{args.rounds} rounds x {args.repeat} requests per route, median latency")
+    print(f"{'route':<50}{'off ms':>10}{'on ms':>10}{'overhead':>10}")
+    for url in routes:
+        off, on = [], []
+        for _ in range(args.rounds):
+            off += measure(plain, url, args.repeat)
+            on += measure(instrumented, url, args.repeat)
+        off_ms, on_ms = statistics.median(off), statistics.median(on)
+        print(f"{url[:49]:<50}{off_ms:>10.3f}{on_ms:>10.3f}{(on_ms - off_ms) / off_ms:>10.1%}")
+
+    exposition = instrumented.get('/metrics').get_data()
+    print(f"/metrics exposition: {len(exposition)} bytes")
+
+
+if __name__ == '__main__':
+    main()
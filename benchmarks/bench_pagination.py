@@ -0,0 +1,97 @@
+"""
+Benchmark: keyset pagination latency on GET /posts, first page vs deep page.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds synthetic posts if asked,
+then times GET /posts?limit=L for page 1, and for page P using a cursor built from
+the post that ends page P-1. For comparison it also times the equivalent SKIP query.
+
+    python benchmarks/bench_pagination.py --seed 600000 --page 10000 --limit 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import create_app
+from app.database import get_pool
+from app.pagination import encode_cursor
+from app.schema import apply_schema
+
+SEED_BATCH = 10000
+
+
+def seed_posts(graph, count):
+    """Create `count` posts owned by one benchmark author, in UNWIND batches."""
+    graph.run("MERGE (:User {id: 'bench-author', name: 'Bench Author', email: 'bench@example.com'})")
+    for start in range(0, count, SEED_BATCH):
+        size = min(SEED_BATCH, count - start)
+        graph.run("""
+        MATCH (u:User {id: 'bench-author'})
+        UNWIND range($start, $start + $size - 1) AS i
+        CREATE (p:Post {id: 'bench-post-' + toString(i), title: 'Post ' + toString(i),
+                        content: 'Lorem ipsum', created_at: datetime() - duration({seconds: i})})
+        CREATE (u)-[:CREATED]->(p)
+        """, start=start, size=size)
+        print(f"  seeded {start + size}/{count} posts")
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seed', type=int, default=0, help="number of posts to create first")
+    parser.add_argument('--page', type=int, default=10000, help="deep page number to measure")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    graph = get_pool(app).graph
+    apply_schema(graph)
+    if args.seed:
+        seed_posts(graph, args.seed)
+
+    offset = (args.page - 1) * args.limit
+    boundary = graph.run("""
+    MATCH (p:Post)<-[:CREATED]-(:User)
+    RETURN p.created_at AS created_at, p.id AS id
+    ORDER BY p.created_at DESC, p.id DESC SKIP $skip LIMIT 1
+    """, skip=offset - 1).data()
+    if not boundary:
+        sys.exit(f"Not enough posts for page {args.page}: seed at least {offset + args.limit}")
+    cursor = encode_cursor(boundary[0]['created_at'].isoformat(), boundary[0]['id'])
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+
+    def skip_query():
+        graph.run("""
+        MATCH (p:Post)<-[:CREATED]-(u:User)
+        RETURN p, u.id AS author_id, u.name AS author_name
+        ORDER BY p.created_at DESC, p.id DESC SKIP $skip LIMIT $limit
+        """, skip=offset, limit=args.limit).data()
+
+    rows = [
+        ("keyset page 1", timed(lambda: get(f"/posts?limit={args.limit}"), args.repeat)),
+        (f"keyset page {args.page}", timed(lambda: get(f"/posts?limit={args.limit}&cursor={cursor}"), args.repeat)),
+        (f"SKIP page {args.page}", timed(skip_query, args.repeat)),
+    ]
+    print(f"{'case':<24}{'p50 ms':>10}{'max ms':>10}")
+    for name, (p50, worst) in rows:
+        print(f"{name:<24}{p50:>10.2f}{worst:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: GET /users/<id>/path/<other_id> with each neighbour source (snapshot, bfs, cypher).
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds the same Barabási–Albert graph as
+bench_suggestions.py, loads the in-memory friend snapshot synchronously, then measures the
+route on random user pairs for each source.
+
+    python benchmarks/bench_path.py --users 20000 --edges 5 --pairs 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile, seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--edges', type=int, default=5, help="friendships created per new user")
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--sources', default='snapshot,bfs,cypher')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    os.environ['FRIEND_SNAPSHOT_ENABLED'] = 'true'
+    # Le thread de fond ne doit pas recharger pendant la mesure
+    os.environ['FRIEND_SNAPSHOT_REFRESH'] = '3600'
+    from app import create_app
+    from app.config import Config
+
+    rng = random.Random(args.seed)
+    app = create_app(Config)
+    client = app.test_client()
+    ids, degree, _ = seed(client, args.users, args.edges, rng)
+
+    holder = app.extensions['friend_snapshot']
+    started = time.perf_counter()
+    holder.refresh()
+    snapshot = holder.current
+    print(f"{snapshot.num_nodes} users, {snapshot.num_edges} relationships in snapshot, "
+          f"loaded in {time.perf_counter() - started:.2f} s")
+
+    pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(args.pairs)]
+    print(f"{'source':<10}{'p50 ms':>10}{'p99 ms':>10}{'found':>8}{'avg expanded':>14}")
+    for source in args.sources.split(','):
+        client.get(f"/users/{pairs[0][0]}/path/{pairs[0][1]}?source={source}")  # échauffement
+        samples, found, expanded = [], 0, []
+        for a, b in pairs:
+            started = time.perf_counter()
+            response = client.get(f"/users/{a}/path/{b}?source={source}")
+            samples.append((time.perf_counter() - started) * 1000)
+            body = response.get_json()
+            assert response.status_code in (200, 404, 422), body
+            found += response.status_code == 200
+            if body.get('expanded') is not None:
+                expanded.append(body['expanded'])
+        average = f"{sum(expanded) / len(expanded):.0f}" if expanded else "-"
+        print(f"{source:<10}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}{found:>8}{average:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: payload size and latency of GET /posts with and without ?fields= / ?include=.
+
+Requires a running Neo4j (see docker-compose.yaml). Seeds posts with large `content`
+through the /bulk endpoints, then measures full pages against title-only projections,
+and embedded comments (include=comments) against one GET /posts/<id>/comments per post.
+
+    python benchmarks/bench_projection.py --posts 500 --content-size 20000 --repeat 30
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def seed(client, posts, content_size, comments_per_post):
+    stamp = time.time()
+    users = [r['id'] for r in client.post("/bulk/users", json=[
+        {"name": f"Projection User {i}", "email": f"projection-{i}-{stamp}@example.com"} for i in range(10)]).get_json()['results']]
+    content = "x" * content_size
+    post_ids = [r['id'] for r in client.post("/bulk/posts", json=[
+        {"user_id": users[i % len(users)], "title": f"Post {i}", "content": content} for i in range(posts)]).get_json()['results']]
+    client.post("/bulk/comments", json=[
+        {"user_id": users[j % len(users)], "post_id": post_id, "content": f"Comment {j}"}
+        for post_id in post_ids for j in range(comments_per_post)])
+
+
+def measure(client, fetch, repeat):
+    samples, size = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = fetch(client)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, size
+
+
+def get(path):
+    def fetch(client):
+        response = client.get(path)
+        assert response.status_code == 200, response.get_json()
+        return len(response.data)
+    return fetch
+
+def page_then_comments(limit):
+    """Une page de posts puis une requête de commentaires par post (ce que fait le frontend)."""
+    def fetch(client):
+        response = client.get(f"/posts?limit={limit}&fields=id,title&include=author")
+        size = len(response.data)
+        for post in response.get_json():
+            size += len(client.get(f"/posts/{post['id']}/comments").data)
+        return size
+    return fetch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--content-size', type=int, default=20000, help="bytes of content per post")
+    parser.add_argument('--comments', type=int, default=5, help="comments per post")
+    parser.add_argument('--limit', type=int, default=50, help="page size")
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    from app import create_app
+    from app.config import Config
+
+    client = create_app(Config).test_client()
+    seed(client, args.posts, args.content_size, args.comments)
+    runs = [
+        ("full page", get(f"/posts?limit={args.limit}")),
+        ("fields=id,title", get(f"/posts?limit={args.limit}&fields=id,title&include=author")),
+        ("page + N comment GETs", page_then_comments(args.limit)),
+        ("include=comments", get(f"/posts?limit={args.limit}&fields=id,title&include=author,comments")),
+    ]
+    print(f"{args.limit} posts per page, {args.content_size} bytes of content, {args.comments} comments per post")
+    print(f"{'request':<24}{'bytes':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, fetch in runs:
+        measure(client, fetch, 2)  # échauffement
+        samples, size = measure(client, fetch, args.repeat)
+        print(f"{name:<24}{size:>12}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
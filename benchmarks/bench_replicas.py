@@ -0,0 +1,114 @@
+"""
+Benchmark: read/write routing to read replicas, with bookmarks for read-your-writes.
+
+Requires a running Neo4j (see docker-compose.yaml). Starts the local cluster stand-in
+(replica_standin.py), then runs the same read-heavy mix (friends lists, a few profile
+renames) with NEO4J_READ_ROUTING off and on. It reports throughput and where the round
+trips went, then checks read-your-writes: each client renames a user and reads it back at once
+with its bookmark cookie. Every instance of the stand-in is the same database, so this shows
+the routing and its overhead; read scaling needs real replicas.
+
+    python benchmarks/bench_replicas.py --replicas 2 --threads 8 --requests 4000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile
+from replica_standin import ReplicaStandIn
+
+
+def make_app(standin, routing):
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        NEO4J_URI = standin.primary_uri
+        NEO4J_READ_ROUTING = routing
+        NEO4J_READ_URIS = standin.read_uris
+        NEO4J_REPLICA_REFRESH_INTERVAL = 0.2
+        NEO4J_SCHEMA_BOOTSTRAP = False
+        CACHE_ENABLED = False
+    return create_app(BenchConfig)
+
+
+def seed(client, users):
+    stamp = time.time()
+    created = client.post("/bulk/users", json=[
+        {"name": f"Reader {i}", "email": f"reader-{i}-{stamp}@example.com"} for i in range(users)]).get_json()
+    ids = [r['id'] for r in sorted(created['results'], key=lambda r: r['index'])]
+    client.post("/bulk/friendships", json=[{"user_id": ids[i], "friend_id": ids[(i + 1) % users]} for i in range(users)])
+    return ids
+
+
+def hammer(app, ids, threads, requests, write_ratio):
+    samples, stale = [], [0]
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local = []
+        for n in range(requests // threads):
+            user_id = rng.choice(ids)
+            started = time.perf_counter()
+            if rng.random() < write_ratio:
+                # Read-your-writes: the bookmark cookie set by the PUT routes the GET
+                name = f"Renamed {seed}-{n}"
+                client.put(f"/users/{user_id}", json={"name": name})
+                if client.get(f"/users/{user_id}").get_json().get('name') != name:
+                    with lock:
+                        stale[0] += 1
+            else:
+                client.get(f"/users/{user_id}/friends")
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples, stale[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--target', default='localhost:7687')
+    parser.add_argument('--replicas', type=int, default=2)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    standin = ReplicaStandIn(args.target, args.replicas)
+    ids = seed(make_app(standin, False).test_client(), args.users)
+    print(f"{args.requests} requests ({args.write_ratio:.0%} rename + read back), {args.threads} threads, "
+          f"{args.replicas} replicas")
+    print(f"{'routing':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'stale':>8}  round trips")
+    for routing in (False, True):
+        app = make_app(standin, routing)
+        if routing:
+            app.test_client().get('/db/replicas')
+            time.sleep(1)   # first replica positions
+        standin.round_trips()
+        samples, stale, elapsed = hammer(app, ids, args.threads, args.requests, args.write_ratio)
+        print(f"{'on' if routing else 'off':<10}{len(samples) / elapsed:>10.0f}{percentile(samples, 0.5):>10.2f}"
+              f"{percentile(samples, 0.99):>10.2f}{stale:>8}  {standin.round_trips()}")
+        if routing:
+            stats = app.test_client().get('/db/replicas').get_json()
+            print(f"{'':<10}primary reads {stats['primary_reads']}, bookmark fallbacks {stats['bookmark_fallbacks']}, "
+                  f"replica reads {[r['reads'] for r in stats['replicas']]}")
+    standin.close()
+
+
+if __name__ == '__main__':
+    main()
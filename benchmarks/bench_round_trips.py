@@ -0,0 +1,76 @@
+"""
+Benchmark: p50/p99 latency and Bolt round trips per request behind an injected latency.
+
+Requires a running Neo4j (see docker-compose.yaml). Starts benchmarks/latency_proxy.py
+in-process, points the app at it and replays the handlers that used to chain several
+queries. Run it on two revisions to compare their round-trip counts and latencies.
+
+    python benchmarks/bench_round_trips.py --delay 0.005 --repeat 100
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from latency_proxy import LatencyProxy
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--target', default='localhost:7687')
+    parser.add_argument('--delay', type=float, default=0.005, help="seconds added per round trip")
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    host, port = args.target.rsplit(':', 1)
+    proxy = LatencyProxy(host, int(port), args.delay).start()
+    os.environ['NEO4J_URI'] = f"bolt://127.0.0.1:{proxy.port}"
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    # Pas de ping de vivacité pendant la mesure
+    os.environ['NEO4J_LIVENESS_CHECK_TIMEOUT'] = '-1'
+
+    from app import create_app
+    client = create_app().test_client()
+
+    alice = client.post("/users", json={"name": "Bench Alice", "email": f"alice-{time.time()}@example.com"}).get_json()['id']
+    bob = client.post("/users", json={"name": "Bench Bob", "email": f"bob-{time.time()}@example.com"}).get_json()['id']
+    client.post(f"/users/{alice}/friends", json={"friend_id": bob})
+    post = client.post(f"/users/{alice}/posts", json={"title": "Bench", "content": "Bench"}).get_json()['id']
+
+    scenarios = [
+        ("POST /users/<id>/posts", lambda: client.post(f"/users/{alice}/posts", json={"title": "t", "content": "c"})),
+        ("POST /posts/<id>/comments", lambda: client.post(f"/posts/{post}/comments", json={"user_id": bob, "content": "c"})),
+        ("GET /posts/<id>/comments", lambda: client.get(f"/posts/{post}/comments")),
+        ("GET /users/<id>/posts", lambda: client.get(f"/users/{alice}/posts")),
+        ("GET mutual_friends", lambda: client.get(f"/users/{alice}/mutual_friends/{bob}")),
+        ("POST /posts/<id>/like", lambda: client.post(f"/posts/{post}/like", json={"user_id": bob})),
+        ("DELETE /posts/<id>/like", lambda: client.delete(f"/posts/{post}/like", json={"user_id": bob})),
+        ("DELETE /comments/<missing>", lambda: client.delete("/comments/missing")),
+    ]
+
+    print(f"injected latency: {args.delay * 1000:.1f} ms per round trip, {args.repeat} requests per route")
+    print(f"{'route':<28}{'round trips':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, call in scenarios:
+        call()  # échauffement (ouverture de connexion)
+        proxy.reset()
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = call()
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code < 500, response.get_json()
+        trips = proxy.reset() / args.repeat
+        print(f"{name:<28}{trips:>12.1f}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+
+    proxy.close()
+
+
+if __name__ == '__main__':
+    main()
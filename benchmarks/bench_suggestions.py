@@ -0,0 +1,96 @@
+"""
+Benchmark: GET /users/<id>/suggestions on a synthetic power-law social graph.
+
+Requires a running Neo4j (see docker-compose.yaml). Builds a Barabási–Albert graph
+(each new user befriends `--edges` existing users, chosen proportionally to their degree)
+through the /bulk endpoints, then measures the suggestion query for hubs and ordinary
+users: without cache and without degree cap, without cache with the default cap, and
+from the warm cache.
+
+    python benchmarks/bench_suggestions.py --users 20000 --edges 5 --repeat 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def power_law_edges(n, m, rng):
+    """Barabási–Albert preferential attachment; returns (edges, degree per node)."""
+    edges, targets = [], []
+    degree = [0] * n
+    for node in range(m, n):
+        chosen = set(rng.sample(targets, m)) if len(targets) >= m else set(range(m))
+        while len(chosen) < m:
+            chosen.add(rng.choice(targets))
+        for other in chosen:
+            edges.append((node, other))
+            degree[node] += 1
+            degree[other] += 1
+            targets += [node, other]
+    return edges, degree
+
+
+def seed(client, n, m, rng):
+    stamp = time.time()
+    created = client.post("/bulk/users", json=[
+        {"name": f"PL User {i}", "email": f"pl-{i}-{stamp}@example.com"} for i in range(n)]).get_json()
+    ids = [r['id'] for r in sorted(created['results'], key=lambda r: r['index'])]
+    edges, degree = power_law_edges(n, m, rng)
+    client.post("/bulk/friendships", json=[{"user_id": ids[a], "friend_id": ids[b]} for a, b in edges])
+    by_degree = sorted(range(n), key=lambda i: degree[i], reverse=True)
+    return ids, degree, by_degree
+
+
+def measure(client, user_ids, repeat):
+    samples = []
+    for _ in range(repeat):
+        for user_id in user_ids:
+            started = time.perf_counter()
+            response = client.get(f"/users/{user_id}/suggestions")
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.get_json()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--edges', type=int, default=5, help="friendships created per new user")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ['NEO4J_SCHEMA_BOOTSTRAP'] = 'false'
+    from app import create_app
+    from app.config import Config
+
+    client = create_app(Config).test_client()
+    ids, degree, by_degree = seed(client, args.users, args.edges, random.Random(args.seed))
+    hubs = [ids[i] for i in by_degree[:10]]
+    ordinary = [ids[i] for i in by_degree[len(by_degree) // 2:len(by_degree) // 2 + 10]]
+    print(f"{args.users} users, max degree {degree[by_degree[0]]}, median degree {degree[by_degree[len(by_degree) // 2]]}")
+
+    default_cap = Config.SUGGESTIONS_DEGREE_CAP
+    runs = [("no cache, no cap", False, 10 ** 9), ("no cache, cap", False, default_cap), ("warm cache", True, default_cap)]
+    print(f"{'run':<20}{'users':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, cache_enabled, cap in runs:
+        Config.CACHE_ENABLED = cache_enabled
+        Config.SUGGESTIONS_DEGREE_CAP = cap
+        client = create_app(Config).test_client()
+        for group, users in (("hubs", hubs), ("ordinary", ordinary)):
+            measure(client, users, 1)  # échauffement (et remplissage du cache)
+            samples = measure(client, users, args.repeat)
+            print(f"{name:<20}{group:<10}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: throughput of the production launcher as the number of workers grows.
+
+Requires a running Neo4j (see docker-compose.yaml) and gunicorn. Starts `gunicorn wsgi:app`
+(gunicorn.conf.py) with 1, 2, 4... workers up to the core count, seeds a few entities and
+keeps `--concurrency` GET requests in flight for `--duration` seconds against each.
+
+    python benchmarks/bench_workers.py --threads 8 --concurrency 64 --duration 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from bench_async import ROOT, load, percentile, seed, wait_ready
+
+
+def worker_counts(max_workers):
+    count = 1
+    while count < max_workers:
+        yield count
+        count *= 2
+    yield max_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--port', type=int, default=5200)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.threads} threads per worker, {args.concurrency} concurrent clients")
+    print(f"{'workers':<9}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'speedup':>9}")
+    baseline = None
+    for count in worker_counts(args.max_workers):
+        env = dict(os.environ, NEO4J_SCHEMA_BOOTSTRAP='false', CACHE_ENABLED='false',
+                   WEB_WORKERS=str(count), WEB_THREADS=str(args.threads),
+                   WEB_BIND=f"127.0.0.1:{args.port}", WEB_ACCESS_LOG='')
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'wsgi:app'], cwd=ROOT, env=env)
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(base)
+            paths = seed(base)
+            load(base, paths, count * 2, 2)  # échauffement (un pool par worker)
+            samples, errors = load(base, paths, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        rate = len(samples) / args.duration
+        baseline = baseline or rate
+        print(f"{count:<9}{rate:>10.0f}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.99):>10.2f}"
+              f"{errors:>8}{rate / baseline:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
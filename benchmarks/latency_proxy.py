@@ -0,0 +1,90 @@
+"""
+Local Bolt stand-in that adds network latency in front of a real Neo4j.
+
+A plain TCP proxy: every chunk the driver sends is held for `delay` seconds before
+being forwarded, so each client -> server round trip costs at least `delay`. It also
+counts those chunks, which approximates the number of round trips issued.
+
+    python benchmarks/latency_proxy.py --listen 7688 --target localhost:7687 --delay 0.005
+    NEO4J_URI=bolt://localhost:7688 python run.py
+"""
+import argparse
+import socket
+import threading
+import time
+
+
+class LatencyProxy:
+    def __init__(self, target_host, target_port, delay, listen_host='127.0.0.1', listen_port=0):
+        self.target = (target_host, target_port)
+        self.delay = delay
+        self.round_trips = 0
+        self._lock = threading.Lock()
+        self._server = socket.create_server((listen_host, listen_port))
+        self.port = self._server.getsockname()[1]
+        self._closed = False
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def close(self):
+        self._closed = True
+        self._server.close()
+
+    def reset(self):
+        with self._lock:
+            count, self.round_trips = self.round_trips, 0
+        return count
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._pump, args=(client, upstream, True), daemon=True).start()
+            threading.Thread(target=self._pump, args=(upstream, client, False), daemon=True).start()
+
+    def _pump(self, source, destination, delayed):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if delayed:
+                    with self._lock:
+                        self.round_trips += 1
+                    time.sleep(self.delay)
+                destination.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, destination):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--listen', type=int, default=7688)
+    parser.add_argument('--target', default='localhost:7687')
+    parser.add_argument('--delay', type=float, default=0.005, help="seconds added per round trip")
+    args = parser.parse_args()
+    host, port = args.target.rsplit(':', 1)
+    proxy = LatencyProxy(host, int(port), args.delay, listen_port=args.listen).start()
+    print(f"Proxying 127.0.0.1:{proxy.port} -> {args.target} with {args.delay * 1000:.1f} ms per round trip")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        proxy.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,460 @@
+"""
+Load test: mixed API workload on a synthetic social graph, with per-route throughput and latency.
+
+Requires a running Neo4j (see docker-compose.yaml). Replaces the old sequential test.py.
+
+1. Seeding. A synthetic graph is written through the /bulk endpoints:
+   - users, with a `--degree` mean friend count,
+   - a power-law (Barabási–Albert) or uniform friend distribution,
+   - posts, comments and likes, skewed towards well-connected users.
+   With `--dataset FILE` the ids are saved on the first run and reused afterwards, so runs can be compared.
+
+2. Load. The workload mixes reads (profiles, friends, feed, posts, comments) and writes (likes, comments, posts).
+   Weights are set with `--mix feed=30,like=10`. Popular users and posts are picked more often.
+   - Closed loop (default): `--concurrency` clients send requests back to back.
+   - Open loop: `--rate` requests/s arrive on a Poisson schedule, whatever the response times. Latency is then
+     measured from the scheduled start, so queueing behind a slow server is counted.
+   The first `--warmup` seconds are left out.
+
+3. Output. A per-route table is printed. `--output FILE` writes the same results as JSON.
+   `--baseline FILE` compares the run with a previous JSON output and exits with status 1 on a regression:
+   p50 or p99 slower, or throughput lower, by more than `--tolerance`, or a higher error rate.
+
+Against a running server (python run.py, gunicorn ...) or the app in this process:
+
+    python benchmarks/loadtest.py --url http://localhost:5000 --dataset load.json --concurrency 16 --duration 60
+    python benchmarks/loadtest.py --in-process --dataset load.json --rate 200 --output after.json --baseline before.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggestions import percentile, power_law_edges
+
+# Items per /bulk call
+SEED_CHUNK = 5000
+# Routes with fewer requests than this are too noisy to compare with the baseline
+MIN_SAMPLES = 50
+
+
+# --- Clients ---
+
+class HttpClient:
+    """One keep-alive HTTP connection per thread."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except Exception:
+            connection.close()
+            self._local.connection = None
+            raise
+        if 'json' not in (response.getheader('Content-Type') or ''):
+            return response.status, None
+        return response.status, json.loads(data)
+
+
+class InProcessClient:
+    """The Flask app in this process, through one test client per thread."""
+
+    def __init__(self):
+        from app import create_app
+        from app.config import Config
+
+        class BenchConfig(Config):
+            NEO4J_SCHEMA_BOOTSTRAP = False
+        self.app = create_app(BenchConfig)
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+# --- Synthetic graph ---
+
+def uniform_edges(n, m, rng):
+    """Random graph with about n * m distinct friendships; returns (edges, degree per node)."""
+    pairs = set()
+    for _ in range(n * m):
+        a, b = rng.randrange(n), rng.randrange(n)
+        if a != b:
+            pairs.add((min(a, b), max(a, b)))
+    degree = [0] * n
+    for a, b in pairs:
+        degree[a] += 1
+        degree[b] += 1
+    return sorted(pairs), degree
+
+
+def bulk(client, path, items):
+    """Sends items in SEED_CHUNK-sized /bulk calls; returns the generated id of each (None if it failed)."""
+    ids = []
+    for start in range(0, len(items), SEED_CHUNK):
+        status, body = client.request("POST", path, items[start:start + SEED_CHUNK])
+        if status != 200:
+            raise RuntimeError(f"POST {path} failed with {status}: {body}")
+        ids += [r.get('id') if r['status'] < 300 else None for r in sorted(body['results'], key=lambda r: r['index'])]
+    return ids
+
+
+def seed(client, args, rng):
+    n = args.users
+    stamp = time.time()
+    started = time.perf_counter()
+    users = bulk(client, "/bulk/users", [
+        {"name": f"Load User {i}", "email": f"load-{i}-{stamp}@example.com"} for i in range(n)])
+    m = max(1, round(args.degree / 2))
+    edges, degree = power_law_edges(n, m, rng) if args.distribution == 'powerlaw' else uniform_edges(n, m, rng)
+    bulk(client, "/bulk/friendships", [{"user_id": users[a], "friend_id": users[b]} for a, b in edges])
+
+    # Well-connected users post, comment and like more; their posts get more comments and likes
+    activity = [d + 1 for d in degree]
+    authors = rng.choices(range(n), weights=activity, k=round(n * args.posts))
+    posts = bulk(client, "/bulk/posts", [
+        {"user_id": users[a], "title": f"Post {i}", "content": "Synthetic load test post"} for i, a in enumerate(authors)])
+    popularity = [activity[a] for a in authors]
+    count = round(len(posts) * args.comments)
+    comments = bulk(client, "/bulk/comments", [
+        {"user_id": users[u], "post_id": posts[p], "content": "Synthetic comment"}
+        for p, u in zip(rng.choices(range(len(posts)), weights=popularity, k=count),
+                        rng.choices(range(n), weights=activity, k=count))])
+    count = round(len(posts) * args.likes)
+    bulk(client, "/bulk/likes", [
+        {"user_id": users[u], "post_id": posts[p]}
+        for p, u in zip(rng.choices(range(len(posts)), weights=popularity, k=count),
+                        rng.choices(range(n), weights=activity, k=count))])
+
+    print(f"Seeded {n} users, {len(edges)} friendships ({args.distribution}, max degree {max(degree)}), "
+          f"{len(posts)} posts, {len(comments)} comments, {count} likes "
+          f"in {time.perf_counter() - started:.1f}s")
+    return {
+        "distribution": args.distribution,
+        "friendships": len(edges),
+        "users": users, "activity": activity,
+        "posts": posts, "popularity": popularity,
+        "comments": [c for c in comments if c],
+        "likes": count,
+    }
+
+
+def load_dataset(client, args, rng):
+    if args.dataset and os.path.exists(args.dataset):
+        with open(args.dataset) as f:
+            dataset = json.load(f)
+        print(f"Reusing {args.dataset}: {len(dataset['users'])} users, {len(dataset['posts'])} posts")
+        return dataset
+    dataset = seed(client, args, rng)
+    if args.dataset:
+        with open(args.dataset, 'w') as f:
+            json.dump(dataset, f)
+    return dataset
+
+
+def describe(dataset):
+    return {"users": len(dataset['users']), "friendships": dataset['friendships'], "distribution": dataset['distribution'],
+            "posts": len(dataset['posts']), "comments": len(dataset['comments']), "likes": dataset['likes']}
+
+
+# --- Load ---
+
+class Picker:
+    """Random users, posts and comments of the dataset, popular ones more often."""
+
+    def __init__(self, dataset, rng):
+        self.rng = rng
+        self.users = [u for u in dataset['users'] if u]
+        self.user_weights = list(itertools.accumulate(w for u, w in zip(dataset['users'], dataset['activity']) if u))
+        self.posts = [p for p in dataset['posts'] if p]
+        self.post_weights = list(itertools.accumulate(w for p, w in zip(dataset['posts'], dataset['popularity']) if p))
+        self.comments = dataset['comments']
+
+    def user(self):
+        return self.rng.choices(self.users, cum_weights=self.user_weights)[0]
+
+    def post(self):
+        return self.rng.choices(self.posts, cum_weights=self.post_weights)[0]
+
+    def comment(self):
+        return self.rng.choice(self.comments)
+
+
+# name: (route, default weight, request builder)
+OPERATIONS = {
+    'profile': ("GET /users/<id>", 15, lambda p: ("GET", f"/users/{p.user()}", None)),
+    'friends': ("GET /users/<id>/friends", 15, lambda p: ("GET", f"/users/{p.user()}/friends", None)),
+    'feed': ("GET /users/<id>/feed", 20, lambda p: ("GET", f"/users/{p.user()}/feed", None)),
+    'user_posts': ("GET /users/<id>/posts", 10, lambda p: ("GET", f"/users/{p.user()}/posts", None)),
+    'post': ("GET /posts/<id>", 10, lambda p: ("GET", f"/posts/{p.post()}", None)),
+    'comments': ("GET /posts/<id>/comments", 10, lambda p: ("GET", f"/posts/{p.post()}/comments", None)),
+    'suggestions': ("GET /users/<id>/suggestions", 2, lambda p: ("GET", f"/users/{p.user()}/suggestions", None)),
+    'like': ("POST /posts/<id>/like", 8, lambda p: ("POST", f"/posts/{p.post()}/like", {"user_id": p.user()})),
+    'unlike': ("DELETE /posts/<id>/like", 3, lambda p: ("DELETE", f"/posts/{p.post()}/like", {"user_id": p.user()})),
+    'comment': ("POST /posts/<id>/comments", 5, lambda p: (
+        "POST", f"/posts/{p.post()}/comments", {"user_id": p.user(), "content": "Load test comment"})),
+    'like_comment': ("POST /comments/<id>/like", 1, lambda p: (
+        "POST", f"/comments/{p.comment()}/like", {"user_id": p.user()})),
+    'create_post': ("POST /users/<id>/posts", 1, lambda p: (
+        "POST", f"/users/{p.user()}/posts", {"title": "Load test post", "content": "Posted during a load test"})),
+}
+
+
+def parse_mix(text):
+    mix = {name: weight for name, (_, weight, _) in OPERATIONS.items()}
+    for item in filter(None, (text or '').split(',')):
+        name, _, weight = item.partition('=')
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Recorder:
+    """(route, intended start, latency ms, outcome) of every request, per thread."""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def add(self, local):
+        with self._lock:
+            self.samples.extend(local)
+
+
+def call(client, picker, name, intended, local):
+    route, _, build = OPERATIONS[name]
+    method, path, body = build(picker)
+    try:
+        status, _ = client.request(method, path, body)
+        outcome = 'ok' if status < 400 else 'rejected' if status < 500 else 'error'
+    except Exception as e:
+        print(f"{method} {path} failed: {e}")
+        outcome = 'error'
+    local.append((route, intended, (time.perf_counter() - intended) * 1000, outcome))
+
+
+def closed_loop(client, dataset, mix, args, recorder):
+    """`concurrency` clients, each sending its next request as soon as the previous one is answered."""
+    deadline = time.perf_counter() + args.duration
+    names, weights = list(mix), list(mix.values())
+
+    def worker(index):
+        picker = Picker(dataset, random.Random(args.seed + index))
+        local = []
+        while time.perf_counter() < deadline:
+            call(client, picker, picker.rng.choices(names, weights)[0], time.perf_counter(), local)
+        recorder.add(local)
+
+    run_threads(worker, args.concurrency)
+
+
+def open_loop(client, dataset, mix, args, recorder):
+    """Poisson arrivals at `rate` per second, served by up to `concurrency` clients."""
+    arrivals = queue.Queue()
+    names, weights = list(mix), list(mix.values())
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    def schedule():
+        rng = random.Random(args.seed)
+        at = started
+        while True:
+            at += rng.expovariate(args.rate)
+            if at >= deadline:
+                break
+            delay = at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            arrivals.put((at, rng.choices(names, weights)[0]))
+        for _ in range(args.concurrency):
+            arrivals.put(None)
+
+    def worker(index):
+        picker = Picker(dataset, random.Random(args.seed + index + 1))
+        local = []
+        while True:
+            item = arrivals.get()
+            if item is None:
+                break
+            intended, name = item
+            if time.perf_counter() >= deadline + args.drain:
+                # Saturated server: arrivals still queued after the drain period are not sent
+                local.append((OPERATIONS[name][0], intended, None, 'dropped'))
+                continue
+            call(client, picker, name, intended, local)
+        recorder.add(local)
+
+    scheduler = threading.Thread(target=schedule, daemon=True)
+    scheduler.start()
+    run_threads(worker, args.concurrency)
+
+
+def run_threads(worker, count):
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+# --- Results ---
+
+def summarize(samples, elapsed):
+    latencies = [s[2] for s in samples if s[3] != 'dropped']
+    outcomes = {outcome: sum(1 for s in samples if s[3] == outcome) for outcome in ('ok', 'rejected', 'error', 'dropped')}
+    summary = {"requests": len(latencies), **outcomes, "rps": round(len(latencies) / elapsed, 2),
+               "error_rate": round(outcomes['error'] / len(latencies), 4) if latencies else 0.0}
+    if latencies:
+        summary.update({
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            **{f"p{label}_ms": round(percentile(latencies, q), 2)
+               for label, q in (("50", 0.5), ("90", 0.9), ("99", 0.99), ("999", 0.999))},
+            "max_ms": round(max(latencies), 2),
+        })
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def report(results):
+    print(f"{'route':<30}{'req':>8}{'req/s':>9}{'4xx':>6}{'err':>6}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for route, s in sorted(results['routes'].items()) + [("all", results['total'])]:
+        if not s['requests']:
+            continue
+        print(f"{route:<30}{s['requests']:>8}{s['rps']:>9.1f}{s['rejected']:>6}{s['error']:>6}"
+              f"{s['p50_ms']:>9.2f}{s['p90_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}")
+    if results['total']['dropped']:
+        print(f"{results['total']['dropped']} arrivals dropped: the server could not keep up with the rate")
+
+
+def compare(results, baseline, tolerance):
+    """Prints the change against `baseline` per route; returns the regressions."""
+    meta, base_meta = results['meta'], baseline['meta']
+    for key in ('mode', 'concurrency', 'rate', 'mix', 'dataset'):
+        if meta.get(key) != base_meta.get(key):
+            print(f"Warning: {key} differs from the baseline ({base_meta.get(key)} -> {meta.get(key)})")
+    regressions = []
+    print(f"\nAgainst baseline {base_meta.get('git_commit')} ({base_meta.get('started_at')}), tolerance {tolerance:.0%}")
+    print(f"{'route':<30}{'req/s':>10}{'p50':>10}{'p99':>10}{'errors':>10}")
+    routes = sorted(set(results['routes']) & set(baseline['routes']))
+    for route, now, before in [(r, results['routes'][r], baseline['routes'][r]) for r in routes] + \
+                              [("all", results['total'], baseline['total'])]:
+        if min(now['requests'], before['requests']) < MIN_SAMPLES:
+            continue
+        change = {key: now[key] / before[key] - 1 if before[key] else 0.0 for key in ('rps', 'p50_ms', 'p99_ms')}
+        print(f"{route:<30}{change['rps']:>+10.1%}{change['p50_ms']:>+10.1%}{change['p99_ms']:>+10.1%}"
+              f"{now['error_rate'] - before['error_rate']:>+10.2%}")
+        # In open loop the throughput is set by --rate: only latency counts
+        if meta['mode'] == 'closed' and change['rps'] < -tolerance:
+            regressions.append(f"{route}: throughput {change['rps']:+.1%}")
+        for key in ('p50_ms', 'p99_ms'):
+            if change[key] > tolerance:
+                regressions.append(f"{route}: {key[:-3]} {change[key]:+.1%}")
+        if now['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"{route}: error rate {before['error_rate']:.2%} -> {now['error_rate']:.2%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:5000', help="server under test")
+    target.add_argument('--in-process', action='store_true', help="call the Flask app in this process instead")
+    parser.add_argument('--dataset', help="JSON file of seeded ids: written on the first run, reused afterwards")
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--degree', type=float, default=10, help="mean number of friends")
+    parser.add_argument('--distribution', choices=('powerlaw', 'uniform'), default='powerlaw')
+    parser.add_argument('--posts', type=float, default=2, help="posts per user")
+    parser.add_argument('--comments', type=float, default=3, help="comments per post")
+    parser.add_argument('--likes', type=float, default=5, help="likes per post")
+    parser.add_argument('--mix', help="operation weights, e.g. feed=30,like=10,suggestions=0 "
+                                      f"(operations: {', '.join(OPERATIONS)})")
+    parser.add_argument('--concurrency', type=int, default=8, help="clients (open loop: maximum in flight)")
+    parser.add_argument('--rate', type=float, help="open loop: arrivals per second")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of load")
+    parser.add_argument('--warmup', type=float, default=5, help="first seconds left out of the results")
+    parser.add_argument('--drain', type=float, default=10, help="open loop: seconds to serve the backlog after the end")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="previous --output to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed slowdown before a regression is reported")
+    args = parser.parse_args()
+    if args.warmup >= args.duration:
+        parser.error("--warmup must be shorter than --duration")
+
+    client = InProcessClient() if args.in_process else HttpClient(args.url)
+    dataset = load_dataset(client, args, random.Random(args.seed))
+    mix = parse_mix(args.mix)
+    if not dataset['comments']:
+        mix.pop('like_comment', None)
+    mode = 'open' if args.rate else 'closed'
+    print(f"{mode} loop, {f'{args.rate:g} req/s, ' if args.rate else ''}{args.concurrency} clients, "
+          f"{args.duration:g}s ({args.warmup:g}s warmup)")
+
+    recorder = Recorder()
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    started = time.perf_counter()
+    (open_loop if args.rate else closed_loop)(client, dataset, mix, args, recorder)
+    measured_from = started + args.warmup
+    samples = [s for s in recorder.samples if s[1] >= measured_from]
+    elapsed = args.duration - args.warmup
+
+    routes = {}
+    for sample in samples:
+        routes.setdefault(sample[0], []).append(sample)
+    results = {
+        "meta": {"started_at": started_at, "git_commit": git_commit(),
+                 "target": "in-process" if args.in_process else args.url, "mode": mode,
+                 "concurrency": args.concurrency, "rate": args.rate, "duration": args.duration,
+                 "warmup": args.warmup, "seed": args.seed, "mix": mix, "dataset": describe(dataset)},
+        "routes": {route: summarize(route_samples, elapsed) for route, route_samples in routes.items()},
+        "total": summarize(samples, elapsed),
+    }
+    report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regression")
+
+
+if __name__ == '__main__':
+    main()
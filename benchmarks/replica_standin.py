@@ -0,0 +1,70 @@
+"""
+Local stand-in for a Neo4j cluster: one "primary" and N "read replicas" on separate ports.
+
+Every instance is a latency proxy (see latency_proxy.py) in front of the same single Neo4j, so data is
+shared and replication is instantaneous. That is enough to exercise read/write routing, replica
+monitoring and bookmarks (app/replicas.py) without a Neo4j Enterprise cluster, and to see from the
+per-instance round-trip counts where each query went. A replica can be stopped to test failover.
+
+    python benchmarks/replica_standin.py --replicas 2 --target localhost:7687
+    NEO4J_URI=bolt://localhost:7700 NEO4J_READ_ROUTING=true \
+        NEO4J_READ_URIS=bolt://localhost:7701,bolt://localhost:7702 python run.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from latency_proxy import LatencyProxy
+
+
+class ReplicaStandIn:
+    def __init__(self, target, replicas=2, delay=0.0, base_port=0):
+        host, port = target.rsplit(':', 1)
+        ports = [base_port + i if base_port else 0 for i in range(replicas + 1)]
+        self.primary = LatencyProxy(host, int(port), delay, listen_port=ports[0]).start()
+        self.replicas = [LatencyProxy(host, int(port), delay, listen_port=p).start() for p in ports[1:]]
+
+    @property
+    def primary_uri(self):
+        return f"bolt://127.0.0.1:{self.primary.port}"
+
+    @property
+    def read_uris(self):
+        return ','.join(f"bolt://127.0.0.1:{proxy.port}" for proxy in self.replicas)
+
+    def stop_replica(self, index):
+        """Simulated outage: the replica stops accepting connections."""
+        self.replicas[index].close()
+
+    def round_trips(self):
+        """Round trips per instance since the last call."""
+        return {"primary": self.primary.reset(),
+                **{f"replica{i + 1}": proxy.reset() for i, proxy in enumerate(self.replicas)}}
+
+    def close(self):
+        for proxy in [self.primary] + self.replicas:
+            proxy.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--replicas', type=int, default=2)
+    parser.add_argument('--target', default='localhost:7687')
+    parser.add_argument('--port', type=int, default=7700, help="primary port; replicas use the next ones")
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds added per round trip")
+    args = parser.parse_args()
+    standin = ReplicaStandIn(args.target, args.replicas, args.delay, base_port=args.port)
+    print(f"NEO4J_URI={standin.primary_uri} NEO4J_READ_ROUTING=true NEO4J_READ_URIS={standin.read_uris}")
+    try:
+        while True:
+            time.sleep(10)
+            print(standin.round_trips())
+    except KeyboardInterrupt:
+        standin.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# gunicorn.conf.py
+"""
+Configuration gunicorn du point d'entrée de production (`gunicorn wsgi:app`).
+
+Plusieurs processus (WEB_WORKERS), chacun avec un pool de threads (WEB_THREADS) : les
+handlers passent l'essentiel de leur temps à attendre Neo4j, d'où le worker "gthread".
+L'application est chargée une fois dans le maître puis partagée par fork (preload_app) ;
+le Graph py2neo éventuellement ouvert par le bootstrap du schéma est fermé avant chaque
+fork, si bien que chaque worker ouvre son propre pool au premier get_db au lieu de
+partager les sockets du maître. NEO4J_MAX_CONNECTION_POOL_SIZE s'entend par worker et
+doit être au moins égal à WEB_THREADS.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 8))
+preload_app = True
+
+# Recyclage des workers après un certain nombre de requêtes (fuites mémoire) ; le jitter
+# évite qu'ils redémarrent tous en même temps. 0 désactive le recyclage.
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 1000))
+
+# SIGTERM : le worker cesse d'accepter des connexions et termine les requêtes en cours
+# pendant au plus graceful_timeout secondes avant d'être tué
+graceful_timeout = float(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+timeout = float(os.environ.get('WEB_TIMEOUT', 60))
+keepalive = float(os.environ.get('WEB_KEEPALIVE', 5))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-') or None  # vide : pas de log d'accès
+
+
+def _pools(server):
+    # Primaire et répliques de lecture (NEO4J_READ_ROUTING)
+    from app.database import get_pools
+    return get_pools(server.app.wsgi())
+
+def pre_fork(server, worker):
+    """Dans le maître : ne jamais transmettre de connexion Bolt ouverte à un worker."""
+    for pool in _pools(server):
+        pool.close()
+
+def post_fork(server, worker):
+    """Dans le worker : repart d'un pool neuf (compteurs et sémaphore propres au processus)."""
+    for pool in _pools(server):
+        pool.reset()
+    server.log.info(f"Worker {worker.pid} ready, Neo4j pool opened on first request")
+
+def worker_exit(server, worker):
+    """Fin du worker (arrêt gracieux, recyclage max_requests) : ferme proprement ses connexions."""
+    for pool in _pools(server):
+        pool.close()
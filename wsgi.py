@@ -0,0 +1,5 @@
+# wsgi.py
+# Point d'entrée de production : gunicorn wsgi:app (réglages dans gunicorn.conf.py)
+from app import create_app
+
+app = create_app()